@@ -0,0 +1,498 @@
+import numpy as np
+import pandas as pd
+
+from store import COUNTED_COLUMNS, incident_store
+
+# Count tables behind the dashboard views. Nothing here imports Streamlit:
+# the views wrap these builders in st.cache_* and the headless API (api.py)
+# caches them itself, so both serve the same numbers. The builders scan the
+# frame's compact incident store (store.py) rather than its string columns.
+
+# Epoch day 0 (1970-01-01) was a Thursday; shift so weeks start on Monday
+WEEK_OFFSET = 3
+
+# Stratified sample kept at ingest for the approximate mode: a share of every
+# (category, year) stratum, and never fewer than SAMPLE_MIN of its rows
+SAMPLE_RATE = 0.05
+SAMPLE_MIN = 50
+SAMPLE_SEED = 2018
+
+# Normal quantile for 95% confidence intervals
+Z_95 = 1.96
+
+# Seasonal forecasts: weeks projected ahead, and the recent weeks they are
+# fitted on; annual harmonics are only fitted once two years are available
+FORECAST_WEEKS = 12
+FIT_WEEKS = 156
+WEEKS_PER_YEAR = 365.25 / 7
+
+
+def count_values(df, column, category='All Types'):
+    """Value counts of a column, optionally within one incident category"""
+    if column in COUNTED_COLUMNS:
+        store = incident_store(df)
+        field = COUNTED_COLUMNS[column]
+        mask = None if category == 'All Types' else store.mask(category=category)
+        counts = pd.Series(store.count(field, mask=mask)[:-1], name='count',
+                           index=pd.Index(store.labels[field], name=column))
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    values = df[column]
+    if category != 'All Types':
+        values = values[(df['incident_category'] == category).to_numpy()]
+    counts = values.value_counts()
+    return counts[counts > 0]  # Categorical columns list unused labels too
+
+
+def build_daily_counts(df):
+    """Count incidents per category and day with a single bincount
+
+    Returns a (categories + 1) x days matrix, where the last row holds
+    incidents without a category, the category names and the epoch day of
+    the first column.
+    """
+    store = incident_store(df)
+    days = store.days()
+    valid = days >= 0
+    category_codes, categories = store.factorize('category')
+    category_codes = np.where(category_codes < 0, len(categories), category_codes)
+
+    if not valid.any():
+        counts = np.zeros((len(categories) + 1, 0), dtype=np.int32)
+        return counts, list(categories), 0
+
+    first_day = int(days[valid].min())
+    num_days = int(days[valid].max()) - first_day + 1
+    cells = category_codes[valid] * num_days + (days[valid] - first_day)
+    counts = np.bincount(cells, minlength=(len(categories) + 1) * num_days)
+    counts = counts.astype(np.int32).reshape(len(categories) + 1, num_days)
+    counts.flags.writeable = False
+
+    return counts, list(categories), first_day
+
+
+def build_monthly_counts(daily, categories, first_day):
+    """Count incidents per category and month from the daily matrix
+
+    Sums each month's columns, so no rows are scanned. Returns the matrix,
+    the category names and the code (year * 12 + month - 1) of the first
+    column.
+    """
+    if daily.shape[1] == 0:
+        return daily, categories, 0
+
+    dates = pd.to_datetime(np.arange(first_day, first_day + daily.shape[1]), unit='D')
+    month_codes = dates.year * 12 + dates.month - 1
+    starts = np.flatnonzero(np.r_[True, np.diff(month_codes) != 0])
+    monthly = np.add.reduceat(daily, starts, axis=1)
+    monthly.flags.writeable = False
+
+    return monthly, categories, int(month_codes[0])
+
+
+def select_category(counts, categories, category):
+    """Row of a category count matrix, or the column sums for 'All Types'"""
+    if category == 'All Types':
+        return counts.sum(axis=0)
+    if category in categories:
+        return counts[categories.index(category)]
+    return np.zeros(counts.shape[1], dtype=counts.dtype)
+
+
+def monthly_table(monthly_counts, category='All Types'):
+    """Incident counts by year and month for a category"""
+    monthly, categories, first_month = monthly_counts
+    values = select_category(monthly, categories, category)
+    codes = first_month + np.arange(len(values))
+    return pd.DataFrame({
+        'year': codes // 12,
+        'month_num': codes % 12 + 1,
+        'count': values.astype(np.int64)
+    })
+
+
+def daily_series(daily_counts, category='All Types', granularity='Daily'):
+    """Daily or weekly incident counts for a category, zero-filled"""
+    counts, categories, first_day = daily_counts
+    daily = select_category(counts, categories, category)
+
+    days = np.arange(first_day, first_day + len(daily))
+    if granularity == 'Weekly' and len(days):
+        # Re-bin the day codes into Monday-based weeks
+        weeks = (days + WEEK_OFFSET) // 7
+        values = np.bincount(weeks - weeks[0], weights=daily).astype(np.int64)
+        days = (weeks[0] + np.arange(len(values))) * 7 - WEEK_OFFSET
+    else:
+        values = daily.astype(np.int64)
+
+    return pd.Series(values, index=pd.to_datetime(days, unit='D'), name='count')
+
+
+def build_hour_counts(df):
+    """Count incidents by category, district, year, weekday and hour
+
+    One bincount over the integer codes builds the whole cube; the
+    hour-based views slice it instead of scanning rows.
+    """
+    store = incident_store(df)
+    category_codes, categories = store.factorize('category')
+    district_codes, districts = store.factorize('district')
+    year_codes, years = store.factorize('year')
+    weekday = store.codes['weekday']
+    hour = store.codes['hour']
+
+    # Incidents without a category, district or year go to a trailing slot
+    # so they still count towards the 'All ...' selections
+    category_codes = np.where(category_codes < 0, len(categories), category_codes)
+    district_codes = np.where(district_codes < 0, len(districts), district_codes)
+    year_codes = np.where(year_codes < 0, len(years), year_codes)
+    shape = (len(categories) + 1, len(districts) + 1, len(years) + 1, 7, 24)
+
+    valid = (weekday < 7) & (hour < 24)
+    cells = np.ravel_multi_index(
+        (category_codes[valid], district_codes[valid], year_codes[valid],
+         weekday[valid], hour[valid]),
+        shape)
+    counts = np.bincount(cells, minlength=np.prod(shape)).astype(np.int32)
+    counts = counts.reshape(shape)
+    counts.flags.writeable = False
+
+    return counts, list(categories), list(districts), [int(y) for y in years]
+
+
+def _select(counts, axis, labels, value, all_label):
+    """Sum an axis for the 'All ...' choice, otherwise take one label"""
+    if value == all_label:
+        return counts.sum(axis=axis)
+    if value in labels:
+        return counts.take(labels.index(value), axis=axis)
+    return np.zeros(np.delete(counts.shape, axis), dtype=counts.dtype)
+
+
+def weekday_hour_counts(hour_counts, category='All Types', district='All Districts',
+                        year='All Years', by_district=False):
+    """7x24 weekday-by-hour counts for a selection, or Dx7x24 per district"""
+    counts, categories, districts, years = hour_counts
+
+    cube = _select(counts, 0, categories, category, 'All Types')
+    cube = _select(cube, 1, years, year, 'All Years')
+    if by_district:
+        # Drop the trailing slot of incidents without a district
+        return cube[:-1]
+    return _select(cube, 0, districts, district, 'All Districts')
+
+
+def build_resolution_counts(df):
+    """Count incidents by category, district, year and resolution
+
+    Like build_hour_counts(), one bincount over the integer codes builds
+    the whole cube, with a trailing slot for incidents missing a label.
+    """
+    store = incident_store(df)
+    category_codes, categories = store.factorize('category')
+    district_codes, districts = store.factorize('district')
+    year_codes, years = store.factorize('year')
+    resolution_codes, resolutions = store.factorize('resolution')
+
+    codes = []
+    for column_codes, labels in ((category_codes, categories), (district_codes, districts),
+                                 (year_codes, years), (resolution_codes, resolutions)):
+        codes.append(np.where(column_codes < 0, len(labels), column_codes))
+    shape = (len(categories) + 1, len(districts) + 1, len(years) + 1, len(resolutions) + 1)
+
+    cells = np.ravel_multi_index(codes, shape)
+    counts = np.bincount(cells, minlength=np.prod(shape)).astype(np.int32)
+    counts = counts.reshape(shape)
+    counts.flags.writeable = False
+
+    return (counts, list(categories), list(districts), [int(y) for y in years],
+            list(resolutions))
+
+
+def clearance_table(resolution_counts, group_by, category='All Types',
+                    district='All Districts', year='All Years'):
+    """Cleared, open and total incidents per category, district or year
+
+    Filters on the other two dimensions are applied to the cube first. An
+    incident counts as cleared when resolved by anything but 'Open or
+    Active'; 'Unfounded' reports are left out of the rate entirely.
+    """
+    counts, categories, districts, years, resolutions = resolution_counts
+    axes = {'category': (0, categories, category, 'All Types'),
+            'district': (1, districts, district, 'All Districts'),
+            'year': (2, years, year, 'All Years')}
+
+    # Slice the filter dimensions from the last axis down so indices hold
+    cube = counts
+    for name in ('year', 'district', 'category'):
+        if name != group_by:
+            cube = _select(cube, *axes[name])
+    labels = axes[group_by][1]
+    cube = cube[:len(labels)]  # Drop the slot of incidents without a label
+
+    resolution_labels = resolutions + [None]
+    open_cases = _select(cube, 1, resolution_labels, 'Open or Active', None)
+    unfounded = _select(cube, 1, resolution_labels, 'Unfounded', None)
+    total = cube.sum(axis=1) - unfounded
+    table = pd.DataFrame({
+        group_by: labels,
+        'total': total,
+        'cleared': total - open_cases,
+        'open': open_cases
+    })
+    table['rate'] = table['cleared'] / table['total'].where(table['total'] > 0)
+    return table
+
+
+def build_district_counts(df):
+    """Count incidents per district and category with a single bincount"""
+    store = incident_store(df)
+    district_codes, districts = store.factorize('district')
+    category_codes, categories = store.factorize('category')
+    # Districts are matched case-insensitively; fold the few labels, not rows
+    upper_codes, districts = pd.factorize(pd.Index(districts, dtype=object).str.upper())
+    district_codes = np.append(upper_codes, -1)[district_codes]
+
+    # Incidents without a category get their own trailing column so they
+    # still count towards 'All Types'
+    num_categories = len(categories) + 1
+    category_codes = np.where(category_codes < 0, len(categories), category_codes)
+    located = district_codes >= 0
+    counts = np.bincount(
+        district_codes[located] * num_categories + category_codes[located],
+        minlength=len(districts) * num_categories
+    ).reshape(len(districts), num_categories)
+
+    return pd.DataFrame(counts, index=districts,
+                        columns=list(categories) + [None])
+
+
+def district_totals(district_counts, incident_type='All Types'):
+    """Incidents per district for one incident type, or all of them"""
+    if incident_type == 'All Types':
+        return district_counts.sum(axis=1)
+    if incident_type in district_counts.columns:
+        return district_counts[incident_type]
+    return pd.Series(0, index=district_counts.index)
+
+
+def build_stratified_sample(categories, years, rate=SAMPLE_RATE, minimum=SAMPLE_MIN,
+                            seed=SAMPLE_SEED):
+    """Draw a simple random sample within every category x year stratum
+
+    Returns each row's stratum code (-1 for rows outside the sample) and the
+    population and sample size of every stratum. Incidents without a
+    category or year form strata of their own.
+    """
+    category_codes, category_names = pd.factorize(categories)
+    year_codes, year_values = pd.factorize(years)
+    num_years = len(year_values) + 1
+    strata = (category_codes + 1) * num_years + (year_codes + 1)
+    num_strata = (len(category_names) + 1) * num_years
+
+    population = np.bincount(strata, minlength=num_strata)
+    sampled = np.minimum(population, np.maximum(minimum, np.ceil(population * rate)))
+    sampled = sampled.astype(np.int64)
+
+    # Rank each row within its stratum in a random order; the first
+    # sampled[h] rows of stratum h are kept
+    order = np.lexsort((np.random.default_rng(seed).random(len(strata)), strata))
+    starts = np.cumsum(population) - population
+    rank = np.empty(len(strata), dtype=np.int64)
+    rank[order] = np.arange(len(strata)) - starts[strata[order]]
+    in_sample = rank < sampled[strata]
+
+    return np.where(in_sample, strata, -1).astype(np.int32), population, sampled
+
+
+def estimate_value_counts(values, strata, population, sampled, z=Z_95):
+    """Estimate value counts from sampled rows, with confidence intervals
+
+    `values` and `strata` describe the sampled rows of any subset of the
+    data (a date range, a category); `population` and `sampled` are the
+    stratum sizes of the whole dataset. Each sampled row stands for
+    population / sampled rows of its stratum, and the variance is the usual
+    stratified estimate for a count, summed over strata.
+    """
+    codes, labels = pd.factorize(values)
+    kept = codes >= 0  # value_counts drops missing values
+    codes, strata = codes[kept], np.asarray(strata)[kept]
+
+    num_strata, num_values = len(population), len(labels)
+    hits = np.bincount(strata * num_values + codes,
+                       minlength=num_strata * num_values).reshape(num_strata, num_values)
+
+    population = population.astype(np.float64)
+    size = np.maximum(sampled, 1).astype(np.float64)
+    share = hits / size[:, None]
+    estimate = (population[:, None] * share).sum(axis=0)
+    variance_weight = population ** 2 * (1 - size / np.maximum(population, 1)) / np.maximum(size - 1, 1)
+    variance = (variance_weight[:, None] * share * (1 - share)).sum(axis=0)
+    margin = z * np.sqrt(variance)
+
+    estimates = pd.DataFrame({
+        'count': np.rint(estimate).astype(np.int64),
+        'low': np.maximum(estimate - margin, 0),
+        'high': estimate + margin
+    }, index=pd.Index(np.asarray(labels), name=getattr(values, 'name', None)))
+    return estimates.sort_values('count', ascending=False, kind='stable')
+
+
+def build_series_counts(df):
+    """Daily counts of every police district x category series, one bincount
+
+    Returns a series x days matrix whose rows are ordered district-major,
+    the district and category labels of each row, and the epoch day of the
+    first column. Incidents without a date, district or category are left
+    out, since they belong to no series.
+    """
+    store = incident_store(df)
+    days = store.days()
+    district_codes, districts = store.factorize('district')
+    category_codes, categories = store.factorize('category')
+    valid = (days >= 0) & (district_codes >= 0) & (category_codes >= 0)
+
+    num_series = len(districts) * len(categories)
+    if not valid.any():
+        return np.zeros((num_series, 0), dtype=np.int32), [], [], 0
+
+    first_day = int(days[valid].min())
+    num_days = int(days[valid].max()) - first_day + 1
+    series = district_codes[valid] * len(categories) + category_codes[valid]
+    counts = np.bincount(series * num_days + (days[valid] - first_day),
+                         minlength=num_series * num_days)
+    counts = counts.astype(np.int32).reshape(num_series, num_days)
+    counts.flags.writeable = False
+
+    return (counts, np.repeat(list(districts), len(categories)).tolist(),
+            np.tile(list(categories), len(districts)).tolist(), first_day)
+
+
+def detect_anomalies(counts, first_day, window=28, threshold=4.0, min_count=5):
+    """Score every daily series at once against a weekday-adjusted baseline
+
+    Each series is divided by its weekday profile (mean count on that
+    weekday over the mean count), then compared with the mean and standard
+    deviation of its previous `window` days, taken from running sums. The
+    deviation is floored at the Poisson level so sparse series do not flag
+    on single incidents. Returns (series, day) index arrays of the days
+    scoring at least `threshold`, their expected counts and z-scores.
+    """
+    counts = counts.astype(np.float64)
+    num_series, num_days = counts.shape
+    if num_days <= window:
+        empty = np.empty(0)
+        return empty.astype(np.int64), empty.astype(np.int64), empty, empty
+
+    # Weekday profile of every series, Sunday = 0 (epoch day 0 was a Thursday)
+    weekday = (first_day + np.arange(num_days) + 4) % 7
+    weekday_totals = np.stack([counts[:, weekday == w].sum(axis=1) for w in range(7)], axis=1)
+    weekday_days = np.bincount(weekday, minlength=7)
+    weekday_means = weekday_totals / np.maximum(weekday_days, 1)
+    overall_mean = counts.sum(axis=1, keepdims=True) / num_days
+    factors = np.where(overall_mean > 0, weekday_means / np.maximum(overall_mean, 1e-12), 1.0)
+    factors = np.maximum(factors, 0.1)[:, weekday]
+    adjusted = counts / factors
+
+    # Trailing mean and variance of the previous `window` days
+    padded = np.zeros((num_series, num_days + 1))
+    np.cumsum(adjusted, axis=1, out=padded[:, 1:])
+    padded_sq = np.zeros((num_series, num_days + 1))
+    np.cumsum(adjusted ** 2, axis=1, out=padded_sq[:, 1:])
+    sums = padded[:, window:-1] - padded[:, :-window - 1]
+    sums_sq = padded_sq[:, window:-1] - padded_sq[:, :-window - 1]
+    mean = sums / window
+    variance = np.maximum(sums_sq / window - mean ** 2, 0)
+    std = np.sqrt(np.maximum(variance, np.maximum(mean, 1.0)))
+
+    z = (adjusted[:, window:] - mean) / std
+    flagged = (z >= threshold) & (counts[:, window:] >= min_count)
+    series, day = np.nonzero(flagged)
+    day_index = day + window
+    expected = mean[series, day] * factors[series, day_index]
+    return series, day_index, expected, z[series, day]
+
+
+def series_rollups(counts, districts, categories):
+    """Add 'All Districts' and 'All Types' rows to a district x category matrix
+
+    Takes build_series_counts() output and returns a matrix whose rows cover
+    every (district or 'All Districts', category or 'All Types') pair,
+    district-major, with the district and category label of each row.
+    """
+    num_categories = len(dict.fromkeys(categories))
+    district_labels = list(districts[::num_categories]) if num_categories else []
+    category_labels = list(categories[:num_categories])
+    cube = counts.reshape(len(district_labels), num_categories, -1)
+
+    # Append a total along each axis, then flatten back to rows
+    cube = np.concatenate([cube, cube.sum(axis=0, keepdims=True)], axis=0)
+    cube = np.concatenate([cube, cube.sum(axis=1, keepdims=True)], axis=1)
+    district_labels.append('All Districts')
+    category_labels.append('All Types')
+    rows = cube.reshape(-1, cube.shape[-1])
+    return (rows, np.repeat(district_labels, len(category_labels)).tolist(),
+            np.tile(category_labels, len(district_labels)).tolist())
+
+
+def fit_seasonal_forecasts(counts, first_day, horizon=FORECAST_WEEKS, fit_weeks=FIT_WEEKS):
+    """Project weekly counts of every series with one least-squares fit
+
+    Daily counts are summed into weeks ending on the last day, and each
+    series is regressed on a shared design of level, trend and two annual
+    harmonics, so a single lstsq call fits them all. Returns the weekly
+    forecasts (series x horizon, clipped at zero), the residual standard
+    deviation of each series and the epoch day the forecasts start on, or
+    None when there are too few weeks to fit.
+    """
+    num_series, num_days = counts.shape
+    num_weeks = min(num_days // 7, fit_weeks)
+    seasonal = num_weeks >= 2 * WEEKS_PER_YEAR
+    num_terms = 6 if seasonal else 2
+    if num_weeks < 2 * num_terms:
+        return None
+
+    # Whole weeks ending on the last day
+    last_day = first_day + num_days - 1
+    weekly = counts[:, num_days - num_weeks * 7:].reshape(num_series, num_weeks, 7)
+    weekly = weekly.sum(axis=2, dtype=np.float64)
+
+    def design(weeks):
+        columns = [np.ones(len(weeks)), weeks / num_weeks]
+        if seasonal:
+            angle = 2 * np.pi * weeks / WEEKS_PER_YEAR
+            columns += [np.sin(angle), np.cos(angle), np.sin(2 * angle), np.cos(2 * angle)]
+        return np.column_stack(columns)
+
+    fitted_design = design(np.arange(num_weeks, dtype=np.float64))
+    coefficients, _, _, _ = np.linalg.lstsq(fitted_design, weekly.T, rcond=None)
+    residuals = weekly - (fitted_design @ coefficients).T
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / (num_weeks - num_terms))
+
+    future = design(np.arange(num_weeks, num_weeks + horizon, dtype=np.float64))
+    forecasts = np.maximum(future @ coefficients, 0).T
+    return forecasts, sigma, last_day + 1
+
+
+def forecast_by_period(weekly, sigma, start_day, period='month', z=Z_95):
+    """Weekly forecasts of one series summed into calendar months or years
+
+    Each week is spread evenly over its days; intervals treat the weeks as
+    independent, so a period's variance is its share of weeks times sigma
+    squared. Returns year (and month_num) with forecast, low and high.
+    """
+    days = start_day + np.arange(len(weekly) * 7)
+    daily = np.repeat(np.asarray(weekly, dtype=np.float64) / 7, 7)
+    dates = days.astype('datetime64[D]')
+    data = pd.DataFrame({
+        'year': dates.astype('datetime64[Y]').astype(np.int64) + 1970,
+        'month_num': dates.astype('datetime64[M]').astype(np.int64) % 12 + 1,
+        'forecast': daily,
+        'variance': sigma ** 2 / 7
+    })
+    keys = ['year', 'month_num'] if period == 'month' else ['year']
+    data = data.groupby(keys, as_index=False)[['forecast', 'variance']].sum()
+    spread = z * np.sqrt(data.pop('variance'))
+    data['low'] = np.maximum(data['forecast'] - spread, 0)
+    data['high'] = data['forecast'] + spread
+    return data
@@ -0,0 +1,93 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import altair as alt
+from aggregates import detect_anomalies
+from dataset import ANOMALY_FILE, dataset_version
+from time_series import get_series_counts
+from view_model import cached_chart
+
+BASELINE_WINDOWS = {'14 days': 14, '28 days': 28, '56 days': 56}
+
+
+@st.cache_data(ttl=3600, max_entries=32)  # Cache for 1 hour
+def get_anomalies(_df, version, window, threshold, min_count):
+    """Flagged days over every district x category series, most unusual first"""
+    counts, districts, categories, first_day = get_series_counts(_df, version)
+    series, day, expected, z = detect_anomalies(
+        counts, first_day, window, threshold, min_count)
+
+    anomalies = pd.DataFrame({
+        'date': (first_day + day).astype('datetime64[D]'),
+        'police_district': np.asarray(districts, dtype=object)[series],
+        'incident_category': np.asarray(categories, dtype=object)[series],
+        'count': counts[series, day],
+        'expected': expected.round(1),
+        'z_score': z.round(2)
+    }).sort_values('z_score', ascending=False, ignore_index=True)
+    return anomalies
+
+
+def create_anomaly_analysis(df):
+    """Flag unusual days in every police district x incident category series"""
+    window_label = st.sidebar.selectbox(
+        "Baseline Window",
+        list(BASELINE_WINDOWS),
+        index=1,
+        key="anomaly_window"
+    )
+    threshold = st.sidebar.slider(
+        "Z-Score Threshold", 3.0, 8.0, 4.0, 0.5, key="anomaly_threshold")
+    min_count = st.sidebar.slider(
+        "Minimum Daily Incidents", 1, 20, 5, key="anomaly_min_count")
+
+    anomalies = get_anomalies(df, dataset_version(df), BASELINE_WINDOWS[window_label],
+                              threshold, min_count)
+    counts = get_series_counts(df, dataset_version(df))[0]
+    num_series = int((counts.sum(axis=1) > 0).sum())
+
+    if anomalies.empty:
+        st.info("No anomalies at this threshold")
+        return 0, num_series, '-', '-'
+
+    def build_chart():
+        # One point per flagged day; the strongest few hundred keep the spec small
+        chart_df = anomalies.head(500)
+        return alt.Chart(chart_df).mark_circle(opacity=0.7).encode(
+            x=alt.X('date:T', title='Date'),
+            y=alt.Y('z_score:Q', title='Z-Score'),
+            size=alt.Size('count:Q', title='Incidents'),
+            color=alt.Color('police_district:N', title='District'),
+            tooltip=[
+                alt.Tooltip('date:T', title='Date'),
+                alt.Tooltip('police_district:N', title='District'),
+                alt.Tooltip('incident_category:N', title='Category'),
+                alt.Tooltip('count:Q', title='Incidents', format=',d'),
+                alt.Tooltip('expected:Q', title='Expected', format=',.1f'),
+                alt.Tooltip('z_score:Q', title='Z-Score', format='.2f')
+            ]
+        ).properties(
+            title='Anomalous Days by District and Category',
+            width='container',
+            height=500
+        )
+
+    chart = cached_chart(
+        'anomalies', [window_label, threshold, min_count], df, build_chart)
+    st.vega_lite_chart(chart, use_container_width=True)
+
+    st.subheader("Flagged Days")
+    st.dataframe(anomalies.head(1000), use_container_width=True, hide_index=True)
+    st.caption(f"Showing the strongest {min(len(anomalies), 1000):,} of "
+               f"{len(anomalies):,} flagged days")
+
+    # Written on request, so the file always matches the settings shown
+    if st.button(f"Write flagged days to {ANOMALY_FILE}", key="anomaly_export"):
+        try:
+            anomalies.to_csv(ANOMALY_FILE, index=False)
+            st.success(f"Wrote {len(anomalies):,} flagged days to {ANOMALY_FILE}")
+        except OSError as e:
+            st.warning(f"Could not write {ANOMALY_FILE}: {e}")
+
+    latest = anomalies['date'].max().strftime('%Y-%m-%d')
+    return len(anomalies), num_series, latest, f"{anomalies['z_score'].iloc[0]:.1f}"
@@ -0,0 +1,329 @@
+"""Headless JSON API over the dashboard's aggregates
+
+Serves the same count tables as the Streamlit views (see aggregates.py)
+without importing Streamlit. Run it from this directory:
+
+    python api.py --data clean_dataset.csv --port 8502
+
+--data also takes a directory of CSV shards (e.g. one export per year),
+which are loaded in parallel. It defaults to INCIDENT_DATA, like the
+dashboard, and then to clean_dataset.csv.
+
+Every endpoint accepts the sidebar filters as query parameters: `incident`,
+`district`, `year`, `granularity` and an inclusive `start`/`end` date range.
+Invalid parameters are answered with a 400 and a JSON error; failures while
+computing a response are logged and answered with a 500. Responses carry an
+ETag derived from the dataset version and the request, so polling clients
+that send If-None-Match get a 304 without any work.
+"""
+import argparse
+import hashlib
+import json
+import threading
+import traceback
+from collections import OrderedDict
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+from aggregates import (build_daily_counts, build_district_counts, build_hour_counts,
+                        build_monthly_counts, count_values, daily_series,
+                        district_totals, monthly_table, weekday_hour_counts)
+from dataset import (DATA_FILE, WEEKDAYS, dataset_version, filter_date_range, load_dataset,
+                     source_version)
+from locations import SKETCH_PRECISION, LocationIndex
+
+# Bounds on cached JSON bodies and on cached count tables (one set of tables
+# per dataset version or date range)
+RESPONSE_CACHE_SIZE = 256
+TABLE_CACHE_SIZE = 32
+
+# Separator of list parameters; category names may contain commas
+LIST_SEPARATOR = '|'
+
+
+class QueryError(ValueError):
+    """Invalid query parameter, answered with a 400"""
+
+
+class LRUCache:
+    """Small thread-safe least-recently-used mapping"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+class AggregateStore:
+    """The loaded dataset and its count tables, reloaded when the file changes"""
+
+    def __init__(self, path):
+        self.path = path
+        self.version = None
+        self._df = None
+        self._lock = threading.Lock()
+        self._tables = LRUCache(TABLE_CACHE_SIZE)
+
+    def dataset(self):
+        """Current dataset; a changed file gets a new version and is reloaded"""
+        version = source_version(self.path)
+        with self._lock:
+            if version != self.version:
+                self._df = load_dataset(self.path, version)
+                self.version = version
+            return self._df
+
+    def table(self, df, name, build):
+        """Count table `name` of a (sliced) dataset, built once per version"""
+        key = (dataset_version(df), name)
+        table = self._tables.get(key)
+        if table is None:
+            table = build(df)
+            self._tables.put(key, table)
+        return table
+
+    def daily_counts(self, df):
+        return self.table(df, 'daily', build_daily_counts)
+
+    def monthly_counts(self, df):
+        return self.table(df, 'monthly', lambda d: build_monthly_counts(*self.daily_counts(d)))
+
+    def hour_counts(self, df):
+        return self.table(df, 'hours', build_hour_counts)
+
+    def district_counts(self, df):
+        return self.table(df, 'districts', build_district_counts)
+
+    def location_index(self, df):
+        return self.table(df, 'locations', lambda d: LocationIndex(
+            d['incident_category'], d['location_key'], years=d['incident_year'],
+            sketch_precision=SKETCH_PRECISION))
+
+
+def parse_date(value, name):
+    """ISO date from a query parameter"""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise QueryError(f"'{name}' must be a date like 2023-01-31") from None
+
+
+def apply_filters(df, params):
+    """Slice the dataset to the inclusive start/end range, like the sidebar"""
+    start = parse_date(params['start'], 'start') if 'start' in params else None
+    end = parse_date(params['end'], 'end') + timedelta(days=1) if 'end' in params else None
+    return filter_date_range(df, start, end)
+
+
+def parse_year(params):
+    """'year' parameter as an int, or the 'All Years' choice"""
+    year = params.get('year', 'All Years')
+    if year == 'All Years':
+        return year
+    try:
+        return int(year)
+    except ValueError:
+        raise QueryError("'year' must be a year like 2023") from None
+
+
+def records(counts, key):
+    """Value counts as a list of {key, count} records"""
+    return [{key: value.item() if hasattr(value, 'item') else value, 'count': int(count)}
+            for value, count in counts.items()]
+
+
+def categories_endpoint(store, df, params):
+    """Incident counts per category, busiest first"""
+    return records(count_values(df, 'incident_category'), 'incident_category')
+
+
+def districts_endpoint(store, df, params):
+    """Incident counts per police district for an incident type"""
+    incident = params.get('incident', 'All Types')
+    return records(count_values(df, 'police_district', incident), 'police_district')
+
+
+def yearly_endpoint(store, df, params):
+    """Incident counts per year for an incident type"""
+    table = monthly_table(store.monthly_counts(df), params.get('incident', 'All Types'))
+    return records(table.groupby('year')['count'].sum(), 'year')
+
+
+def monthly_endpoint(store, df, params):
+    """Incident counts per month for an incident type, optionally one year"""
+    table = monthly_table(store.monthly_counts(df), params.get('incident', 'All Types'))
+    year = parse_year(params)
+    if year != 'All Years':
+        table = table[table['year'] == year]
+    return [{'year': int(row.year), 'month': int(row.month_num), 'count': int(row.count)}
+            for row in table.itertuples(index=False)]
+
+
+def series_endpoint(store, df, params):
+    """Zero-filled daily or weekly counts for an incident type"""
+    granularity = params.get('granularity', 'Daily')
+    if granularity not in ('Daily', 'Weekly'):
+        raise QueryError("'granularity' must be Daily or Weekly")
+    series = daily_series(store.daily_counts(df), params.get('incident', 'All Types'),
+                          granularity)
+    return [{'date': day.strftime('%Y-%m-%d'), 'count': int(count)}
+            for day, count in series.items()]
+
+
+def weekdays_endpoint(store, df, params):
+    """Incident counts per day of week for an incident type"""
+    counts = count_values(df, 'incident_day_of_week', params.get('incident', 'All Types'))
+    return records(counts.reindex(WEEKDAYS, fill_value=0), 'weekday')
+
+
+def hours_endpoint(store, df, params):
+    """Hourly histogram for an incident type, police district and year"""
+    matrix = weekday_hour_counts(
+        store.hour_counts(df),
+        params.get('incident', 'All Types'),
+        params.get('district', 'All Districts'),
+        parse_year(params))
+    return [{'hour': hour, 'count': int(count)}
+            for hour, count in enumerate(matrix.sum(axis=0))]
+
+
+def district_map_endpoint(store, df, params):
+    """Incident counts per upper-case district name, as on the district map"""
+    totals = district_totals(store.district_counts(df), params.get('incident', 'All Types'))
+    return records(totals.sort_values(ascending=False), 'district')
+
+
+def locations_endpoint(store, df, params):
+    """Distinct incident locations for any incident types and years
+
+    `incident` and `year` also take lists separated by LIST_SEPARATOR, e.g.
+    year=2022|2023. One incident type over all years is counted exactly;
+    other combinations are estimated by merging the HyperLogLog sketches of
+    each (type, year).
+    """
+    index = store.location_index(df)
+    incidents = params.get('incident', 'All Types').split(LIST_SEPARATOR)
+    year = params.get('year', 'All Years')
+    try:
+        years = None if year == 'All Years' else [int(y) for y in year.split(LIST_SEPARATOR)]
+    except ValueError:
+        raise QueryError("'year' must be a year like 2023 or a list like 2022|2023") from None
+
+    if len(incidents) == 1 and years is None:
+        return {'distinct_locations': index.distinct_count(incidents[0]), 'estimated': False}
+    categories = None if 'All Types' in incidents else incidents
+    return {'distinct_locations': index.estimate_distinct(categories, years), 'estimated': True}
+
+
+ENDPOINTS = {
+    '/api/categories': categories_endpoint,
+    '/api/districts': districts_endpoint,
+    '/api/yearly': yearly_endpoint,
+    '/api/monthly': monthly_endpoint,
+    '/api/series': series_endpoint,
+    '/api/weekdays': weekdays_endpoint,
+    '/api/hours': hours_endpoint,
+    '/api/district_map': district_map_endpoint,
+    '/api/locations': locations_endpoint
+}
+
+
+class AggregateHandler(BaseHTTPRequestHandler):
+    """GET handler for the aggregate endpoints"""
+
+    store = None
+    bodies = LRUCache(RESPONSE_CACHE_SIZE)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/api/version':
+            self.store.dataset()
+            self.send_json(200, {'version': self.store.version})
+            return
+        endpoint = ENDPOINTS.get(url.path)
+        if endpoint is None:
+            self.send_json(404, {'error': f"Unknown endpoint {url.path}",
+                                 'endpoints': sorted(ENDPOINTS) + ['/api/version']})
+            return
+
+        params = dict(parse_qsl(url.query))
+        try:
+            df = self.store.dataset()
+        except OSError as e:
+            self.send_json(503, {'error': f"Dataset unavailable: {e}"})
+            return
+
+        # The answer depends only on the dataset version and the request, so
+        # the ETag is known before anything is computed
+        request_key = (self.store.version, url.path, tuple(sorted(params.items())))
+        etag = '"%s"' % hashlib.sha1(repr(request_key).encode()).hexdigest()[:20]
+        if etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        body = self.bodies.get(request_key)
+        if body is None:
+            try:
+                data = endpoint(self.store, apply_filters(df, params), params)
+            except QueryError as e:
+                self.send_json(400, {'error': str(e)})
+                return
+            except Exception as e:
+                self.log_error("%s failed: %r", self.path, e)
+                traceback.print_exc()
+                self.send_json(500, {'error': f"Internal error answering {url.path}"})
+                return
+            body = json.dumps(data).encode()
+            self.bodies.put(request_key, body)
+        self.send_body(200, body, etag)
+
+    def send_json(self, status, data):
+        self.send_body(status, json.dumps(data).encode())
+
+    def send_body(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            # Clients may keep the body but must revalidate it on each poll
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default=DATA_FILE,
+                        help="CSV file, directory of CSV shards or glob to serve "
+                             "(default: INCIDENT_DATA or clean_dataset.csv)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    args = parser.parse_args()
+
+    AggregateHandler.store = AggregateStore(args.data)
+    AggregateHandler.store.dataset()  # Load before accepting requests
+    server = ThreadingHTTPServer((args.host, args.port), AggregateHandler)
+    print(f"Serving aggregates of {args.data} on http://{args.host}:{args.port}/api/")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import pydeck as pdk
+from clusters import cluster_incidents, collapse_incidents, summarize_clusters
+from dataset import dataset_version
+from locations import COORD_SCALE
+from store import incident_store
+
+# Neighborhood sizes offered in the sidebar
+CLUSTER_DISTANCES = [50, 100, 200, 400]  # Meters
+CLUSTER_WINDOWS = [1, 3, 7, 14]  # Days
+
+# Cluster colors, reused in order for clusters past the last one
+CLUSTER_COLORS = np.array([
+    [228, 26, 28], [55, 126, 184], [77, 175, 74], [152, 78, 163], [255, 127, 0],
+    [255, 255, 51], [166, 86, 40], [247, 129, 191], [153, 153, 153], [0, 210, 213]
+], dtype=np.uint8)
+
+
+@st.cache_data(ttl=3600, max_entries=32)  # Cache for 1 hour
+def get_clusters(_df, version, category, distance, window, min_incidents):
+    """Clustered (location, day) points and per-cluster statistics"""
+    store = incident_store(_df)
+    in_category = store.mask(category=category)
+    lat_q, lon_q, days, weights = collapse_incidents(
+        _df['location_key'].to_numpy()[in_category], store.days()[in_category])
+    cluster = cluster_incidents(lat_q, lon_q, days, weights, distance, window, min_incidents)
+    summary = summarize_clusters(lat_q, lon_q, days, weights, cluster)
+
+    member = cluster >= 0
+    colors = CLUSTER_COLORS[cluster[member] % len(CLUSTER_COLORS)]
+    points = pd.DataFrame({
+        'latitude': lat_q[member] / COORD_SCALE,
+        'longitude': lon_q[member] / COORD_SCALE,
+        'cluster': cluster[member],
+        'incidents': weights[member],
+        'r': colors[:, 0], 'g': colors[:, 1], 'b': colors[:, 2]
+    })
+    return points, summary, int(weights.sum())
+
+
+def create_cluster_analysis(df):
+    """Map dense space-time clusters of one incident category"""
+    incident_options = ['Larceny Theft', 'Motor Vehicle Theft',
+                        'Assault', 'Burglary', 'Robbery']
+    selected_incident = st.sidebar.radio(
+        "Select Incident Type for Clustering",
+        incident_options,
+        key="cluster_radio"
+    )
+    distance = st.sidebar.select_slider(
+        "Cluster Distance (m)", CLUSTER_DISTANCES, value=100, key="cluster_distance")
+    window = st.sidebar.select_slider(
+        "Cluster Time Window (days)", CLUSTER_WINDOWS, value=3, key="cluster_window")
+    min_incidents = st.sidebar.slider(
+        "Minimum Incidents per Cluster Core", 3, 50, 10, key="cluster_min_incidents")
+
+    points, summary, total = get_clusters(
+        df, dataset_version(df), selected_incident, distance, window, min_incidents)
+
+    view_state = pdk.ViewState(
+        longitude=-122.44,
+        latitude=37.76,
+        zoom=11.5
+    )
+
+    # Member points colored by cluster, under a ring per cluster
+    point_layer = pdk.Layer(
+        "ScatterplotLayer",
+        points,
+        get_position=["longitude", "latitude"],
+        get_radius=15,
+        radius_units="meters",
+        radius_min_pixels=2,
+        get_fill_color="[r, g, b, 180]",
+        pickable=True
+    )
+    ring_layer = pdk.Layer(
+        "ScatterplotLayer",
+        summary.assign(radius=np.maximum(summary['radius_m'], distance)),
+        get_position=["longitude", "latitude"],
+        get_radius="radius",
+        radius_units="meters",
+        stroked=True,
+        filled=False,
+        get_line_color=[255, 255, 255, 200],
+        line_width_min_pixels=1,
+        pickable=True
+    )
+
+    st.pydeck_chart(
+        pdk.Deck(
+            layers=[point_layer, ring_layer],
+            initial_view_state=view_state,
+            map_style=None,
+            tooltip={"text": "Cluster {cluster}: {incidents} incidents"}
+        ),
+        use_container_width=True,
+        height=500
+    )
+
+    with st.expander("Cluster Details", expanded=True):
+        table = summary.head(100).copy()
+        table.columns = ['Cluster', 'Incidents', 'Latitude', 'Longitude',
+                         'Radius (m)', 'First Day', 'Last Day', 'Days']
+        st.dataframe(table, use_container_width=True, hide_index=True)
+
+    clustered = int(summary['incidents'].sum())
+    largest = f"{int(summary['incidents'].iloc[0]):,}" if len(summary) else '-'
+    return len(summary), clustered, total, largest, selected_incident
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+from locations import (COORD_SCALE, MISSING_LOCATION, METERS_PER_DEGREE,
+                       unpack_location_keys)
+
+# Spatio-temporal DBSCAN over incidents. Points are the distinct
+# (location, day) pairs weighted by their incident count; neighbors are
+# within `distance` meters and `days` days of each other. A grid with cells
+# of one radius in every dimension limits neighbor checks to the 27 cells
+# around each point, so the cost grows with the number of true neighbors
+# rather than with N squared.
+
+# Neighbor cell offsets in (x, y, day) cell units
+NEIGHBOR_OFFSETS = [(dx, dy, dt) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dt in (-1, 0, 1)]
+
+
+def collapse_incidents(keys, days):
+    """Distinct (location, day) points with incident weights
+
+    Incidents without coordinates or a date are left out. Returns quantized
+    int32 latitude/longitude, the day and the int32 weight of each point.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+    valid = (keys != MISSING_LOCATION) & (days >= 0)
+    pairs = np.rec.fromarrays([keys[valid], days[valid]])
+    unique, weights = np.unique(pairs, return_counts=True)
+    lat_q, lon_q = unpack_location_keys(unique.f0)
+    return lat_q, lon_q, unique.f1.astype(np.int64), weights.astype(np.int32)
+
+
+def neighbor_pairs(x, y, t, distance, days):
+    """All (i, j) point pairs within `distance` meters and `days` days
+
+    Includes each point paired with itself. Points are sorted by grid cell
+    once; for every neighbor offset a binary search gives each point's
+    candidate range, which is expanded and filtered without Python loops
+    over points.
+    """
+    cx = np.floor(x / distance).astype(np.int64)
+    cy = np.floor(y / distance).astype(np.int64)
+    ct = np.floor(t / max(days, 1)).astype(np.int64)
+    # One empty cell of padding on each side so neighbor keys never wrap
+    cx, cy, ct = cx - cx.min() + 1, cy - cy.min() + 1, ct - ct.min() + 1
+    ny, nt = int(cy.max()) + 2, int(ct.max()) + 2
+    cells = (cx * ny + cy) * nt + ct
+
+    order = np.argsort(cells, kind='stable')
+    sorted_cells = cells[order]
+    pairs_i, pairs_j = [], []
+    for dx, dy, dt in NEIGHBOR_OFFSETS:
+        target = cells + (dx * ny + dy) * nt + dt
+        start = np.searchsorted(sorted_cells, target, side='left')
+        counts = np.searchsorted(sorted_cells, target, side='right') - start
+        total = int(counts.sum())
+        if not total:
+            continue
+        # Expand each point's candidate range into explicit pairs
+        i = np.repeat(np.arange(len(cells)), counts)
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        j = order[np.repeat(start, counts) + np.arange(total) - first]
+
+        close = (((x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2 <= distance ** 2) &
+                 (np.abs(t[i] - t[j]) <= days))
+        pairs_i.append(i[close])
+        pairs_j.append(j[close])
+
+    if not pairs_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def connected_labels(num_points, i, j):
+    """Smallest point index in each connected component of the edges (i, j)
+
+    Min-label propagation with pointer jumping; every step is a vectorized
+    pass over all edges.
+    """
+    labels = np.arange(num_points)
+    while True:
+        hooked = labels.copy()
+        np.minimum.at(hooked, i, labels[j])
+        # Jump each label to its root
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+        if np.array_equal(hooked, labels):
+            return labels
+        labels = hooked
+
+
+def cluster_incidents(lat_q, lon_q, days, weights, distance=100, window=3, min_incidents=10):
+    """DBSCAN-style clusters of weighted (location, day) points
+
+    A point is a core point when the incidents within `distance` meters and
+    `window` days, itself included, number at least `min_incidents`. Core
+    points within reach of each other form a cluster; other points join
+    the cluster of a core neighbor. Returns a cluster id per point, -1 for
+    noise, numbered from the largest cluster down.
+    """
+    num_points = len(lat_q)
+    if not num_points:
+        return np.empty(0, dtype=np.int64)
+
+    # Local equirectangular projection to meters
+    mean_lat = np.radians(lat_q.mean() / COORD_SCALE)
+    y = lat_q / COORD_SCALE * METERS_PER_DEGREE
+    x = lon_q / COORD_SCALE * METERS_PER_DEGREE * np.cos(mean_lat)
+    t = np.asarray(days, dtype=np.float64)
+
+    i, j = neighbor_pairs(x, y, t, distance, window)
+    neighbors = np.bincount(i, weights=weights[j], minlength=num_points)
+    core = neighbors >= min_incidents
+
+    # Components of the core points, then border points join a core neighbor
+    linked = core[i] & core[j]
+    labels = connected_labels(num_points, i[linked], j[linked])
+    border = ~core[i] & core[j]
+    border_labels = np.full(num_points, num_points)
+    np.minimum.at(border_labels, i[border], labels[j[border]])
+    labels = np.where(core, labels, border_labels)
+
+    # Renumber clusters by incident count, noise as -1
+    clustered = labels < num_points
+    roots, codes = np.unique(labels[clustered], return_inverse=True)
+    sizes = np.bincount(codes, weights=weights[clustered])
+    rank = np.empty(len(roots), dtype=np.int64)
+    rank[np.argsort(-sizes, kind='stable')] = np.arange(len(roots))
+    cluster = np.full(num_points, -1, dtype=np.int64)
+    cluster[clustered] = rank[codes]
+    return cluster
+
+
+def summarize_clusters(lat_q, lon_q, days, weights, cluster):
+    """Incidents, weighted centroid, extent and date span of each cluster"""
+    member = cluster >= 0
+    if not member.any():
+        return pd.DataFrame(columns=['cluster', 'incidents', 'latitude', 'longitude',
+                                     'radius_m', 'first_day', 'last_day', 'days'])
+    ids, w = cluster[member], weights[member].astype(np.float64)
+    num_clusters = int(ids.max()) + 1
+    incidents = np.bincount(ids, weights=w, minlength=num_clusters)
+    lat = np.bincount(ids, weights=w * lat_q[member], minlength=num_clusters) / incidents
+    lon = np.bincount(ids, weights=w * lon_q[member], minlength=num_clusters) / incidents
+
+    # Largest member distance from the centroid
+    cos_lat = np.cos(np.radians(lat[ids] / COORD_SCALE))
+    offset = np.hypot((lat_q[member] - lat[ids]),
+                      (lon_q[member] - lon[ids]) * cos_lat) / COORD_SCALE * METERS_PER_DEGREE
+    radius = np.zeros(num_clusters)
+    np.maximum.at(radius, ids, offset)
+
+    first = np.full(num_clusters, np.iinfo(np.int64).max)
+    last = np.full(num_clusters, np.iinfo(np.int64).min)
+    np.minimum.at(first, ids, days[member])
+    np.maximum.at(last, ids, days[member])
+
+    return pd.DataFrame({
+        'cluster': np.arange(num_clusters),
+        'incidents': incidents.astype(np.int64),
+        'latitude': lat / COORD_SCALE,
+        'longitude': lon / COORD_SCALE,
+        'radius_m': radius.round(),
+        'first_day': first.astype('datetime64[D]'),
+        'last_day': last.astype('datetime64[D]'),
+        'days': last - first + 1
+    })
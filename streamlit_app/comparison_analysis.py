@@ -0,0 +1,130 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import altair as alt
+from dataset import WEEKDAYS, dataset_version
+from store import incident_store
+
+COMPARE_DEFAULT = ['Larceny Theft', 'Burglary', 'Motor Vehicle Theft']
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+
+def select_comparison(df, key):
+    """Sidebar toggle for comparing categories; returns None when off"""
+    if not st.sidebar.checkbox("Compare Categories", key=f"{key}_compare"):
+        return None
+
+    # Categories by volume, from the cached counts rather than a column scan
+    totals = get_category_counts(df, dataset_version(df), 'year').groupby(
+        'incident_category')['count'].sum()
+    categories = totals.sort_values(ascending=False).index.tolist()
+    compared = st.sidebar.multiselect(
+        "Categories to Compare",
+        categories,
+        default=[c for c in COMPARE_DEFAULT if c in categories],
+        key=f"{key}_compare_categories"
+    )
+    if not compared:
+        st.sidebar.info("Select at least one category to compare")
+        return None
+    return compared
+
+
+def _dimension_codes(store, dimension):
+    """Integer codes and their labels for a comparison dimension"""
+    if dimension == 'year':
+        codes, labels = store.factorize('year')
+        return codes, [int(y) for y in labels]
+    if dimension == 'month':
+        # Months since the epoch from the day codes, as a contiguous range
+        days = store.days()
+        valid = days >= 0
+        if not valid.any():
+            return np.full(len(days), -1), []
+        months = days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        first, last = months[valid].min(), months[valid].max()
+        return np.where(valid, months - first, -1), list(range(int(first), int(last) + 1))
+    if dimension == 'weekday':
+        weekday = store.codes['weekday'].astype(np.intp)
+        return np.where(weekday < len(WEEKDAYS), weekday, -1), WEEKDAYS
+    if dimension == 'district':
+        return store.factorize('district')
+    raise ValueError(f"Unknown comparison dimension: {dimension}")
+
+
+@st.cache_data(ttl=3600, max_entries=32)  # Cache for 1 hour
+def get_category_counts(_df, version, dimension):
+    """Count every category x dimension cell in one bincount, in long format"""
+    store = incident_store(_df)
+    category_codes, categories = store.factorize('category')
+    value_codes, values = _dimension_codes(store, dimension)
+
+    valid = (category_codes >= 0) & (value_codes >= 0)
+    counts = np.bincount(
+        category_codes[valid] * len(values) + value_codes[valid],
+        minlength=len(categories) * len(values))
+
+    data = pd.DataFrame({
+        'incident_category': np.repeat(np.asarray(categories, dtype=object), len(values)),
+        dimension: np.tile(np.asarray(values, dtype=object), len(categories)),
+        'count': counts
+    })
+    if dimension == 'month':
+        # Split month codes into calendar fields for the monthly charts
+        months = data['month'].astype(np.int64)
+        data['year'] = 1970 + months // 12
+        data['month_num'] = months % 12 + 1
+        data['month_name'] = [MONTH_NAMES[m - 1] for m in data['month_num']]
+    return data
+
+
+def get_comparison_data(df, dimension, compared):
+    """Long-format counts of the compared categories along a dimension"""
+    data = get_category_counts(df, dataset_version(df), dimension)
+    return data[data['incident_category'].isin(compared)]
+
+
+def summarize_comparison(data, x_field):
+    """Total, average per period and peak period over all compared series"""
+    totals = data.groupby(x_field, sort=False)['count'].sum()
+    if totals.empty:
+        return 0, 0, '-', '-'
+    return (int(totals.sum()), totals.mean(), str(totals.idxmax()),
+            str(totals.idxmin()))
+
+
+def create_comparison_chart(data, x_field, x_title, title, sort=None, mark='line'):
+    """Overlay the compared categories from one long-format count table"""
+    x_type = 'O' if mark == 'line' else 'N'
+    base = alt.Chart(data).encode(
+        x=alt.X(f'{x_field}:{x_type}',
+                title=x_title,
+                sort=sort,
+                axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y('count:Q', title='Number of Incidents'),
+        color=alt.Color('incident_category:N', title='Category'),
+        tooltip=[
+            alt.Tooltip('incident_category:N', title='Category'),
+            alt.Tooltip(f'{x_field}:{x_type}', title=x_title),
+            alt.Tooltip('count:Q', title='Incidents', format=',d')
+        ]
+    )
+
+    if mark == 'line':
+        chart = base.mark_line(strokeWidth=2, point=True)
+    else:
+        # Grouped bars: one bar per category within each x value
+        chart = base.mark_bar().encode(xOffset='incident_category:N')
+
+    return chart.properties(
+        title=title,
+        width='container',
+        height=500
+    )
+
+
+def describe_comparison(compared):
+    """Short label for the compared categories in metrics"""
+    return compared[0] if len(compared) == 1 else f"{len(compared)} Categories"
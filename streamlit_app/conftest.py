@@ -0,0 +1,12 @@
+import os
+import sys
+
+# The app's entry point is named streamlit.py, so for modules imported from
+# this directory it shadows the streamlit package. `streamlit run` has the
+# package loaded before the app's modules; load it the same way for tests.
+_app_dir = os.path.dirname(os.path.abspath(__file__))
+_path = sys.path[:]
+sys.path[:] = [entry for entry in _path
+               if os.path.abspath(entry or os.curdir) != _app_dir]
+import streamlit  # noqa: E402,F401
+sys.path[:] = _path
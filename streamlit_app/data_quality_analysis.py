@@ -0,0 +1,93 @@
+import streamlit as st
+import pandas as pd
+import altair as alt
+from dataset import DATA_FILE, PROFILE_FILE, QUARANTINE_FILE, data_files, source_version
+from profiling import profile_csv, write_profile
+
+
+@st.cache_data(ttl=3600, max_entries=4, show_spinner="Profiling data file...")  # Cache for 1 hour
+def get_profile(source, version):
+    """Single-pass profile of a data file or its shards, once per version
+
+    Each new profile is also written to PROFILE_FILE.
+    """
+    profile = profile_csv(data_files(source))
+    try:
+        write_profile(profile, PROFILE_FILE)
+    except OSError as e:
+        st.warning(f"Could not write {PROFILE_FILE}: {e}")
+    return profile
+
+
+def create_data_quality_analysis(df):
+    """Null rates, distinct counts and value ranges of the raw data file,
+    and the rows ingest validation set aside
+
+    The profile describes the file as read from disk, so the date range and
+    zone selections do not apply here.
+    """
+    profile = get_profile(DATA_FILE, source_version(DATA_FILE))
+    columns = profile['columns']
+
+    table = pd.DataFrame([
+        {
+            'column': name,
+            'dtype': stats['dtype'],
+            'null_rate': stats['null_rate'],
+            'nulls': stats['nulls'],
+            'distinct_estimate': stats['distinct_estimate'],
+            'min': str(stats['min']),
+            'max': str(stats['max']),
+            'top_values': ', '.join(f"{value} ({count:,})"
+                                    for value, count in stats['top_values'])
+        }
+        for name, stats in columns.items()
+    ])
+
+    # One cell per year x column instead of one per row
+    null_rates = pd.DataFrame([
+        {'year': year, 'column': name, 'null_rate': rate}
+        for year, rates in profile['null_rates_by_year'].items()
+        for name, rate in rates.items()
+    ])
+    if not null_rates.empty:
+        chart = alt.Chart(null_rates).mark_rect().encode(
+            x=alt.X('year:O', title='Incident Year'),
+            y=alt.Y('column:N', title='Column', sort=list(columns)),
+            color=alt.Color('null_rate:Q', title='Null Rate',
+                            scale=alt.Scale(scheme='orangered', domainMin=0),
+                            legend=alt.Legend(format='%')),
+            tooltip=[
+                alt.Tooltip('year:O', title='Year'),
+                alt.Tooltip('column:N', title='Column'),
+                alt.Tooltip('null_rate:Q', title='Null Rate', format='.2%')
+            ]
+        ).properties(
+            title='Null Rate by Incident Year and Column',
+            width='container',
+            height=max(300, 22 * len(columns))
+        )
+        st.altair_chart(chart, use_container_width=True)
+
+    st.subheader("Column Profile")
+    st.dataframe(table.assign(null_rate=table['null_rate'].map('{:.2%}'.format)),
+                 use_container_width=True, hide_index=True)
+    st.caption(f"Profile of {DATA_FILE} as read from disk, before the date range and "
+               f"zone filters; also written to {PROFILE_FILE}")
+
+    quarantined = df.attrs.get('quarantined', {})
+    st.subheader("Quarantined Rows")
+    if quarantined:
+        st.dataframe(pd.DataFrame(list(quarantined.items()), columns=['reason', 'rows']),
+                     use_container_width=True, hide_index=True)
+        st.caption(f"Rows failing any check are left out of every view and written to "
+                   f"{QUARANTINE_FILE} with their reasons; a row can fail several checks")
+    else:
+        st.caption("Every row passed ingest validation")
+
+    cells = profile['rows'] * len(columns)
+    null_rate = table['nulls'].sum() / cells if cells else 0.0
+    worst = table.loc[table['null_rate'].idxmax()] if not table.empty else None
+    worst_column = '-' if worst is None or worst['nulls'] == 0 else worst['column']
+    return (profile['rows'], len(columns), null_rate, worst_column,
+            df.attrs.get('quarantined_rows', 0))
@@ -0,0 +1,306 @@
+import glob
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from aggregates import build_stratified_sample
+from locations import pack_location_keys
+from store import (COUNTED_COLUMNS, MISSING_MINUTE, WEEKDAYS, IncidentStore, attach_store,
+                   incident_store)
+from validation import count_reasons, describe_reasons, validate_incidents
+
+# Incident export read by the app: one CSV file, a directory of CSV shards
+# (such as one export per year) or a glob of them; INCIDENT_DATA overrides it
+DATA_FILE = os.environ.get('INCIDENT_DATA', 'clean_dataset.csv')
+
+# Rows that fail ingest validation, with their reasons
+QUARANTINE_FILE = 'quarantine.csv'
+
+# Flagged days of the last anomaly detection run (see anomaly_analysis.py)
+ANOMALY_FILE = 'anomalies.csv'
+
+# Profile of the last data file version (see data_quality_analysis.py)
+PROFILE_FILE = 'data_profile.json'
+
+# Every file the app writes to its working directory; none of them is a
+# shard, even when the data source is that directory or a glob over it
+OUTPUT_FILES = [QUARANTINE_FILE, ANOMALY_FILE, PROFILE_FILE]
+
+# Shards read and parsed at once, one worker process each
+LOAD_WORKERS = os.cpu_count() or 1
+
+# Columns derived at ingest; all others come from the export itself
+DERIVED_COLUMNS = ['location_key', 'incident_hour', 'weekday_code',
+                   'incident_minute', 'incident_day', 'report_minute', 'sample_stratum']
+
+# Columns held only by the incident store once a dataset is prepared
+STORE_COLUMNS = ['incident_minute', 'incident_day', 'incident_hour', 'weekday_code',
+                 'latitude', 'longitude']
+
+
+def file_version(path):
+    """Build a version token for a data file from its size and modification time"""
+    stat = os.stat(path)
+    return f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def data_files(source):
+    """CSV files of a data source: a single file, a directory or a glob"""
+    if os.path.isdir(source):
+        paths = glob.glob(os.path.join(source, '*.csv'))
+    elif any(c in source for c in '*?['):
+        paths = glob.glob(source)
+    else:
+        return [source]
+    # Files the app writes next to the shards are not shards
+    return sorted(p for p in paths if os.path.basename(p) not in OUTPUT_FILES)
+
+
+def source_version(source):
+    """Version token of a data source; changes when any of its files does"""
+    paths = data_files(source)
+    if paths == [source]:
+        return file_version(source)
+    tokens = '|'.join(file_version(path) for path in paths)
+    digest = hashlib.sha1(tokens.encode()).hexdigest()[:12]
+    return f"{os.path.basename(os.path.normpath(source))}:{len(paths)}:{digest}"
+
+
+def dataset_version(df):
+    """Return the version token of a loaded dataset, used to key cached indices"""
+    # Frames loaded through load_data() carry the token of their source file;
+    # fall back to the shape so ad-hoc frames still get a usable key
+    return df.attrs.get('dataset_version', f"{len(df)}:{len(df.columns)}")
+
+
+def load_dataset(source, version=None, quarantine_path=QUARANTINE_FILE, workers=LOAD_WORKERS):
+    """Read a data file or its shards and prepare them, tagged with a version token
+
+    Shards are read and parsed in parallel, must agree on their columns and
+    are concatenated before validation, so duplicates across shards are
+    caught and the incident store codes every shard's labels against one
+    shared vocabulary.
+    """
+    paths = data_files(source)
+    if not paths:
+        raise ValueError(f"No CSV files found for {source}")
+    frames = read_shards(paths, workers)
+    check_schemas(frames, paths)
+
+    columns = frames[0].columns
+    df = frames[0] if len(frames) == 1 else pd.concat(
+        [frame[columns] for frame in frames], ignore_index=True)
+    df.attrs['dataset_version'] = version or source_version(source)
+    return finish_dataset(df, quarantine_path)
+
+
+def read_shard(path):
+    """Read one CSV file and derive its per-row columns; runs in a worker"""
+    try:
+        return derive_columns(pd.read_csv(path))
+    except KeyError as e:
+        raise ValueError(f"{path} has no {e.args[0]} column") from None
+
+
+def read_shards(paths, workers=LOAD_WORKERS):
+    """Read and parse shards, several at a time in worker processes
+
+    Date and time parsing dominates ingest and holds the GIL, so shards go
+    to processes rather than threads. Workers are spawned, not forked, as
+    forking a server with live threads is unsafe.
+    """
+    workers = min(workers, len(paths))
+    if workers <= 1:
+        return [read_shard(path) for path in paths]
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        return list(pool.map(read_shard, paths))
+
+
+def _column_kind(values):
+    """'number' or 'text', or None for an all-null column that fits either"""
+    if values.isna().all():
+        return None
+    return 'number' if pd.api.types.is_numeric_dtype(values) else 'text'
+
+
+def check_schemas(frames, paths):
+    """Raise ValueError unless all shards have the same columns and types"""
+    columns = [c for c in frames[0].columns if c not in DERIVED_COLUMNS]
+    for frame, path in zip(frames[1:], paths[1:]):
+        other = [c for c in frame.columns if c not in DERIVED_COLUMNS]
+        if set(other) != set(columns):
+            missing = sorted(set(columns) - set(other))
+            extra = sorted(set(other) - set(columns))
+            raise ValueError(f"{path} does not match the columns of {paths[0]}: "
+                             f"missing {missing}, unexpected {extra}")
+
+    for column in columns:
+        kinds = {path: _column_kind(frame[column]) for frame, path in zip(frames, paths)}
+        if len(set(kinds.values()) - {None}) > 1:
+            shards = ', '.join(f"{path} ({kind})" for path, kind in kinds.items() if kind)
+            raise ValueError(f"Column {column} has different types across shards: {shards}")
+
+
+def to_epoch_minutes(value):
+    """Convert a date or timestamp to minutes since the Unix epoch"""
+    return int(np.datetime64(pd.Timestamp(value), 'm').astype(np.int64))
+
+
+def prepare_dataset(df, quarantine_path=None):
+    """Validate the rows and add the derived columns shared by the views;
+    runs once per load (see derive_columns and finish_dataset)"""
+    return finish_dataset(derive_columns(df), quarantine_path)
+
+
+def derive_columns(df):
+    """Add the per-row derived columns
+
+    Each row is converted on its own, so shards run this in parallel
+    before they are concatenated.
+    """
+    # Quantized lat/lon packed into one int64 key per incident
+    df['location_key'] = pack_location_keys(df['latitude'], df['longitude'])
+
+    # Hour of day and weekday as small integer codes (-1 when unknown;
+    # rows with an unknown hour are quarantined)
+    times = pd.to_datetime(df['incident_time'], format='%H:%M', errors='coerce')
+    df['incident_hour'] = times.dt.hour.fillna(-1).astype('int8')
+    weekday_codes = {day: code for code, day in enumerate(WEEKDAYS)}
+    df['weekday_code'] = df['incident_day_of_week'].map(
+        weekday_codes).fillna(-1).astype('int8')
+
+    # Incident date and time as minutes since the epoch; unparseable dates
+    # get the int64 minimum and are quarantined
+    dates = pd.to_datetime(df['incident_date'], errors='coerce')
+    minutes = dates.to_numpy().astype('datetime64[m]').astype(np.int64)
+    minute_of_day = (times.dt.hour * 60 + times.dt.minute).fillna(0).to_numpy()
+    df['incident_minute'] = np.where(
+        dates.isna(), np.iinfo(np.int64).min, minutes + minute_of_day.astype(np.int64))
+    # Epoch day codes for daily binning (-1 when the date is unknown)
+    df['incident_day'] = np.where(
+        dates.isna(), -1, df['incident_minute'] // (24 * 60)).astype(np.int32)
+
+    # Report time in the store's int32 epoch minutes, for report lags
+    if 'report_datetime' in df:
+        reported = pd.to_datetime(df['report_datetime'], format='%Y/%m/%d %I:%M:%S %p',
+                                  errors='coerce')
+        df['report_minute'] = np.where(
+            reported.isna(), MISSING_MINUTE,
+            reported.to_numpy().astype('datetime64[m]').astype(np.int64)).astype(np.int32)
+
+    return df
+
+
+def finish_dataset(df, quarantine_path=None):
+    """Validate, sort and sample a frame with derived columns
+
+    Rows failing validation (see validation.py) are dropped, so views can
+    rely on parsed dates and times, known districts and categories and
+    in-bounds coordinates. They are written with their reasons to
+    quarantine_path when given, and counted in attrs['quarantined_rows']
+    and per reason in attrs['quarantined']. The returned frame is sorted by
+    incident date and time so date ranges can be sliced with a binary
+    search (see filter_date_range).
+    """
+    # One vectorized pass over all checks; failing rows are set aside with
+    # the columns they were read with
+    flags = validate_incidents(df)
+    invalid = flags != 0
+    df.attrs['quarantined'] = count_reasons(flags)
+    df.attrs['quarantined_rows'] = int(np.count_nonzero(invalid))
+    if invalid.any():
+        if quarantine_path is not None:
+            source_columns = [c for c in df.columns if c not in DERIVED_COLUMNS]
+            quarantine = df.loc[invalid, source_columns].assign(
+                reasons=describe_reasons(flags[invalid]))
+            quarantine.to_csv(quarantine_path, index=False)
+        df = df[~invalid]
+
+    # The report text is not needed once converted
+    if 'report_datetime' in df:
+        df.pop('report_datetime')
+
+    df = df.sort_values('incident_minute', kind='stable', ignore_index=True)
+
+    # Stratified sample by category and year for the approximate mode; rows
+    # outside the sample get stratum -1. Stratum sizes travel in attrs so
+    # date-range slices can still weight their sampled rows.
+    strata, population, sampled = build_stratified_sample(
+        df['incident_category'], df['incident_year'])
+    df['sample_stratum'] = strata
+    df.attrs['sample_strata'] = (population.tolist(), sampled.tolist())
+
+    # Compact columnar store for the count builders (see store.py); the
+    # frame keeps only what the store does not hold
+    store = IncidentStore.from_frame(df)
+    return attach_store(compact_frame(df, store), store)
+
+
+def compact_frame(df, store):
+    """The columns of a prepared frame that the store does not replace
+
+    Times and coordinates are dropped, as views read them from the store.
+    Labelled columns become Categoricals over the store's labels, other
+    text columns Categoricals of their own and integer export columns the
+    smallest type holding their values.
+    """
+    df = df.drop(columns=STORE_COLUMNS)
+    for column in df.columns:
+        values = df[column]
+        if column in COUNTED_COLUMNS:
+            df[column] = store.categorical(COUNTED_COLUMNS[column])
+        elif pd.api.types.is_string_dtype(values) or values.dtype == object:
+            df[column] = values.astype('category')
+        elif column not in DERIVED_COLUMNS and pd.api.types.is_integer_dtype(values):
+            df[column] = pd.to_numeric(values, downcast='integer')
+    return df
+
+
+def get_date_bounds(df):
+    """First and last incident date of a prepared dataset"""
+    minutes = incident_store(df).minute
+    first = np.searchsorted(minutes, MISSING_MINUTE, side='right')
+    if first == len(minutes):
+        return None, None
+    return (pd.Timestamp(minutes[first], unit='m').date(),
+            pd.Timestamp(minutes[-1], unit='m').date())
+
+
+def filter_date_range(df, start=None, end=None):
+    """Incidents with start <= incident time < end, as a zero-copy slice
+
+    Relies on the prepared dataset being sorted by incident time, so both
+    bounds are found with a binary search of the store's minutes instead of
+    a full scan.
+    """
+    minutes = incident_store(df).minute
+    lo = 0 if start is None else np.searchsorted(
+        minutes, to_epoch_minutes(start), side='left')
+    hi = len(minutes) if end is None else np.searchsorted(
+        minutes, to_epoch_minutes(end), side='left')
+    if lo == 0 and hi == len(minutes):
+        return df
+
+    sliced = df.iloc[lo:hi]
+    # Cached aggregates are keyed on the version, so each slice gets its own
+    sliced.attrs['dataset_version'] = f"{dataset_version(df)}[{lo}:{hi}]"
+    return attach_store(sliced, incident_store(df).slice(lo, hi))
+
+
+def with_zones(df, zone_names, zone_codes, zone_version):
+    """Dataset with police_district replaced by patrol zone names
+
+    Every view that groups by district then groups by zone. Incidents
+    outside all zones get no district, like unlocated incidents; the zone
+    set's version is folded into the dataset version so cached aggregates
+    are kept apart.
+    """
+    store = incident_store(df).with_labels('district', zone_codes, zone_names)
+    zoned = df.assign(police_district=store.categorical('district'))
+    zoned.attrs = dict(df.attrs, dataset_version=f"{dataset_version(df)}+{zone_version}")
+    return attach_store(zoned, store)
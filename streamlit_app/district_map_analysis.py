@@ -2,24 +2,63 @@ import streamlit as st
 import pandas as pd
 import pydeck as pdk
 import numpy as np
+from aggregates import build_district_counts, district_totals
+from dataset import dataset_version
+from store import incident_store
 
 
-def create_district_map_analysis(df):
-    """Create an interactive district map visualization using Streamlit's map"""
+# Incidents outside the city have no district location to plot
+EXCLUDED_DISTRICTS = ['OUT OF SF']
+
+
+@st.cache_data(ttl=3600)  # Cache for 1 hour
+def get_district_geometry(_df, version):
+    """Compute district centroids from incident coordinates, once per dataset"""
+    store = incident_store(_df)
+    district_codes, districts = store.factorize('district')
+    # Districts are matched case-insensitively; fold the few labels, not rows
+    districts = pd.Index(districts).str.upper()
+    excluded = np.append(districts.isin(EXCLUDED_DISTRICTS), True)[district_codes]
+    located = ((district_codes >= 0) & ~excluded &
+               ~np.isnan(store.latitude) & ~np.isnan(store.longitude))
+
+    # Median location of each district's incidents, to the metre the
+    # float32 coordinates resolve
+    centroids = pd.DataFrame({
+        'latitude': store.latitude[located].astype(np.float64),
+        'longitude': store.longitude[located].astype(np.float64)
+    }).groupby(districts[district_codes[located]]).median().round(5)
+    return centroids.rename_axis('district_names').reset_index()
+
+
+@st.cache_data(ttl=3600)
+def get_district_counts(_df, version):
+    """District x category counts, once per dataset version"""
+    return build_district_counts(_df)
 
-    # District data with standardized names
-    district_data = {
-        'district_names': ['CENTRAL', 'NORTHERN', 'SOUTHERN', 'MISSION', 'RICHMOND', 'TARAVAL', 'INGLESIDE', 'BAYVIEW', 'TENDERLOIN', 'PARK'],
-        'latitude': [37.751, 37.790, 37.778, 37.758, 37.78, 37.75, 37.72, 37.72, 37.79, 37.77],
-        'longitude': [-122.45, -122.44, -122.40, -122.41, -122.48, -122.485, -122.46, -122.40, -122.413, -122.49]
-    }
 
-    # Convert to DataFrame
-    districts_df = pd.DataFrame(district_data)
+@st.cache_data(ttl=3600)
+def get_district_layer_data(_df, version, incident_type):
+    """Build the district layer for an incident type with vectorized math"""
+    districts_df = get_district_geometry(_df, version).copy()
+    counts = get_district_counts(_df, version)
 
-    # Clean the police_district column in the input DataFrame
-    df['police_district'] = df['police_district'].str.upper()
-    df = df.dropna(subset=['police_district'])
+    incident_count = district_totals(counts, incident_type).reindex(
+        districts_df['district_names'], fill_value=0).to_numpy()
+    districts_df['incident_count'] = incident_count
+
+    # Calculate normalized values for radius, opacity (60 to 170) and color
+    ratio = incident_count / max(incident_count.max(), 1)
+    districts_df['radius'] = ratio * 1300 + 300
+    districts_df['opacity'] = (ratio * 110 + 60).astype(int)
+    # Less green for higher counts
+    districts_df['green'] = np.maximum(0, (255 - ratio * 255).astype(int))
+
+    return districts_df
+
+
+def create_district_map_analysis(df):
+    """Create an interactive district map visualization using Streamlit's map"""
 
     # Add incident type selector in sidebar
     incident_options = ['All Types', 'Larceny Theft', 'Motor Vehicle Theft',
@@ -30,37 +69,9 @@ def create_district_map_analysis(df):
         key="district_map_radio"
     )
 
-    # Filter incidents based on selection
-    if selected_incident != 'All Types':
-        filtered_df = df[df['incident_category'] == selected_incident].copy()
-    else:
-        filtered_df = df.copy()
-
-    # Count incidents per district
-    district_counts = filtered_df['police_district'].value_counts()
-
-    # Add incident counts and calculate normalized values for visualization
-    districts_df['incident_count'] = districts_df['district_names'].map(
-        lambda x: district_counts.get(x, 0))
-
-    # Calculate normalized values for radius and color
-    max_incidents = districts_df['incident_count'].max()
-    districts_df['radius'] = districts_df['incident_count'].apply(
-        lambda x: (x / max_incidents) * 1300 + 300)
-
-    # Calculate opacity (between 40 and 200) and color intensity
-    districts_df['opacity'] = districts_df['incident_count'].apply(
-        lambda x: int((x / max_incidents) * 110 + 60))
-
-    # Create a custom color for each point based on incident count
-    districts_df['color'] = districts_df.apply(
-        lambda row: [255,
-                     # Less green for higher counts
-                     max(0, int(
-                         255 - (row['incident_count'] / max_incidents) * 255)),
-                     0,
-                     row['opacity']],
-        axis=1)
+    # District locations and counts, cached per dataset and incident type
+    districts_df = get_district_layer_data(
+        df, dataset_version(df), selected_incident)
 
     # Create the map layer
     layer = pdk.Layer(
@@ -68,7 +79,7 @@ def create_district_map_analysis(df):
         districts_df,
         get_position=["longitude", "latitude"],
         get_radius="radius",
-        get_fill_color="color",
+        get_fill_color="[255, green, 0, opacity]",
         pickable=True,
         auto_highlight=True,
         opacity=0.8
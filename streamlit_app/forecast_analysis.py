@@ -0,0 +1,179 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import altair as alt
+from aggregates import (FORECAST_WEEKS, Z_95, fit_seasonal_forecasts, forecast_by_period,
+                        series_rollups)
+from dataset import dataset_version
+from time_series import get_series_counts
+from view_model import cached_chart
+
+# Weeks of history drawn ahead of the forecast in the forecast view
+HISTORY_WEEKS = 104
+
+
+@st.cache_resource(ttl=3600, max_entries=16)  # Cache for 1 hour
+def get_series_rollups(_df, version):
+    """Daily counts of every (district, category) series including the
+    'All Districts' and 'All Types' totals, with a row index by label pair"""
+    counts, districts, categories, first_day = get_series_counts(_df, version)
+    rows, district_labels, category_labels = series_rollups(counts, districts, categories)
+    index = {key: i for i, key in enumerate(zip(district_labels, category_labels))}
+    return rows, index, first_day
+
+
+@st.cache_resource(ttl=3600, max_entries=16)
+def get_forecasts(_df, version):
+    """Weekly forecasts of every series from one batched fit, or None"""
+    rows, index, first_day = get_series_rollups(_df, version)
+    return fit_seasonal_forecasts(rows, first_day)
+
+
+def get_forecast(df, category='All Types', district='All Districts'):
+    """Weekly forecast, residual sigma and start day of one series, or None"""
+    forecasts = get_forecasts(df, dataset_version(df))
+    if forecasts is None:
+        return None
+    weekly, sigma, start_day = forecasts
+    row = get_series_rollups(df, dataset_version(df))[1].get((district, category))
+    if row is None:
+        return None
+    return weekly[row], sigma[row], start_day
+
+
+def select_forecast(key):
+    """Sidebar forecast toggle; returns the horizon in weeks, or 0 when off"""
+    if not st.sidebar.checkbox("Show Forecast", key=f"{key}_forecast"):
+        return 0
+    return st.sidebar.slider(
+        "Forecast Horizon (weeks)", 4, FORECAST_WEEKS, 8, key=f"{key}_forecast_weeks")
+
+
+def get_period_forecast(df, category, horizon, period, observed, x_field):
+    """Forecast totals per year or month, stacked on the counts observed so far
+
+    `observed` holds the chart's counts in a `count` column, keyed by
+    `x_field` for years or by year and month_num for months; forecast, low
+    and high become running totals above it.
+    """
+    forecast = get_forecast(df, category)
+    if forecast is None or not horizon:
+        return None
+    weekly, sigma, start_day = forecast
+    data = forecast_by_period(weekly[:horizon], sigma, start_day, period)
+
+    if period == 'year':
+        data = data.rename(columns={'year': x_field})
+        keys = [x_field]
+    else:
+        keys = ['year', 'month_num']
+    data = data.merge(observed[keys + ['count']], on=keys, how='left')
+    data['observed'] = data.pop('count').fillna(0)
+    for column in ('forecast', 'low', 'high'):
+        data[column] = data['observed'] + data[column]
+    return data
+
+
+def forecast_layers(data, x_field, x_title, sort=None, style='bar'):
+    """Forecast marks over an observed chart: bars or a dashed rule from the
+    observed count to the projected total, with the 95% interval"""
+    base = alt.Chart(data).encode(
+        x=alt.X(f'{x_field}:O', title=x_title, sort=sort),
+        tooltip=[
+            alt.Tooltip(f'{x_field}:O', title=x_title),
+            alt.Tooltip('forecast:Q', title='Projected Total', format=',.0f'),
+            alt.Tooltip('low:Q', title='95% Low', format=',.0f'),
+            alt.Tooltip('high:Q', title='95% High', format=',.0f')
+        ]
+    )
+
+    if style == 'bar':
+        projected = base.mark_bar(color='#FF9800', opacity=0.6).encode(
+            y='observed:Q', y2='forecast:Q')
+    else:
+        projected = base.mark_rule(color='#FF9800', strokeDash=[4, 4], strokeWidth=2).encode(
+            y='observed:Q', y2='forecast:Q') + base.mark_circle(
+            color='#FF9800', size=100).encode(y='forecast:Q')
+
+    # 95% interval of the projected total
+    interval = base.mark_rule(color='#FF9800', strokeWidth=1).encode(y='low:Q', y2='high:Q')
+    return projected + interval
+
+
+def create_forecast_analysis(df):
+    """Weekly history and forecast for any incident category and police district"""
+    rows, index, first_day = get_series_rollups(df, dataset_version(df))
+    districts, categories = zip(*index) if index else ((), ())
+    category_options = ['All Types'] + sorted(set(categories) - {'All Types'})
+    district_options = ['All Districts'] + sorted(set(districts) - {'All Districts'})
+
+    selected_incident = st.sidebar.selectbox(
+        "Select Incident Type for Forecast", category_options, key="forecast_incident")
+    selected_district = st.sidebar.selectbox(
+        "Select Police District for Forecast", district_options, key="forecast_district")
+    horizon = st.sidebar.slider(
+        "Forecast Horizon (weeks)", 4, FORECAST_WEEKS, 8, key="forecast_weeks")
+
+    forecast = get_forecast(df, selected_incident, selected_district)
+    if forecast is None:
+        st.info("Not enough history in the selected date range to forecast")
+        return None, 0, 0, '-', selected_incident
+    weekly, sigma, start_day = forecast
+
+    # Observed weekly totals over the same week boundaries as the fit
+    row = index[(selected_district, selected_incident)]
+    num_weeks = min(rows.shape[1] // 7, HISTORY_WEEKS)
+    history = rows[row, rows.shape[1] - num_weeks * 7:].reshape(num_weeks, 7).sum(axis=1)
+
+    week_starts = start_day + 7 * np.arange(-num_weeks, horizon)
+    chart_df = pd.DataFrame({
+        'week': week_starts.astype('datetime64[D]'),
+        'count': np.concatenate([history, weekly[:horizon]]),
+        'series': ['Observed'] * num_weeks + ['Forecast'] * horizon
+    })
+    chart_df['low'] = np.where(chart_df['series'] == 'Forecast',
+                               np.maximum(chart_df['count'] - Z_95 * sigma, 0), np.nan)
+    chart_df['high'] = np.where(chart_df['series'] == 'Forecast',
+                                chart_df['count'] + Z_95 * sigma, np.nan)
+    # Start the forecast line at the last observed week so the two join up
+    bridge = chart_df.iloc[[num_weeks - 1]].assign(series='Forecast')
+    line_df = pd.concat([chart_df, bridge], ignore_index=True)
+
+    total = weekly[:horizon].sum()
+    avg = total / horizon
+    peak_week = week_starts.astype('datetime64[D]')[num_weeks + int(np.argmax(weekly[:horizon]))]
+
+    def build_chart():
+        line = alt.Chart(line_df).mark_line(strokeWidth=2).encode(
+            x=alt.X('week:T', title='Week'),
+            y=alt.Y('count:Q', title='Number of Incidents'),
+            color=alt.Color('series:N',
+                            scale=alt.Scale(domain=['Observed', 'Forecast'],
+                                            range=['#2196F3', '#FF9800']),
+                            title=None),
+            strokeDash=alt.StrokeDash('series:N',
+                                      scale=alt.Scale(domain=['Observed', 'Forecast'],
+                                                      range=[[1, 0], [5, 5]]),
+                                      legend=None),
+            tooltip=[
+                alt.Tooltip('week:T', title='Week of'),
+                alt.Tooltip('series:N', title='Series'),
+                alt.Tooltip('count:Q', title='Incidents', format=',.0f')
+            ]
+        )
+
+        # 95% band around the forecast
+        band = alt.Chart(chart_df[chart_df['series'] == 'Forecast']).mark_area(
+            color='#FF9800', opacity=0.2
+        ).encode(x='week:T', y='low:Q', y2='high:Q')
+
+        return (band + line).properties(
+            title=f'{horizon}-Week Forecast - {selected_incident}, {selected_district}',
+            width='container',
+            height=500
+        )
+
+    chart = cached_chart(
+        'forecast', [selected_incident, selected_district, horizon], df, build_chart)
+
+    return chart, total, avg, str(peak_week), selected_incident
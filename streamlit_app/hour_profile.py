@@ -0,0 +1,73 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from aggregates import build_hour_counts, weekday_hour_counts
+from dataset import dataset_version
+
+# Period groupings as (label, start hour, end hour); a period may wrap
+# past midnight
+GRID_PERIODS = [('Morning', 5, 12), ('Afternoon', 12, 17),
+                ('Evening', 17, 21), ('Night', 21, 5)]
+PIE_PERIODS = [('Night', 18, 6), ('Morning', 6, 12), ('Afternoon', 12, 18)]
+
+
+@st.cache_resource(ttl=3600, max_entries=16)  # Cache for 1 hour
+def get_hour_counts(_df, version):
+    """Category x district x year x weekday x hour cube, once per dataset version"""
+    return build_hour_counts(_df)
+
+
+def get_profile_options(df):
+    """Districts and years available for filtering the hour profiles"""
+    _, _, districts, years = get_hour_counts(df, dataset_version(df))
+    return districts, years
+
+
+def get_weekday_hour_counts(df, category='All Types', district='All Districts',
+                            year='All Years', by_district=False):
+    """7x24 weekday-by-hour counts for a selection, or Dx7x24 per district"""
+    return weekday_hour_counts(get_hour_counts(df, dataset_version(df)),
+                               category, district, year, by_district)
+
+
+def get_hour_profile(df, category='All Types', district='All Districts',
+                     year='All Years'):
+    """24-bin hourly histogram for any category, district and year"""
+    return get_weekday_hour_counts(df, category, district, year).sum(axis=0)
+
+
+def get_period_labels(periods):
+    """Label each of the 24 hours with the period that contains it"""
+    hours = np.arange(24)
+    labels = np.empty(24, dtype=object)
+    for label, start, end in periods:
+        if start < end:
+            labels[(hours >= start) & (hours < end)] = label
+        else:
+            labels[(hours >= start) | (hours < end)] = label
+    return labels
+
+
+def periods_from_starts(starts):
+    """Periods running from each start hour to the next, the last wrapping
+    past midnight to the first; labelled with their hours, e.g. '05:00-12:00'"""
+    starts = sorted(set(starts))
+    ends = starts[1:] + starts[:1]
+    return [(f"{start:02d}:00-{end:02d}:00", start, end)
+            for start, end in zip(starts, ends)]
+
+
+def get_period_midpoints(periods):
+    """Middle hour of each period, where its label sits on an hour axis"""
+    midpoints = []
+    for _, start, end in periods:
+        length = (end - start) % 24 or 24  # A single period spans the day
+        midpoints.append((start + length // 2) % 24)
+    return midpoints
+
+
+def group_periods(hourly, periods):
+    """Total an hourly histogram into named periods, in the given order"""
+    labels = get_period_labels(periods)
+    return pd.Series({label: int(hourly[labels == label].sum())
+                      for label, _, _ in periods})
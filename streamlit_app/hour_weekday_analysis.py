@@ -0,0 +1,93 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import altair as alt
+from dataset import WEEKDAYS
+from hour_profile import get_profile_options, get_weekday_hour_counts
+from view_model import cached_chart
+
+
+def create_hour_weekday_analysis(df):
+    """Create heatmap of incidents by hour of day and day of week"""
+    # Add incident type selector
+    incident_options = ['All Types', 'Larceny Theft', 'Motor Vehicle Theft',
+                        'Assault', 'Burglary', 'Robbery']
+    selected_incident = st.sidebar.radio(
+        "Select Incident Type for Heatmap",
+        incident_options,
+        key="hour_weekday_radio"
+    )
+    by_district = st.sidebar.checkbox(
+        "Split by Police District", key="hour_weekday_by_district")
+
+    # Slice the cached count cube for the selection
+    matrix = get_weekday_hour_counts(df, selected_incident)
+
+    def build_chart():
+        # Long format for Altair: one row per (district,) weekday and hour
+        if by_district:
+            district_matrix = get_weekday_hour_counts(
+                df, selected_incident, by_district=True)
+            districts, _ = get_profile_options(df)
+            heat_df = pd.DataFrame({
+                'district': np.repeat(districts, 7 * 24),
+                'weekday': np.tile(np.repeat(WEEKDAYS, 24), len(districts)),
+                'hour': np.tile(np.arange(24), 7 * len(districts)),
+                'count': district_matrix.ravel()
+            })
+        else:
+            heat_df = pd.DataFrame({
+                'weekday': np.repeat(WEEKDAYS, 24),
+                'hour': np.tile(np.arange(24), 7),
+                'count': matrix.ravel()
+            })
+
+        # Create heatmap
+        base = alt.Chart(heat_df).mark_rect().encode(
+            x=alt.X('hour:O',
+                    title='Hour of Day',
+                    axis=alt.Axis(labelAngle=0)),
+            y=alt.Y('weekday:O',
+                    sort=WEEKDAYS,
+                    title='Day of Week'),
+            color=alt.Color('count:Q',
+                            scale=alt.Scale(scheme='reds'),
+                            title='Incidents'),
+            tooltip=[
+                alt.Tooltip('weekday:O', title='Day'),
+                alt.Tooltip('hour:O', title='Hour'),
+                alt.Tooltip('count:Q', title='Incidents', format=',d')
+            ]
+        )
+
+        title = f'Incidents by Hour and Day of Week - {selected_incident}'
+        if by_district:
+            chart = base.properties(
+                width=280,
+                height=160
+            ).facet(
+                facet=alt.Facet('district:N', title=None),
+                columns=3
+            ).properties(
+                title=title
+            )
+        else:
+            chart = base.properties(
+                title=title,
+                width='container',
+                height=400
+            )
+
+        return chart
+
+    chart = cached_chart(
+        'hour_weekday', [selected_incident, by_district], df, build_chart)
+
+    # Calculate metrics
+    total_incidents = int(matrix.sum())
+    peak_day, peak_hour = np.unravel_index(matrix.argmax(), matrix.shape)
+    low_day, low_hour = np.unravel_index(matrix.argmin(), matrix.shape)
+    peak_slot = f"{WEEKDAYS[peak_day]} {peak_hour:02d}:00"
+    lowest_slot = f"{WEEKDAYS[low_day]} {low_hour:02d}:00"
+
+    return chart, total_incidents, peak_slot, lowest_slot, selected_incident
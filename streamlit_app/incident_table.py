@@ -0,0 +1,121 @@
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dataset import dataset_version
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+@st.cache_resource(ttl=3600, max_entries=16)
+def get_column_index(_df, version, column):
+    """Sort the full frame once by a column (case-insensitive)"""
+    # Factorizing with sort=True gives codes in the same order as the values,
+    # so the index can be searched by code range instead of by string
+    keys = _df[column].astype(str).str.lower()
+    codes, uniques = pd.factorize(keys, sort=True)
+    order = np.argsort(codes, kind='stable')
+    return order, codes[order], np.asarray(uniques, dtype=object)
+
+
+@st.cache_resource(ttl=3600, max_entries=64)
+def get_filtered_index(_df, _mask, version, filter_key, column):
+    """Restrict a column's sort order to the filtered rows, keeping it sorted"""
+    order, sorted_codes, uniques = get_column_index(_df, version, column)
+    keep = _mask[order]
+    return order[keep], sorted_codes[keep], uniques
+
+
+@st.cache_resource(ttl=3600, max_entries=64)
+def get_table_rows(_df, _mask, version, filter_key, sort_column, search_column, search_text):
+    """Row positions of the filtered frame matching the search, in sort order"""
+    positions, sorted_codes, uniques = get_filtered_index(
+        _df, _mask, version, filter_key, sort_column if not search_text else search_column)
+
+    if not search_text:
+        return positions
+
+    # Prefix search: binary search the sorted values for the matching code
+    # range, then binary search the sorted codes for the matching rows
+    prefix = search_text.lower()
+    lo_code = np.searchsorted(uniques, prefix, side='left')
+    hi_code = np.searchsorted(uniques, prefix + '\uffff', side='left')
+    lo = np.searchsorted(sorted_codes, lo_code, side='left')
+    hi = np.searchsorted(sorted_codes, hi_code, side='left')
+    matches = positions[lo:hi]
+
+    if search_column == sort_column:
+        return matches
+
+    # Reorder the matches by the sort column's codes
+    order, sort_codes, _ = get_column_index(_df, version, sort_column)
+    row_codes = np.empty_like(sort_codes)
+    row_codes[order] = sort_codes
+    matches = np.sort(matches)
+    return matches[np.argsort(row_codes[matches], kind='stable')]
+
+
+def create_incident_table(df, mask, filter_key, columns, key):
+    """Paginated, sortable incident table that only ships the visible page
+
+    `mask` is a boolean array over the rows of `df` selecting the rows to list
+    and `filter_key` identifies it for caching.
+    """
+    version = dataset_version(df)
+
+    # Table controls
+    col1, col2, col3, col4 = st.columns([2, 1, 2, 2])
+    with col1:
+        sort_column = st.selectbox("Sort by", columns, key=f"{key}_sort")
+    with col2:
+        descending = st.checkbox("Descending", key=f"{key}_desc")
+    with col3:
+        search_column = st.selectbox("Search in", columns, key=f"{key}_search_col")
+    with col4:
+        search_text = st.text_input(
+            "Starts with", key=f"{key}_search").strip()
+
+    positions = get_table_rows(df, mask, version, filter_key,
+                               sort_column, search_column, search_text)
+    if descending:
+        positions = positions[::-1]
+
+    # Clamp the page number before the widget is created so a narrower
+    # filter never leaves it pointing past the last page
+    page_size = st.session_state.get(f"{key}_page_size", PAGE_SIZES[0])
+    total = len(positions)
+    num_pages = max(1, math.ceil(total / page_size))
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > num_pages:
+        st.session_state[page_key] = num_pages
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+    with col2:
+        page = st.number_input(
+            "Page", min_value=1, max_value=num_pages, key=page_key)
+
+    start = (page - 1) * page_size
+    page_positions = positions[start:start + page_size]
+
+    if total:
+        st.info(
+            f"Showing {start + 1:,}-{start + len(page_positions):,} of {total:,} incidents "
+            f"(page {page:,} of {num_pages:,})")
+    else:
+        st.info("No incidents match the search")
+
+    # Only the visible page is sent to the browser, as plain values rather
+    # than Categoricals that would carry every label of the dataset along
+    page_df = df.iloc[page_positions][columns]
+    st.dataframe(
+        page_df.astype({column: page_df[column].cat.categories.dtype for column in columns
+                        if isinstance(page_df[column].dtype, pd.CategoricalDtype)}),
+        use_container_width=True,
+        hide_index=True
+    )
+
+    return total
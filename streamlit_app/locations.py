@@ -0,0 +1,240 @@
+import numpy as np
+import pandas as pd
+
+# Coordinates are quantized to 1e-5 degrees (about 1 m in San Francisco)
+COORD_SCALE = 100_000
+
+# Key given to incidents without coordinates
+MISSING_LOCATION = np.iinfo(np.int64).min
+
+# HyperLogLog precision: 2**12 registers, about 1.6% standard error
+SKETCH_PRECISION = 12
+
+
+def pack_location_keys(latitude, longitude):
+    """Quantize coordinates and pack each lat/lon pair into one int64 key"""
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    valid = np.isfinite(latitude) & np.isfinite(longitude)
+    lat_q = np.where(valid, np.rint(latitude * COORD_SCALE), 0).astype(np.int64)
+    lon_q = np.where(valid, np.rint(longitude * COORD_SCALE), 0).astype(np.int64)
+    # Latitude in the high 32 bits, longitude as unsigned low 32 bits
+    keys = (lat_q << 32) | (lon_q & 0xFFFFFFFF)
+    return np.where(valid, keys, MISSING_LOCATION)
+
+
+def unpack_location_keys(keys):
+    """Split packed keys back into quantized (latitude, longitude) int32 arrays"""
+    keys = np.asarray(keys, dtype=np.int64)
+    lat_q = (keys >> 32).astype(np.int32)
+    lon_q = (keys & 0xFFFFFFFF).astype(np.uint32).view(np.int32)
+    return lat_q, lon_q
+
+
+def collapse_locations(keys):
+    """Collapse duplicate location keys into unique points with a weight each
+
+    Returns quantized int32 latitude/longitude arrays and an int32 count of
+    incidents at each point.
+    """
+    keys, weights = np.unique(keys, return_counts=True)
+    lat_q, lon_q = unpack_location_keys(keys)
+    return lat_q, lon_q, weights.astype(np.int32)
+
+
+def _hash_keys(keys):
+    """Mix location keys into well-distributed 64-bit hashes (splitmix64)"""
+    h = np.asarray(keys, dtype=np.int64).view(np.uint64)
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def _sketch_updates(keys, precision):
+    """Register index and rank of each key for a HyperLogLog sketch"""
+    h = _hash_keys(keys)
+    index = (h >> np.uint64(64 - precision)).astype(np.int64)
+    rest = h & np.uint64((1 << (64 - precision)) - 1)
+    # frexp gives the exact bit length of the remaining bits
+    bit_length = np.frexp(rest.astype(np.float64))[1]
+    rank = (64 - precision - bit_length + 1).astype(np.uint8)
+    return index, rank
+
+
+def location_sketch(keys, precision=SKETCH_PRECISION):
+    """Build a HyperLogLog sketch of the distinct keys in one pass"""
+    registers = np.zeros(1 << precision, dtype=np.uint8)
+    index, rank = _sketch_updates(keys, precision)
+    np.maximum.at(registers, index, rank)
+    return registers
+
+
+def estimate_distinct(registers):
+    """Estimate the distinct count of a (merged) HyperLogLog sketch"""
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = np.count_nonzero(registers == 0)
+    # Linear counting is more accurate for small cardinalities
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * np.log(m / zeros)
+    return int(round(estimate))
+
+
+class LocationIndex:
+    """Distinct and repeat location statistics per incident category
+
+    Built once per dataset from the packed `location_key` column, so the map
+    metrics are dictionary lookups instead of groupbys on every rerun.
+    Optional HyperLogLog sketches per (category, year) answer distinct counts
+    for any combination of categories and years by merging registers.
+
+    Incidents missing a category or year count in a trailing slot, like the
+    count tables, so they are part of the 'All Types' and all-years figures.
+    """
+
+    def __init__(self, categories, keys, years=None, top_n=20,
+                 sketch_precision=None):
+        keys = np.asarray(keys, dtype=np.int64)
+        valid = keys != MISSING_LOCATION
+        codes, names = pd.factorize(np.asarray(categories)[valid])
+        codes[codes < 0] = len(names)
+        keys = keys[valid]
+        self.categories = list(names)
+        num_slots = len(self.categories) + 1
+        self._code_of = {name: i for i, name in enumerate(self.categories)}
+
+        # Counts of every (category, location) pair from one sort
+        order = np.lexsort((keys, codes))
+        pair_codes, pair_keys = codes[order], keys[order]
+        starts = np.flatnonzero(np.r_[True, (pair_codes[1:] != pair_codes[:-1]) |
+                                      (pair_keys[1:] != pair_keys[:-1])])
+        pair_codes, pair_keys = pair_codes[starts], pair_keys[starts]
+        pair_counts = np.diff(np.r_[starts, len(keys)])
+
+        self._distinct = np.bincount(pair_codes, minlength=num_slots)
+        self._incidents = np.bincount(codes, minlength=num_slots)
+
+        # Top repeat locations: per category and over all categories
+        by_count = np.lexsort((-pair_counts, pair_codes))
+        first = np.searchsorted(pair_codes[by_count], np.arange(len(self.categories)))
+        self._top = {}
+        for code, start in enumerate(first):
+            top = by_count[start:start + min(top_n, self._distinct[code])]
+            self._top[self.categories[code]] = (pair_keys[top], pair_counts[top])
+
+        all_keys, all_counts = np.unique(keys, return_counts=True)
+        self._total_distinct = len(all_keys)
+        top = np.argsort(-all_counts, kind='stable')[:top_n]
+        self._top['All Types'] = (all_keys[top], all_counts[top])
+
+        self._sketches = None
+        if sketch_precision is not None and years is not None:
+            year_codes, self.years = pd.factorize(np.asarray(years)[valid], sort=True)
+            year_codes[year_codes < 0] = len(self.years)
+            self._year_of = {year: i for i, year in enumerate(self.years)}
+            year_slots = len(self.years) + 1
+            index, rank = _sketch_updates(keys, sketch_precision)
+            group = codes * year_slots + year_codes
+            sketches = np.zeros((num_slots * year_slots, 1 << sketch_precision),
+                                dtype=np.uint8)
+            np.maximum.at(sketches, (group, index), rank)
+            self._sketches = sketches.reshape(num_slots, year_slots, -1)
+
+    def distinct_count(self, category='All Types'):
+        """Exact number of distinct locations for a category"""
+        if category == 'All Types':
+            return self._total_distinct
+        code = self._code_of.get(category)
+        return 0 if code is None else int(self._distinct[code])
+
+    def incident_count(self, category='All Types'):
+        """Number of located incidents for a category"""
+        if category == 'All Types':
+            return int(self._incidents.sum())
+        code = self._code_of.get(category)
+        return 0 if code is None else int(self._incidents[code])
+
+    def top_locations(self, category='All Types'):
+        """Most frequent locations of a category, busiest first"""
+        keys, counts = self._top.get(
+            category, (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)))
+        lat_q, lon_q = unpack_location_keys(keys)
+        return pd.DataFrame({
+            'latitude': lat_q / COORD_SCALE,
+            'longitude': lon_q / COORD_SCALE,
+            'incidents': counts
+        })
+
+    def estimate_distinct(self, categories=None, years=None):
+        """Approximate distinct locations over any categories and years"""
+        if self._sketches is None:
+            raise ValueError("LocationIndex was built without sketches")
+        sketches = self._sketches
+        if categories is not None:
+            sketches = sketches[[self._code_of[c] for c in categories
+                                 if c in self._code_of]]
+        if years is not None:
+            sketches = sketches[:, [self._year_of[y] for y in years
+                                    if y in self._year_of]]
+        if sketches.size == 0:
+            return 0
+        return estimate_distinct(sketches.max(axis=(0, 1)))
+
+
+# Hotspot density raster: cell size, and the share of incidents trimmed from
+# each edge when fitting the grid, so stray geocodes do not stretch it
+DENSITY_CELL_METERS = 40
+DENSITY_TRIM = 0.0005
+METERS_PER_DEGREE = 111_320
+
+
+def density_extent(keys, cell_meters=DENSITY_CELL_METERS, trim=DENSITY_TRIM):
+    """Raster grid covering the located incidents
+
+    Returns (lat0, lon0, lat_step, lon_step, rows, cols) in quantized units;
+    cells are square in meters at the grid's mean latitude.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    lat_q, lon_q = unpack_location_keys(keys[keys != MISSING_LOCATION])
+    if not len(lat_q):
+        return None
+    lat_lo, lat_hi = np.quantile(lat_q, [trim, 1 - trim])
+    lon_lo, lon_hi = np.quantile(lon_q, [trim, 1 - trim])
+
+    lat_step = cell_meters / METERS_PER_DEGREE * COORD_SCALE
+    mean_lat = np.radians((lat_lo + lat_hi) / 2 / COORD_SCALE)
+    lon_step = float(lat_step / np.cos(mean_lat))
+    rows = int((lat_hi - lat_lo) // lat_step) + 1
+    cols = int((lon_hi - lon_lo) // lon_step) + 1
+    return float(lat_lo), float(lon_lo), lat_step, lon_step, rows, cols
+
+
+def bin_locations(keys, extent):
+    """Incident counts per raster cell (rows run south to north), one bincount"""
+    lat0, lon0, lat_step, lon_step, rows, cols = extent
+    keys = np.asarray(keys, dtype=np.int64)
+    lat_q, lon_q = unpack_location_keys(keys[keys != MISSING_LOCATION])
+    row = np.floor((lat_q - lat0) / lat_step).astype(np.int64)
+    col = np.floor((lon_q - lon0) / lon_step).astype(np.int64)
+    inside = (row >= 0) & (row < rows) & (col >= 0) & (col < cols)
+    counts = np.bincount(row[inside] * cols + col[inside], minlength=rows * cols)
+    return counts.reshape(rows, cols).astype(np.float64)
+
+
+def smooth_density(grid, bandwidth_cells):
+    """Gaussian kernel density of a count raster by FFT convolution
+
+    The grid is zero-padded by three bandwidths so mass does not wrap around
+    the edges, and multiplied by the Gaussian's analytic transfer function,
+    so the cost depends only on the grid size, not on the incident count.
+    """
+    rows, cols = grid.shape
+    pad = int(np.ceil(3 * bandwidth_cells))
+    shape = (rows + pad, cols + pad)
+    spectrum = np.fft.rfft2(grid, s=shape)
+    freq_rows = np.fft.fftfreq(shape[0])[:, None]
+    freq_cols = np.fft.rfftfreq(shape[1])[None, :]
+    spectrum *= np.exp(-2 * (np.pi * bandwidth_cells) ** 2 * (freq_rows ** 2 + freq_cols ** 2))
+    smoothed = np.fft.irfft2(spectrum, s=shape)[:rows, :cols]
+    return np.maximum(smoothed, 0)
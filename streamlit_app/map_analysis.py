@@ -1,5 +1,116 @@
+import base64
+import struct
+import zlib
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pydeck as pdk
+from dataset import dataset_version
+from incident_table import create_incident_table
+from locations import (COORD_SCALE, DENSITY_CELL_METERS, LocationIndex, bin_locations,
+                       collapse_locations, density_extent, smooth_density)
+from store import incident_store
+
+# Alpha of a single incident; stacked duplicates used to add up on screen
+POINT_ALPHA = 3
+
+# Kernel bandwidths offered for the hotspot layer, in meters
+DENSITY_BANDWIDTHS = [50, 100, 200, 400, 800]
+
+# Hotspot colors from low to high density; cells under DENSITY_FLOOR of the
+# peak stay transparent so the base map shows through
+DENSITY_COLORS = np.array([[255, 255, 178], [254, 204, 92], [253, 141, 60],
+                           [240, 59, 32], [189, 0, 38]], dtype=np.float64)
+DENSITY_FLOOR = 0.02
+
+
+# Map points carry quantized int32 coordinates, which serialize to shorter
+# JSON than float32 or float64 degrees; the layer scales them back
+POINT_POSITION = f"[lon_q / {COORD_SCALE}, lat_q / {COORD_SCALE}]"
+
+
+@st.cache_data(ttl=3600)  # Cache for 1 hour
+def get_map_points(_df, _mask, version, filter_key):
+    """Project the filtered incidents to unique map points with a weight
+
+    Also returns the size of a deck of the points as pydeck serializes it,
+    which is what Streamlit sends to the browser.
+    """
+    lat_q, lon_q, weights = collapse_locations(_df['location_key'].to_numpy()[_mask])
+
+    # Reproduce the stacking of translucent duplicates with a single point
+    alpha = 255 * (1 - (1 - POINT_ALPHA / 255) ** weights)
+    points = pd.DataFrame({
+        'lat_q': lat_q,
+        'lon_q': lon_q,
+        'weight': weights,
+        'alpha': np.clip(np.rint(alpha), POINT_ALPHA, 255).astype(np.uint8)
+    })
+
+    payload_bytes = len(pdk.Deck(layers=[pdk.Layer("ScatterplotLayer", points)]).to_json())
+    return points, payload_bytes
+
+
+@st.cache_resource(ttl=3600, max_entries=16)
+def get_density_extent(_df, version):
+    """Raster grid over the whole dataset, shared by every filter"""
+    return density_extent(_df['location_key'].to_numpy())
+
+
+@st.cache_resource(ttl=3600, max_entries=64)
+def get_density_grid(_df, _mask, version, filter_key):
+    """Incident counts per raster cell for the filtered rows"""
+    extent = get_density_extent(_df, version)
+    return bin_locations(_df['location_key'].to_numpy()[_mask], extent)
+
+
+def encode_png(rgba):
+    """Encode an RGBA uint8 image (top row first) as PNG bytes"""
+    height, width, _ = rgba.shape
+    # Each scanline starts with filter type 0 (none)
+    scanlines = np.concatenate(
+        [np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, -1)], axis=1)
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data)))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(scanlines.tobytes(), 6)) + chunk(b'IEND', b''))
+
+
+@st.cache_data(ttl=3600, max_entries=64)
+def get_density_image(_df, _mask, version, filter_key, bandwidth):
+    """Smoothed hotspot raster as a PNG data URL, its bounds and peak density"""
+    extent = get_density_extent(_df, version)
+    if extent is None:
+        return None
+    lat0, lon0, lat_step, lon_step, rows, cols = extent
+    density = smooth_density(get_density_grid(_df, _mask, version, filter_key),
+                             bandwidth / DENSITY_CELL_METERS)
+    peak = density.max()
+
+    # Square-root scale keeps secondary hotspots visible next to the peak
+    level = np.sqrt(density / peak) if peak > 0 else np.zeros_like(density)
+    stops = np.linspace(0, 1, len(DENSITY_COLORS))
+    rgba = np.zeros(density.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        rgba[..., channel] = np.interp(level, stops, DENSITY_COLORS[:, channel])
+    rgba[..., 3] = np.where(level >= np.sqrt(DENSITY_FLOOR), 80 + 150 * level, 0)
+
+    # Image rows run north to south, the raster's south to north
+    image = "data:image/png;base64," + base64.b64encode(encode_png(rgba[::-1])).decode()
+    bounds = [lon0 / COORD_SCALE, lat0 / COORD_SCALE,
+              (lon0 + cols * lon_step) / COORD_SCALE, (lat0 + rows * lat_step) / COORD_SCALE]
+    per_km2 = peak / (DENSITY_CELL_METERS / 1000) ** 2
+    return image, bounds, (rows, cols), per_km2
+
+
+@st.cache_resource(ttl=3600, max_entries=16)
+def get_location_index(_df, version):
+    """Location statistics for the dataset, built once per version"""
+    return LocationIndex(_df['incident_category'], _df['location_key'])
 
 
 def create_map_analysis(df):
@@ -14,16 +125,18 @@ def create_map_analysis(df):
         key="map_analysis_radio"
     )
 
-    # Filter data based on selection and cache the result
-    @st.cache_data(ttl=3600)  # Cache for 1 hour
-    def get_filtered_data(df, incident_type):
+    # Filter data based on selection and cache the row mask
+    @st.cache_resource(ttl=3600, max_entries=64)  # Cache for 1 hour
+    def get_filtered_rows(_df, version, incident_type):
+        store = incident_store(_df)
+        mask = ~np.isnan(store.latitude) & ~np.isnan(store.longitude)
         if (incident_type != 'All Types'):
-            filtered_df = df[df['incident_category'] == incident_type].copy()
-        else:
-            filtered_df = df.copy()
-        return filtered_df.dropna(subset=['latitude', 'longitude'])
+            mask = mask & store.mask(category=incident_type)
+        return mask
 
-    map_df = get_filtered_data(df, selected_incident)
+    mask = get_filtered_rows(df, dataset_version(df), selected_incident)
+    location_index = get_location_index(df, dataset_version(df))
+    total_incidents = location_index.incident_count(selected_incident)
 
     # Create container for map with custom styling
     st.markdown("""
@@ -37,30 +150,92 @@ def create_map_analysis(df):
 
     with st.container():
         st.markdown('<div class="big-map">', unsafe_allow_html=True)
-        # Create the map showing all incidents
-        st.map(
-            data=map_df,
-            latitude='latitude',
-            longitude='longitude',
-            size=st.sidebar.slider("Point Size", 1, 30, 5),
-            color=[255, 50, 50, 3],
-            zoom=None,
-            use_container_width=True,
-            height=500
+        view_state = pdk.ViewState(
+            longitude=-122.44,
+            latitude=37.76,
+            zoom=11.5
         )
+
+        map_layer = st.sidebar.radio(
+            "Map Layer", ["Incident Points", "Hotspot Density"], key="map_layer")
+        density = None
+        if map_layer == "Hotspot Density":
+            bandwidth = st.sidebar.select_slider(
+                "Density Bandwidth (m)", DENSITY_BANDWIDTHS, value=200,
+                key="map_density_bandwidth")
+            # Binned once per filter, smoothed once per bandwidth
+            density = get_density_image(
+                df, mask, dataset_version(df), f"map:{selected_incident}", bandwidth)
+
+        if density is not None:
+            image, bounds, (rows, cols), peak = density
+            layer = pdk.Layer(
+                "BitmapLayer",
+                image=image,
+                bounds=bounds,
+                opacity=0.8
+            )
+            st.pydeck_chart(
+                pdk.Deck(
+                    layers=[layer],
+                    initial_view_state=view_state,
+                    map_style=None
+                ),
+                use_container_width=True,
+                height=500
+            )
+            st.caption(
+                f"Hotspot density: {rows:,} x {cols:,} cells of {DENSITY_CELL_METERS} m, "
+                f"{bandwidth} m bandwidth, peak {peak:,.0f} incidents per km²")
+        else:
+            # Create the map from the collapsed points only
+            points, payload_bytes = get_map_points(
+                df, mask, dataset_version(df), f"map:{selected_incident}")
+            point_size = st.sidebar.slider("Point Size", 1, 30, 5)
+
+            layer = pdk.Layer(
+                "ScatterplotLayer",
+                points,
+                get_position=POINT_POSITION,
+                get_radius=point_size,
+                radius_units="meters",
+                radius_min_pixels=3,
+                get_fill_color="[255, 50, 50, alpha]",
+                pickable=True
+            )
+
+            st.pydeck_chart(
+                pdk.Deck(
+                    layers=[layer],
+                    initial_view_state=view_state,
+                    map_style=None,
+                    tooltip={"text": "Incidents: {weight}"}
+                ),
+                use_container_width=True,
+                height=500
+            )
+            st.caption(
+                f"Map payload: {len(points):,} points for {total_incidents:,} incidents "
+                f"({payload_bytes / 1024:,.0f} KB)")
         st.markdown('</div>', unsafe_allow_html=True)
 
-    # Add incident details in an expander with simpler view
+    # Add incident details in an expander, paginated server-side
     with st.expander("View Incident Details", expanded=False):
-        st.info(f"Showing all {len(map_df):,} incidents")
-        st.dataframe(
-            map_df[['incident_category', 'incident_date', 'incident_time']],
-            use_container_width=True,
-            height=400
+        create_incident_table(
+            df,
+            mask,
+            f"map:{selected_incident}",
+            ['incident_category', 'incident_date', 'incident_time'],
+            key="map_details"
         )
 
-    # Calculate metrics - now total_incidents shows all incidents
-    total_incidents = len(map_df)
-    unique_locations = len(map_df.groupby(['latitude', 'longitude']).size())
+    # Locations with the most incidents, from the precomputed index
+    with st.expander("Top Repeat Locations", expanded=False):
+        top_df = location_index.top_locations(selected_incident)
+        top_df.columns = ['Latitude', 'Longitude', 'Incidents']
+        st.dataframe(top_df, use_container_width=True, hide_index=True)
+
+    # Calculate metrics - lookups in the location index
+    unique_locations = location_index.distinct_count(selected_incident)
 
     return total_incidents, unique_locations, selected_incident
@@ -1,9 +1,23 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
+from time_series import create_series_analysis
+from view_model import cached_chart, count_intervals, value_counts
+from forecast_analysis import forecast_layers, get_period_forecast, select_forecast
+from comparison_analysis import (create_comparison_chart, describe_comparison,
+                                 get_comparison_data, select_comparison, summarize_comparison)
 
 
 def create_parallel_time_analysis(df):
+    # Compare several categories' yearly series instead of one incident type
+    compared = select_comparison(df, "parallel_analysis")
+    if compared is not None:
+        data = get_comparison_data(df, 'year', compared)
+        chart = cached_chart('parallel_compare', compared, df, lambda: create_comparison_chart(
+            data, 'year', 'Year', 'Time Series View - Category Comparison'))
+        total, avg, peak_year, _ = summarize_comparison(data, 'year')
+        return chart, total, avg, peak_year, describe_comparison(compared), "Peak Year"
+
     # Add incident type selector
     incident_options = ['All Types', 'Larceny Theft', 'Motor Vehicle Theft',
                         'Assault', 'Burglary', 'Robbery']
@@ -13,82 +27,109 @@ def create_parallel_time_analysis(df):
         key="parallel_analysis_radio"
     )
 
-    # Filter data based on selection
-    if selected_incident != 'All Types':
-        df = df[df['incident_category'] == selected_incident]
+    # Add time granularity selector; fine granularities come from the
+    # cached daily counts
+    time_granularity = st.sidebar.radio(
+        "Select Time Granularity for Parallel Analysis",
+        ["Yearly", "Weekly", "Daily"],
+        key="parallel_granularity"
+    )
+    if time_granularity != "Yearly":
+        chart, total, avg, peak_period, incident_type, peak_metric_title = create_series_analysis(
+            df, selected_incident, time_granularity, key="parallel_series")
+        return chart, total, avg, peak_period, incident_type, peak_metric_title
+
+    # Forecast the coming weeks on top of the yearly totals
+    horizon = select_forecast("parallel_analysis")
 
     # Create yearly aggregation
-    yearly_data = df.groupby('incident_year').size().reset_index(name='count')
+    yearly_data = value_counts(df, 'incident_year', selected_incident).sort_index()
+    estimated = count_intervals(df, 'incident_year', selected_incident) is not None
+    yearly_data = yearly_data.rename_axis('incident_year').reset_index(name='count')
     avg_count = yearly_data['count'].mean()
+    forecast_data = get_period_forecast(
+        df, selected_incident, horizon, 'year', yearly_data, 'incident_year')
 
-    # Create vertical rules for each year
-    year_rules = alt.Chart(yearly_data).mark_rule(
-        strokeDash=[2, 2],
-        color='gray',
-        opacity=0.5
-    ).encode(
-        x='incident_year:O'
-    )
+    def build_chart():
+        # Create vertical rules for each year
+        year_rules = alt.Chart(yearly_data).mark_rule(
+            strokeDash=[2, 2],
+            color='gray',
+            opacity=0.5
+        ).encode(
+            x='incident_year:O'
+        )
 
-    # Create a single chart instead of multiple segments
-    base = alt.Chart(yearly_data).encode(
-        x=alt.X('incident_year:O',
-                axis=alt.Axis(title='Year', labelAngle=0)),
-        y=alt.Y('count:Q',
-                axis=alt.Axis(title='Number of Incidents'),
-                scale=alt.Scale(domain=[0, yearly_data['count'].max() * 1.1]))
-    )
+        # Create a single chart instead of multiple segments
+        base = alt.Chart(yearly_data).encode(
+            x=alt.X('incident_year:O',
+                    axis=alt.Axis(title='Year', labelAngle=0)),
+            y=alt.Y('count:Q',
+                    axis=alt.Axis(title='Number of Incidents'),
+                    scale=alt.Scale(domain=[0, max(
+                        yearly_data['count'].max(),
+                        0 if forecast_data is None else forecast_data['high'].max()) * 1.1]))
+        )
 
-    # Create connected line
-    line = base.mark_line(
-        color='green',
-        strokeWidth=2,
-        point=True  # Add points at each year
-    ).encode(
-        tooltip=[
-            alt.Tooltip('incident_year:O', title='Year'),
-            alt.Tooltip('count:Q', title='Incidents', format=',d')
-        ]
-    )
+        # Create connected line
+        line = base.mark_line(
+            color='green',
+            strokeWidth=2,
+            point=True  # Add points at each year
+        ).encode(
+            tooltip=[
+                alt.Tooltip('incident_year:O', title='Year'),
+                alt.Tooltip('count:Q', title='Incidents', format=',d')
+            ]
+        )
 
-    # Add points for emphasis
-    points = base.mark_circle(
-        color='green',
-        size=100
-    )
+        # Add points for emphasis
+        points = base.mark_circle(
+            color='green',
+            size=100
+        )
 
-    # Update text color to white
-    text = base.mark_text(
-        align='center',
-        baseline='bottom',
-        dy=-10,
-        fontSize=12,
-        color='white'
-    ).encode(
-        text=alt.Text('count:Q', format=',d')
-    )
+        # Update text color to white
+        text = base.mark_text(
+            align='center',
+            baseline='bottom',
+            dy=-10,
+            fontSize=12,
+            color='white'
+        ).encode(
+            text=alt.Text('count:Q', format=',d')
+        )
 
-    # Add average line
-    avg_line = alt.Chart(pd.DataFrame({
-        'y': [avg_count]
-    })).mark_rule(
-        color='red',
-        strokeDash=[5, 5],
-        strokeWidth=2
-    ).encode(
-        y='y',
-        tooltip=[alt.Tooltip('y', title='Average', format=',d')]
-    )
+        # Add average line
+        avg_line = alt.Chart(pd.DataFrame({
+            'y': [avg_count]
+        })).mark_rule(
+            color='red',
+            strokeDash=[5, 5],
+            strokeWidth=2
+        ).encode(
+            y='y',
+            tooltip=[alt.Tooltip('y', title='Average', format=',d')]
+        )
 
-    # Combine all elements
-    parallel_chart = (year_rules + line + points + text + avg_line).properties(
-        title=f'Time Series View - {selected_incident}',
-        width='container',
-        height=500
-    )
+        # Combine all elements
+        layers = year_rules + line + points + text + avg_line
+        if forecast_data is not None:
+            layers += forecast_layers(forecast_data, 'incident_year', 'Year', style='line')
+        parallel_chart = layers.properties(
+            title=f'Time Series View - {selected_incident}',
+            width='container',
+            height=500
+        )
+
+        return parallel_chart
+
+    parallel_chart = cached_chart(
+        'parallel_time', [selected_incident, estimated, horizon], df, build_chart)
 
     return (parallel_chart,
             yearly_data['count'].sum(),
             avg_count,
             yearly_data.loc[yearly_data['count'].idxmax(), 'incident_year'],
-            selected_incident)
+            selected_incident,
+            "Peak Year")
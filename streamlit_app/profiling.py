@@ -0,0 +1,186 @@
+"""Single-pass data profile of an incident export
+
+Reads the CSV once in chunks and keeps, per column, the null count, a
+HyperLogLog distinct-count sketch, min/max and a bounded top-values
+summary, plus null rates per incident year. Memory stays flat however
+large the export is. Use it from the notebook:
+
+    from profiling import profile_csv, write_profile
+    profile = profile_csv('incident_reports.csv')
+
+or from the command line:
+
+    python profiling.py incident_reports.csv --out data_profile.json
+    python profiling.py exports/*.csv  # Per-year shards as one dataset
+
+The app's Data Quality view shows the same profile.
+"""
+import argparse
+import json
+import numbers
+import os
+
+import numpy as np
+import pandas as pd
+
+from locations import SKETCH_PRECISION, estimate_distinct, location_sketch
+
+PROFILE_CHUNK_ROWS = 200_000
+
+# Values tracked per column for the top-values summary; counts of values
+# that were never dropped are exact
+TOP_CAPACITY = 64
+TOP_VALUES = 5
+
+YEAR_COLUMN = 'incident_year'
+
+
+def _merge_top(top, counts, capacity=TOP_CAPACITY):
+    """Merge chunk value counts into a bounded Misra-Gries summary
+
+    When the merged summary outgrows its capacity, the (capacity + 1)-th
+    largest count is subtracted from every entry and non-positive entries
+    are dropped, so each value's count is underestimated by at most
+    rows / capacity.
+    """
+    for value, count in counts.items():
+        top[value] = top.get(value, 0) + int(count)
+    if len(top) > capacity:
+        cut = sorted(top.values(), reverse=True)[capacity]
+        top = {value: count - cut for value, count in top.items() if count > cut}
+    return top
+
+
+def _json_value(value):
+    """Plain Python value for the JSON profile"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _is_number(value):
+    """Whether a min/max value compares numerically (bools do not)"""
+    return isinstance(value, numbers.Real) and not isinstance(value, (bool, np.bool_))
+
+
+class ColumnProfile:
+    """Running statistics of one column, updated chunk by chunk"""
+
+    def __init__(self, name):
+        self.name = name
+        self.dtype = None
+        self.count = 0
+        self.nulls = 0
+        self.minimum = None
+        self.maximum = None
+        self.sketch = np.zeros(1 << SKETCH_PRECISION, dtype=np.uint8)
+        self.top = {}
+
+    def update(self, values):
+        if self.dtype is None:
+            self.dtype = str(values.dtype)
+        present = values.dropna()
+        self.count += len(values)
+        self.nulls += len(values) - len(present)
+        if present.empty:
+            return
+
+        # Strings compare lexicographically, which also orders ISO-like dates
+        if not pd.api.types.is_numeric_dtype(present):
+            present = present.astype(str)
+        low, high = present.min(), present.max()
+        if self.minimum is not None and type(low) is not type(self.minimum):
+            if _is_number(low) and _is_number(self.minimum):
+                # An integer column parses as float in chunks that hold nulls
+                low, high = float(low), float(high)
+                self.minimum, self.maximum = float(self.minimum), float(self.maximum)
+            else:
+                # Chunks parsed to different types: fall back to comparing text
+                low, high = str(low), str(high)
+                self.minimum, self.maximum = str(self.minimum), str(self.maximum)
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+
+        # Hash values to 64-bit keys for the shared HyperLogLog registers
+        hashes = pd.util.hash_array(present.to_numpy()).view(np.int64)
+        np.maximum(self.sketch, location_sketch(hashes), out=self.sketch)
+        self.top = _merge_top(self.top, present.value_counts(sort=False))
+
+    def to_dict(self):
+        top = sorted(self.top.items(), key=lambda item: item[1], reverse=True)[:TOP_VALUES]
+        return {
+            'dtype': self.dtype,
+            'count': self.count,
+            'nulls': self.nulls,
+            'null_rate': self.nulls / self.count if self.count else 0.0,
+            'distinct_estimate': estimate_distinct(self.sketch),
+            'min': _json_value(self.minimum),
+            'max': _json_value(self.maximum),
+            'top_values': [[_json_value(value), count] for value, count in top]
+        }
+
+
+def profile_chunks(chunks, source=None):
+    """Profile an iterable of DataFrame chunks in a single pass"""
+    columns = {}
+    year_rows = {}
+    year_nulls = {}
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        for name in chunk.columns:
+            columns.setdefault(name, ColumnProfile(name)).update(chunk[name])
+
+        # Null counts per year from one groupby over the chunk's null mask
+        if YEAR_COLUMN in chunk:
+            nulls = chunk.isna().groupby(chunk[YEAR_COLUMN]).sum()
+            sizes = chunk.groupby(YEAR_COLUMN).size()
+            for year, size in sizes.items():
+                key = str(_json_value(year))
+                year_rows[key] = year_rows.get(key, 0) + int(size)
+                year_nulls[key] = year_nulls.get(key, 0) + nulls.loc[year]
+
+    return {
+        'source': source,
+        'rows': rows,
+        'columns': {name: column.to_dict() for name, column in columns.items()},
+        'null_rates_by_year': {
+            year: {name: float(count) / year_rows[year]
+                   for name, count in year_nulls[year].items()}
+            for year in sorted(year_rows)
+        }
+    }
+
+
+def profile_csv(paths, chunksize=PROFILE_CHUNK_ROWS):
+    """Profile a CSV file, or several shards as one dataset, streaming each
+    once in chunks"""
+    paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+    chunks = (chunk for path in paths
+              for chunk in pd.read_csv(path, chunksize=chunksize))
+    return profile_chunks(chunks, source=', '.join(str(path) for path in paths))
+
+
+def write_profile(profile, path):
+    """Write a profile as compact JSON"""
+    with open(path, 'w') as f:
+        json.dump(profile, f, separators=(',', ':'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('data', nargs='+', help="CSV file, or shards of one dataset, to profile")
+    parser.add_argument('--out', default='data_profile.json', help="JSON profile to write")
+    parser.add_argument('--chunksize', type=int, default=PROFILE_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    profile = profile_csv(args.data, args.chunksize)
+    write_profile(profile, args.out)
+    print(f"Profiled {profile['rows']:,} rows x {len(profile['columns'])} columns "
+          f"of {profile['source']} into {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import numpy as np
+
+# Mergeable quantile sketches over non-negative values (report lags in
+# minutes). Values fall into logarithmic buckets whose bounds grow by GAMMA,
+# so any quantile is answered within QUANTILE_ACCURACY relative error. A
+# sketch is just an array of bucket counts: building one is a bincount,
+# merging (categories, districts, new batches) is an addition, and neither
+# ever sorts the values.
+
+QUANTILE_ACCURACY = 0.01
+GAMMA = (1 + QUANTILE_ACCURACY) / (1 - QUANTILE_ACCURACY)
+
+# Bucket 0 holds zeros; the last bucket covers values up to about 20 years
+# of minutes and absorbs anything larger
+MAX_VALUE = 20 * 366 * 24 * 60
+NUM_BUCKETS = int(np.ceil(np.log(MAX_VALUE) / np.log(GAMMA))) + 2
+
+
+def sketch_buckets(values):
+    """Bucket index of each non-negative value"""
+    values = np.asarray(values, dtype=np.float64)
+    positive = values > 0
+    index = np.ceil(np.log(np.where(positive, values, 1)) / np.log(GAMMA)).astype(np.int64) + 1
+    return np.where(positive, np.clip(index, 1, NUM_BUCKETS - 1), 0)
+
+
+def build_sketches(groups, values, num_groups):
+    """One sketch per group code (a num_groups x NUM_BUCKETS count array)"""
+    cells = np.asarray(groups, dtype=np.int64) * NUM_BUCKETS + sketch_buckets(values)
+    counts = np.bincount(cells, minlength=num_groups * NUM_BUCKETS)
+    return counts.reshape(num_groups, NUM_BUCKETS)
+
+
+def update_sketch(sketch, values):
+    """Add a batch of values to a single sketch in place"""
+    sketch += np.bincount(sketch_buckets(values), minlength=NUM_BUCKETS)
+    return sketch
+
+
+def bucket_values(index=None):
+    """Representative value of each bucket (or of the given bucket indices)
+
+    The midpoint 2 * GAMMA**i / (GAMMA + 1) is within QUANTILE_ACCURACY of
+    every value in bucket i.
+    """
+    index = np.arange(NUM_BUCKETS) if index is None else np.asarray(index)
+    return np.where(index > 0, 2 * GAMMA ** (index - 1) / (GAMMA + 1), 0.0)
+
+
+def sketch_quantiles(sketches, quantiles):
+    """Quantiles of sketches along their last axis, for many sketches at once
+
+    Returns an array of shape sketches.shape[:-1] + (len(quantiles),); NaN
+    for empty sketches.
+    """
+    sketches = np.asarray(sketches)
+    cumulative = np.cumsum(sketches, axis=-1)
+    total = cumulative[..., -1:]
+    ranks = np.asarray(quantiles, dtype=np.float64) * np.maximum(total - 1, 0)
+    # First bucket whose running count passes each rank
+    index = (cumulative[..., None, :] > ranks[..., :, None]).argmax(axis=-1)
+    return np.where(total > 0, bucket_values(index), np.nan)
@@ -0,0 +1,140 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import altair as alt
+from dataset import dataset_version
+from quantiles import bucket_values, build_sketches, sketch_quantiles
+from store import MISSING_MINUTE, incident_store
+from view_model import cached_chart
+
+LAG_QUANTILES = [0.5, 0.9, 0.99]
+LAG_LABELS = ['P50', 'P90', 'P99']
+
+
+@st.cache_resource(ttl=3600, max_entries=16)  # Cache for 1 hour
+def get_lag_sketches(_df, version):
+    """Report-lag sketches for every category x district, with totals
+
+    Returns a (categories + 1) x (districts + 1) x buckets count cube whose
+    last row and column are 'All Types' and 'All Districts', and the labels
+    of both axes. Lags are report minus incident time in minutes; records
+    reported before the incident are left out as data errors.
+    """
+    store = incident_store(_df)
+    incident = store.minute.astype(np.int64)
+    report = _df['report_minute'].to_numpy().astype(np.int64)
+    valid = (incident != MISSING_MINUTE) & (report != MISSING_MINUTE) & (report >= incident)
+
+    category_codes, categories = store.factorize('category')
+    district_codes, districts = store.factorize('district')
+    valid = valid & (category_codes >= 0) & (district_codes >= 0)
+    groups = category_codes[valid] * len(districts) + district_codes[valid]
+    sketches = build_sketches(groups, report[valid] - incident[valid],
+                              len(categories) * len(districts))
+
+    # Merging sketches is addition, so the totals are sums over an axis
+    cube = sketches.reshape(len(categories), len(districts), -1)
+    cube = np.concatenate([cube, cube.sum(axis=0, keepdims=True)], axis=0)
+    cube = np.concatenate([cube, cube.sum(axis=1, keepdims=True)], axis=1)
+    return cube, list(categories) + ['All Types'], list(districts) + ['All Districts']
+
+
+def format_lag(minutes):
+    """Lag in the largest sensible unit"""
+    if np.isnan(minutes):
+        return '-'
+    if minutes < 60:
+        return f"{minutes:.0f} min"
+    if minutes < 48 * 60:
+        return f"{minutes / 60:.1f} h"
+    return f"{minutes / (24 * 60):.1f} days"
+
+
+def create_report_lag_analysis(df):
+    """Distribution of the time from incident to report, by category or district"""
+    if 'report_minute' not in df:
+        st.info("This dataset has no report_datetime column to measure report lags")
+        return None, np.full(len(LAG_QUANTILES), np.nan), 0, 'All Types'
+
+    cube, categories, districts = get_lag_sketches(df, dataset_version(df))
+
+    # Busiest categories first, like the other category selectors
+    category_totals = cube[:-1, -1].sum(axis=1)
+    by_volume = [categories[i] for i in np.argsort(-category_totals, kind='stable')]
+    selected_incident = st.sidebar.selectbox(
+        "Select Incident Type for Report Lag", ['All Types'] + by_volume, key="lag_incident")
+    selected_district = st.sidebar.selectbox(
+        "Select Police District for Report Lag", ['All Districts'] + districts[:-1],
+        key="lag_district")
+    group_by = st.sidebar.radio(
+        "Compare Report Lag By", ["Category", "District"], key="lag_group_by")
+
+    category = categories.index(selected_incident)
+    district = districts.index(selected_district)
+    selected = cube[category, district]
+    lags = sketch_quantiles(selected, LAG_QUANTILES)
+
+    # Quantiles of every group at once from the cube, in hours
+    if group_by == "Category":
+        group_sketches, labels = cube[:-1, district], categories[:-1]
+    else:
+        group_sketches, labels = cube[category, :-1], districts[:-1]
+    counts = group_sketches.sum(axis=1)
+    # Zero lags are drawn at one minute to stay on the log scale
+    quantiles = np.maximum(sketch_quantiles(group_sketches[counts > 0], LAG_QUANTILES) / 60,
+                           1 / 60)
+    labels = [label for label, count in zip(labels, counts) if count > 0]
+
+    def build_chart():
+        # Share of reports per lag bucket for the selection, on a log scale
+        nonzero = np.flatnonzero(selected)
+        distribution = pd.DataFrame({
+            'lag_hours': np.maximum(bucket_values(nonzero) / 60, 1 / 60),
+            'share': selected[nonzero] / max(selected.sum(), 1)
+        })
+        histogram = alt.Chart(distribution).mark_area(
+            color='#2196F3', opacity=0.6, interpolate='step-after'
+        ).encode(
+            x=alt.X('lag_hours:Q', title='Report Lag (hours)',
+                    scale=alt.Scale(type='log')),
+            y=alt.Y('share:Q', title='Share of Reports', axis=alt.Axis(format='%')),
+            tooltip=[alt.Tooltip('lag_hours:Q', title='Lag (hours)', format=',.2f'),
+                     alt.Tooltip('share:Q', title='Share', format='.2%')]
+        ).properties(
+            title=f'Report Lag Distribution - {selected_incident}, {selected_district}',
+            width='container',
+            height=250
+        )
+
+        # P50 to P99 range per group, busiest-lag groups on top
+        group_df = pd.DataFrame(quantiles, columns=LAG_LABELS)
+        group_df['group'] = labels
+        order = group_df.sort_values('P90', ascending=False)['group'].tolist()
+        long_df = group_df.melt('group', var_name='quantile', value_name='hours')
+        base = alt.Chart(group_df).encode(
+            y=alt.Y('group:N', title=group_by, sort=order))
+        span = base.mark_rule(color='gray', strokeWidth=2).encode(
+            x=alt.X('P50:Q', title='Report Lag (hours)', scale=alt.Scale(type='log')),
+            x2='P99:Q')
+        marks = alt.Chart(long_df).mark_point(filled=True, size=80).encode(
+            x='hours:Q',
+            y=alt.Y('group:N', sort=order),
+            color=alt.Color('quantile:N', title='Quantile',
+                            scale=alt.Scale(domain=LAG_LABELS,
+                                            range=['#2196F3', '#FF9800', '#F44336'])),
+            tooltip=[alt.Tooltip('group:N', title=group_by),
+                     alt.Tooltip('quantile:N', title='Quantile'),
+                     alt.Tooltip('hours:Q', title='Lag (hours)', format=',.1f')]
+        )
+        quantile_chart = (span + marks).properties(
+            title=f'Report Lag Quantiles by {group_by}',
+            width='container',
+            height=max(250, 22 * len(labels))
+        )
+
+        return alt.vconcat(histogram, quantile_chart)
+
+    chart = cached_chart(
+        'report_lag', [selected_incident, selected_district, group_by], df, build_chart)
+
+    return chart, lags, int(selected.sum()), selected_incident
@@ -0,0 +1,104 @@
+import streamlit as st
+import pandas as pd
+import altair as alt
+from aggregates import build_resolution_counts, clearance_table
+from dataset import dataset_version
+from view_model import cached_chart
+
+GROUP_DIMENSIONS = {'District': 'district', 'Category': 'category', 'Year': 'year'}
+
+
+@st.cache_resource(ttl=3600, max_entries=16)  # Cache for 1 hour
+def get_resolution_counts(_df, version):
+    """Category x district x year x resolution cube, once per dataset version"""
+    return build_resolution_counts(_df)
+
+
+def create_resolution_analysis(df):
+    """Clearance rate by district, category or year for any filter combination"""
+    resolution_counts = get_resolution_counts(df, dataset_version(df))
+    _, categories, districts, years, _ = resolution_counts
+
+    group_label = st.sidebar.radio(
+        "Compare Clearance By", list(GROUP_DIMENSIONS), key="clearance_group_by")
+    group_by = GROUP_DIMENSIONS[group_label]
+
+    # Filters on the dimensions not being compared
+    selected_incident, selected_district, selected_year = 'All Types', 'All Districts', 'All Years'
+    if group_by != 'category':
+        selected_incident = st.sidebar.selectbox(
+            "Select Incident Type for Clearance", ['All Types'] + categories,
+            key="clearance_incident")
+    if group_by != 'district':
+        selected_district = st.sidebar.selectbox(
+            "Select Police District for Clearance", ['All Districts'] + districts,
+            key="clearance_district")
+    if group_by != 'year':
+        selected_year = st.sidebar.selectbox(
+            "Select Year for Clearance", ['All Years'] + years, key="clearance_year")
+
+    # A slice of the cached cube; no strings are grouped here
+    table = clearance_table(resolution_counts, group_by, selected_incident,
+                            selected_district, selected_year)
+    table = table[table['total'] > 0]
+    total, cleared = int(table['total'].sum()), int(table['cleared'].sum())
+    overall_rate = cleared / total if total else 0
+
+    def build_chart():
+        chart_df = table.assign(label=table[group_by].astype(str))
+        sort = None if group_by == 'year' else alt.EncodingSortField('rate', order='descending')
+        base = alt.Chart(chart_df).encode(
+            x=alt.X('label:N',
+                    title=group_label,
+                    sort=sort,
+                    axis=alt.Axis(labelAngle=-45)),
+            y=alt.Y('rate:Q',
+                    title='Clearance Rate',
+                    axis=alt.Axis(format='%')),
+            tooltip=[
+                alt.Tooltip('label:N', title=group_label),
+                alt.Tooltip('rate:Q', title='Clearance Rate', format='.1%'),
+                alt.Tooltip('cleared:Q', title='Cleared', format=',d'),
+                alt.Tooltip('open:Q', title='Open or Active', format=',d'),
+                alt.Tooltip('total:Q', title='Incidents', format=',d')
+            ]
+        )
+
+        # Create bars
+        bars = base.mark_bar(color='#4CAF50', opacity=0.8)
+
+        # Add value labels
+        text = base.mark_text(
+            align='center',
+            baseline='bottom',
+            dy=-5,
+            fontSize=12
+        ).encode(
+            text=alt.Text('rate:Q', format='.0%')
+        )
+
+        # Add overall rate line
+        avg_rule = alt.Chart(pd.DataFrame({'y': [overall_rate]})).mark_rule(
+            strokeDash=[5, 5],
+            color='red',
+            strokeWidth=2
+        ).encode(
+            y='y',
+            tooltip=[alt.Tooltip('y', title='Overall Rate', format='.1%')]
+        )
+
+        return (bars + text + avg_rule).properties(
+            title=f'Clearance Rate by {group_label}',
+            width='container',
+            height=500
+        )
+
+    chart = cached_chart(
+        'clearance', [group_by, selected_incident, selected_district, selected_year],
+        df, build_chart)
+
+    if table.empty:
+        best = '-'
+    else:
+        best = str(table.loc[table['rate'].idxmax(), group_by])
+    return chart, overall_rate, cleared, total, best, group_label
@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+
+# Compact struct-of-arrays store of the prepared incidents for the hot
+# aggregation paths. Each field is one flat NumPy array: times as int32
+# minutes since the epoch, coordinates as float32 and every labelled field
+# as small unsigned codes into a sorted label list. Code len(labels) marks
+# a missing label, the trailing slot the count tables already use. Scans
+# and bincounts over these arrays touch a few bytes per incident instead
+# of the frame's string objects. The store is the only copy of the times
+# and coordinates: the prepared frame drops those columns and keeps its
+# labelled columns as Categoricals over the store's labels.
+
+# Weekday order used across the app; weekday codes index into this list
+WEEKDAYS = ['Sunday', 'Monday', 'Tuesday',
+            'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+# Labelled fields of the store and the prepared-frame columns they code
+CODED_COLUMNS = {
+    'category': 'incident_category',
+    'district': 'police_district',
+    'neighborhood': 'analysis_neighborhood',
+    'resolution': 'resolution',
+    'year': 'incident_year',
+    'weekday': 'weekday_code',
+    'hour': 'incident_hour'
+}
+
+# Frame columns that can be counted straight from the store
+COUNTED_COLUMNS = {
+    'incident_category': 'category',
+    'police_district': 'district',
+    'analysis_neighborhood': 'neighborhood',
+    'resolution': 'resolution',
+    'incident_year': 'year',
+    'incident_day_of_week': 'weekday'
+}
+
+MINUTES_PER_DAY = 24 * 60
+MISSING_MINUTE = np.iinfo(np.int32).min
+
+
+def code_dtype(num_labels):
+    """Smallest unsigned type holding codes 0..num_labels (the missing slot)"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if num_labels <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def _frozen(array):
+    array.flags.writeable = False
+    return array
+
+
+def _coded(codes, num_labels):
+    """Codes with the missing slot for negative or out-of-range entries"""
+    codes = np.asarray(codes)
+    missing = (codes < 0) | (codes >= num_labels)
+    return _frozen(np.where(missing, num_labels, codes).astype(code_dtype(num_labels)))
+
+
+def _sorted_labels(codes, labels):
+    """Codes and labels reordered so the labels are sorted"""
+    order = np.argsort(np.asarray(labels, dtype=object), kind='stable')
+    rank = np.empty(len(labels) + 1, dtype=np.int64)
+    rank[order] = np.arange(len(labels))
+    rank[-1] = len(labels)
+    return rank[_coded(codes, len(labels))], [labels[i] for i in order]
+
+
+class IncidentRow:
+    """One incident read back from the store, for rare per-record access"""
+
+    __slots__ = ('minute', 'category', 'district', 'neighborhood', 'resolution',
+                 'year', 'weekday', 'hour', 'latitude', 'longitude')
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields[name])
+
+    @property
+    def timestamp(self):
+        if self.minute == MISSING_MINUTE:
+            return None
+        return pd.Timestamp(int(self.minute), unit='m')
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"IncidentRow({fields})"
+
+
+class IncidentStore:
+    """Incidents as parallel NumPy arrays, in the prepared frame's row order
+
+    The arrays are read-only and shared between a store and its slices.
+    """
+
+    __slots__ = ('minute', 'latitude', 'longitude', 'codes', 'labels')
+
+    def __init__(self, minute, latitude, longitude, codes, labels):
+        self.minute = minute
+        self.latitude = latitude
+        self.longitude = longitude
+        self.codes = codes
+        self.labels = labels
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the store from a frame with derived columns (see finish_dataset)"""
+        minutes = df['incident_minute'].to_numpy()
+        valid = minutes != np.iinfo(np.int64).min
+        minute = np.where(valid, minutes, MISSING_MINUTE).astype(np.int32)
+
+        codes, labels = {}, {}
+        for field, column in CODED_COLUMNS.items():
+            if field == 'weekday':
+                field_codes, field_labels = df[column].to_numpy(), list(WEEKDAYS)
+            elif field == 'hour':
+                field_codes, field_labels = df[column].to_numpy(), list(range(24))
+            else:
+                field_codes, field_labels = pd.factorize(df[column], sort=True)
+                field_labels = [label.item() if hasattr(label, 'item') else label
+                                for label in field_labels]
+            codes[field] = _coded(field_codes, len(field_labels))
+            labels[field] = field_labels
+
+        return cls(_frozen(minute),
+                   _frozen(df['latitude'].to_numpy(dtype=np.float32)),
+                   _frozen(df['longitude'].to_numpy(dtype=np.float32)),
+                   codes, labels)
+
+    def __len__(self):
+        return len(self.minute)
+
+    @property
+    def nbytes(self):
+        arrays = [self.minute, self.latitude, self.longitude, *self.codes.values()]
+        return sum(array.nbytes for array in arrays)
+
+    def days(self):
+        """Epoch day of each incident, -1 when the date is unknown"""
+        return np.where(self.minute == MISSING_MINUTE, -1,
+                        self.minute // MINUTES_PER_DAY).astype(np.int32)
+
+    def slice(self, start, stop):
+        """Zero-copy store of rows start:stop, sharing the label lists"""
+        codes = {field: array[start:stop] for field, array in self.codes.items()}
+        return IncidentStore(self.minute[start:stop], self.latitude[start:stop],
+                             self.longitude[start:stop], codes, self.labels)
+
+    def with_labels(self, field, codes, labels):
+        """Store with one labelled field recoded, e.g. districts as zones
+
+        Codes outside 0..len(labels) - 1 mark a missing label.
+        """
+        codes, labels = _sorted_labels(codes, list(labels))
+        return IncidentStore(self.minute, self.latitude, self.longitude,
+                             dict(self.codes, **{field: _coded(codes, len(labels))}),
+                             dict(self.labels, **{field: labels}))
+
+    def mask(self, **selections):
+        """Rows matching one label per field, e.g. mask(category='Robbery')
+
+        A label the store has never seen matches no rows; an empty
+        selection matches every row.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for field, label in selections.items():
+            labels = self.labels[field]
+            if label not in labels:
+                return np.zeros(len(self), dtype=bool)
+            mask = mask & (self.codes[field] == labels.index(label))
+        return mask
+
+    def count(self, *fields, mask=None):
+        """Incidents per combination of labels, one bincount over the codes
+
+        Returns an array with one axis per field, each len(labels) + 1 long
+        so the last slot counts incidents missing that label.
+        """
+        shape = tuple(len(self.labels[field]) + 1 for field in fields)
+        codes = [self.codes[field] for field in fields]
+        if mask is not None:
+            codes = [field_codes[mask] for field_codes in codes]
+        cells = np.ravel_multi_index(codes, shape) if codes else np.zeros(0, dtype=np.intp)
+        return np.bincount(cells, minlength=int(np.prod(shape))).reshape(shape)
+
+    def factorize(self, field, mask=None):
+        """Codes and labels of the labels present, like pd.factorize(sort=True)
+
+        Missing labels get code -1. Works on the stored codes, so no strings
+        are hashed.
+        """
+        codes = self.codes[field] if mask is None else self.codes[field][mask]
+        labels = self.labels[field]
+        present = np.bincount(codes, minlength=len(labels) + 1)[:-1] > 0
+        lookup = np.full(len(labels) + 1, -1, dtype=np.intp)
+        lookup[np.flatnonzero(present)] = np.arange(np.count_nonzero(present))
+        return lookup[codes], [labels[i] for i in np.flatnonzero(present)]
+
+    def categorical(self, field):
+        """A labelled field as a pandas Categorical over the store's labels"""
+        labels = self.labels[field]
+        codes = self.codes[field].astype(np.int32)
+        codes[codes == len(labels)] = -1
+        return pd.Categorical.from_codes(codes, categories=labels)
+
+    def row(self, index):
+        """Decoded view of one incident"""
+        decoded = {}
+        for field, codes in self.codes.items():
+            code, labels = codes[index], self.labels[field]
+            decoded[field] = labels[code] if code < len(labels) else None
+        return IncidentRow(minute=int(self.minute[index]),
+                           latitude=float(self.latitude[index]),
+                           longitude=float(self.longitude[index]), **decoded)
+
+
+def attach_store(df, store):
+    """Attach the store of a prepared, sliced or zoned frame to that frame
+
+    The store is held on the frame object itself rather than in its attrs,
+    which pandas would copy into every derived frame and st.dataframe would
+    try to serialize. Copies and filtered frames therefore have no store
+    and must be made with filter_date_range or with_zones instead.
+    """
+    if len(store) != len(df):
+        raise ValueError(f"Store of {len(store):,} incidents does not match "
+                         f"a frame of {len(df):,} rows")
+    object.__setattr__(df, '_incident_store', store)
+    return df
+
+
+def incident_store(df):
+    """The compact store attached to a frame (see attach_store)
+
+    Raises ValueError for frames without one: their times, coordinates and
+    label codes live only in the store, so it cannot be rebuilt from them.
+    """
+    store = getattr(df, '_incident_store', None)
+    if store is None:
+        raise ValueError("Frame has no incident store; derive it from a prepared "
+                         "frame with filter_date_range or with_zones")
+    return store
@@ -3,214 +3,534 @@ import pandas as pd
 import altair as alt
 import os
 import plotly.graph_objects as go
+from datetime import date, timedelta
 from time_analysis import create_time_analysis
 from parallel_time_analysis import create_parallel_time_analysis
-from day_of_week_analysis import create_day_of_week_analysis, create_day_of_week_bar_analysis
+from day_of_week_analysis import create_day_of_week_analysis
 from week_bar_analysis import create_week_bar_analysis
-from larceny_time_analysis import create_larceny_analysis
-from larceny_analysis import create_larceny_analysis
-from larceny_pie_analysis import create_larceny_pie_analysis
+from time_of_day_analysis import create_time_of_day_analysis, create_day_night_analysis
 from map_analysis import create_map_analysis
 from district_map_analysis import create_district_map_analysis
+from hour_weekday_analysis import create_hour_weekday_analysis
+from anomaly_analysis import create_anomaly_analysis
+from forecast_analysis import create_forecast_analysis
+from cluster_analysis import create_cluster_analysis
+from report_lag_analysis import create_report_lag_analysis, format_lag
+from resolution_analysis import create_resolution_analysis
+from data_quality_analysis import create_data_quality_analysis
+from comparison_analysis import (create_comparison_chart, describe_comparison,
+                                 get_comparison_data, select_comparison, summarize_comparison)
+from view_model import (ViewResult, cached_chart, count_intervals, error_bars, render_view,
+                        select_approximate_mode, value_counts, watch_refinements, with_intervals)
+from dataset import (DATA_FILE, QUARANTINE_FILE, data_files, dataset_version, file_version,
+                     load_dataset, source_version, get_date_bounds, filter_date_range,
+                     with_zones)
+from zones import assign_zones, load_zones
+
+# Patrol zone GeoJSON files, next to the data file
+ZONES_DIR = 'zones'
 
 # Must be the first Streamlit command
 st.set_page_config(layout="wide")
 
 
+@st.cache_resource(show_spinner="Loading incidents...")
+def read_dataset(source, version):
+    """Read and prepare the dataset once per version of its files"""
+    return load_dataset(source, version)
+
+
 def load_data():
-    """Load the CSV file from the current directory."""
+    """Load the CSV file, or the directory or glob of CSV shards, in DATA_FILE."""
     try:
-        csv_files = [f for f in os.listdir('.') if f.endswith('.csv')]
-        if not csv_files:
-            st.error("No CSV files found in the current directory!")
+        if not data_files(DATA_FILE):
+            st.error(f"No CSV files found for {DATA_FILE}!")
             return None
-        df = pd.read_csv('clean_dataset.csv')  # Use specific file for now
+        df = read_dataset(DATA_FILE, source_version(DATA_FILE))
         st.sidebar.success(f"Data loaded successfully")
+        quarantined = df.attrs.get('quarantined_rows', 0)
+        if quarantined:
+            st.sidebar.warning(f"{quarantined:,} invalid rows set aside in {QUARANTINE_FILE}")
         return df
     except Exception as e:
         st.error(f"Error loading CSV file: {e}")
         return None
 
 
+@st.cache_resource(max_entries=8)
+def get_zone_set(path, version):
+    """Parsed zone polygons, once per file version"""
+    return load_zones(path)
+
+
+@st.cache_resource(max_entries=8)
+def get_zone_codes(_df, version, zone_version, _zones):
+    """Compact int16 zone column for a dataset and zone set"""
+    return assign_zones(_df['location_key'].to_numpy(), _zones)
+
+
+def select_zones(df):
+    """Sidebar choice of police districts or a patrol zone set to group by"""
+    zone_files = sorted(f for f in os.listdir(ZONES_DIR)
+                        if f.endswith(('.geojson', '.json'))) if os.path.isdir(ZONES_DIR) else []
+    if not zone_files:
+        return df
+
+    grouping = st.sidebar.selectbox(
+        "Group Districts By", ["Police District"] + zone_files, key="zone_set")
+    if grouping == "Police District":
+        return df
+
+    path = os.path.join(ZONES_DIR, grouping)
+    try:
+        zone_version = file_version(path)
+        zones = get_zone_set(path, zone_version)
+    except (OSError, ValueError, KeyError) as e:
+        st.sidebar.error(f"Could not load {grouping}: {e}")
+        return df
+    codes = get_zone_codes(df, dataset_version(df), zone_version, zones)
+    st.sidebar.caption(f"{len(zones)} zones; {(codes >= 0).mean():.0%} of incidents inside")
+    return with_zones(df, zones.names, codes, zone_version)
+
+
+def select_date_range(df):
+    """Sidebar date range honored by every view; returns the sliced data"""
+    first, last = get_date_bounds(df)
+    if first is None:
+        return df
+
+    st.sidebar.subheader("Date Range")
+    preset = st.sidebar.selectbox(
+        "Period",
+        ["All Time", "Last 90 Days", "This Quarter", "This Year", "Custom"],
+        key="date_range_preset"
+    )
+
+    # Relative periods end at the latest incident in the data
+    end = last
+    if preset == "All Time":
+        return df
+    elif preset == "Last 90 Days":
+        start = last - timedelta(days=89)
+    elif preset == "This Quarter":
+        start = date(last.year, 3 * ((last.month - 1) // 3) + 1, 1)
+    elif preset == "This Year":
+        start = date(last.year, 1, 1)
+    else:
+        picked = st.sidebar.date_input(
+            "Dates",
+            value=(first, last),
+            min_value=first,
+            max_value=last,
+            key="date_range_custom"
+        )
+        if len(picked) != 2:  # Second date not picked yet
+            return df
+        start, end = picked
+
+    st.sidebar.caption(f"{start:%b %d, %Y} to {end:%b %d, %Y}")
+    # Sorted date index: a binary search instead of a scan
+    return filter_date_range(df, start, end + timedelta(days=1))
+
+
 def create_top_categories_chart(df):
     # Create DataFrame of top incident categories
     df_categories = pd.DataFrame(
-        df.incident_category.value_counts().reset_index())
+        value_counts(df, 'incident_category').reset_index())
     df_categories.columns = ['incident_category', 'count']
 
     # Get top N categories based on user selection
     top_n = st.sidebar.slider("Number of categories to display", 5, 20, 10)
     top_categories = df_categories.head(top_n)
+    intervals = count_intervals(df, 'incident_category')
+    top_categories = with_intervals(top_categories, intervals, 'incident_category')
 
     # Calculate averages
     top_n_avg = top_categories['count'].mean()
     total_avg = df_categories['count'].mean()
 
-    # Create Altair chart
-    base = alt.Chart(top_categories).encode(
-        x=alt.X('incident_category:N',
-                sort='-y',
-                axis=alt.Axis(
-                    title='Incident Categories',
-                    labelAngle=-45,
-                    labelOverlap=False,  # Prevent label overlap handling
-                    labelLimit=0  # Remove text truncation
-                )),
-        y=alt.Y('count:Q', title='Count'),
-        color=alt.condition(
-            # Fixed condition
-            f"datum.count == {top_categories['count'].max()}",
-            alt.value('red'),  # Color for highest bar
-            alt.value('#ffcccb')  # Light red for other bars
+    def build_chart():
+        # Create Altair chart
+        base = alt.Chart(top_categories).encode(
+            x=alt.X('incident_category:N',
+                    sort=top_categories['incident_category'].tolist(),  # By count
+                    axis=alt.Axis(
+                        title='Incident Categories',
+                        labelAngle=-45,
+                        labelOverlap=False,  # Prevent label overlap handling
+                        labelLimit=0  # Remove text truncation
+                    )),
+            y=alt.Y('count:Q', title='Count'),
+            color=alt.condition(
+                # Fixed condition
+                f"datum.count == {top_categories['count'].max()}",
+                alt.value('red'),  # Color for highest bar
+                alt.value('#ffcccb')  # Light red for other bars
+            )
         )
-    )
 
-    # Bars with custom opacity
-    bars = base.mark_bar(opacity=0.8)
+        # Bars with custom opacity
+        bars = base.mark_bar(opacity=0.8)
 
-    # Add value labels on top of bars
-    text = base.mark_text(
-        align='center',
-        baseline='bottom',
-        dy=-5
-    ).encode(
-        text=alt.Text('count:Q', format='.0f')
-    )
+        # Add value labels on top of bars
+        text = base.mark_text(
+            align='center',
+            baseline='bottom',
+            dy=-5
+        ).encode(
+            text=alt.Text('count:Q', format='.0f')
+        )
 
-    # Add average lines with enhanced visibility
-    top_n_rule = alt.Chart(pd.DataFrame({'y': [top_n_avg]})).mark_rule(
-        strokeDash=[5, 5],
-        color='white',
-        strokeWidth=2,
-        opacity=0.8
-    ).encode(
-        y='y',
-        tooltip=[alt.Tooltip('y', title='Top N Average', format='.0f')]
-    )
+        # Add average lines with enhanced visibility
+        top_n_rule = alt.Chart(pd.DataFrame({'y': [top_n_avg]})).mark_rule(
+            strokeDash=[5, 5],
+            color='white',
+            strokeWidth=2,
+            opacity=0.8
+        ).encode(
+            y='y',
+            tooltip=[alt.Tooltip('y', title='Top N Average', format='.0f')]
+        )
 
-    total_rule = alt.Chart(pd.DataFrame({'y': [total_avg]})).mark_rule(
-        strokeDash=[3, 3],
-        color='red',
-        strokeWidth=2,
-        opacity=0.8
-    ).encode(
-        y='y',
-        tooltip=[alt.Tooltip('y', title='Total Average', format='.0f')]
-    )
+        total_rule = alt.Chart(pd.DataFrame({'y': [total_avg]})).mark_rule(
+            strokeDash=[3, 3],
+            color='red',
+            strokeWidth=2,
+            opacity=0.8
+        ).encode(
+            y='y',
+            tooltip=[alt.Tooltip('y', title='Total Average', format='.0f')]
+        )
 
-    # Combine all chart elements
-    chart = (bars + text + top_n_rule + total_rule).properties(
-        title=f'Top {top_n} Incident Categories (2018-Present)',
-        width='container',
-        height=500
-    )
+        # Combine all chart elements
+        layers = bars + text + top_n_rule + total_rule
+        if intervals is not None:
+            layers += error_bars(base)
+        chart = layers.properties(
+            title=f'Top {top_n} Incident Categories (2018-Present)',
+            width='container',
+            height=500
+        )
+
+        return chart
+
+    chart = cached_chart(
+        'top_categories', [top_n, intervals is not None], df, build_chart)
 
-    return chart
+    return chart, top_n_avg, total_avg
 
 
 def create_neighborhood_analysis(df):
+    # Compare several categories per district as grouped bars
+    compared = select_comparison(df, "neighborhood")
+    if compared is not None:
+        data = get_comparison_data(df, 'district', compared)
+        chart = cached_chart('neighborhood_compare', compared, df, lambda: create_comparison_chart(
+            data, 'district', 'Police Districts',
+            'Incidents by Police District - Category Comparison', mark='bar'))
+        _, district_avg, max_district, min_district = summarize_comparison(
+            data, 'district')
+        return chart, max_district, min_district, district_avg, describe_comparison(compared)
+
     # Add incident type selector in sidebar
     incident_options = ['All Types', 'Larceny Theft', 'Motor Vehicle Theft',
                         'Assault', 'Burglary', 'Robbery']
     selected_incident = st.sidebar.radio(
         "Select Incident Type", incident_options)
 
-    # Filter data based on selection
-    if selected_incident != 'All Types':
-        df = df[df['incident_category'] == selected_incident]
-
     # Create DataFrame of police districts
     df_districts = pd.DataFrame(
-        df.police_district.value_counts().reset_index())
+        value_counts(df, 'police_district', selected_incident).reset_index())
     df_districts.columns = ['police_district', 'count']
+    intervals = count_intervals(df, 'police_district', selected_incident)
+    df_districts = with_intervals(df_districts, intervals, 'police_district')
 
     # Calculate statistics
     district_avg = df_districts['count'].mean()
     max_district = df_districts.iloc[0]['police_district']
     min_district = df_districts.iloc[-1]['police_district']
 
-    # Create Altair chart
-    base = alt.Chart(df_districts).encode(
-        x=alt.X('police_district:N',
-                sort='-y',
-                axis=alt.Axis(
-                    title='Police Districts',
-                    labelAngle=-45
-                )),
-        y=alt.Y('count:Q', title='Number of Incidents'),
-        color=alt.condition(
-            f"datum.count == {df_districts['count'].max()}",
-            alt.value('#1f77b4'),  # Blue for highest
-            alt.value('#aec7e8')  # Light blue for others
+    def build_chart():
+        # Create Altair chart
+        base = alt.Chart(df_districts).encode(
+            x=alt.X('police_district:N',
+                    sort=df_districts['police_district'].tolist(),  # By count
+                    axis=alt.Axis(
+                        title='Police Districts',
+                        labelAngle=-45
+                    )),
+            y=alt.Y('count:Q', title='Number of Incidents'),
+            color=alt.condition(
+                f"datum.count == {df_districts['count'].max()}",
+                alt.value('#1f77b4'),  # Blue for highest
+                alt.value('#aec7e8')  # Light blue for others
+            )
         )
-    )
 
-    # Bars
-    bars = base.mark_bar()
+        # Bars
+        bars = base.mark_bar()
 
-    # Value labels
-    text = base.mark_text(
-        align='center',
-        baseline='bottom',
-        dy=-5
-    ).encode(
-        text=alt.Text('count:Q', format='.0f')
-    )
+        # Value labels
+        text = base.mark_text(
+            align='center',
+            baseline='bottom',
+            dy=-5
+        ).encode(
+            text=alt.Text('count:Q', format='.0f')
+        )
 
-    # Average line
-    avg_rule = alt.Chart(pd.DataFrame({'y': [district_avg]})).mark_rule(
-        strokeDash=[5, 5],
-        color='red',
-        strokeWidth=2
-    ).encode(
-        y='y',
-        tooltip=[alt.Tooltip('y', title='District Average', format='.0f')]
-    )
+        # Average line
+        avg_rule = alt.Chart(pd.DataFrame({'y': [district_avg]})).mark_rule(
+            strokeDash=[5, 5],
+            color='red',
+            strokeWidth=2
+        ).encode(
+            y='y',
+            tooltip=[alt.Tooltip('y', title='District Average', format='.0f')]
+        )
 
-    # Combine chart elements
-    chart = (bars + text + avg_rule).properties(
-        title=f'Incidents by Police District - {selected_incident}',
-        width='container',
-        height=500
-    )
+        # Combine chart elements
+        layers = bars + text + avg_rule
+        if intervals is not None:
+            layers += error_bars(base)
+        chart = layers.properties(
+            title=f'Incidents by Police District - {selected_incident}',
+            width='container',
+            height=500
+        )
+
+        return chart
+
+    chart = cached_chart(
+        'neighborhood', [selected_incident, intervals is not None], df, build_chart)
 
     return chart, max_district, min_district, district_avg, selected_incident
 
 
-def create_time_based_analysis(df):
+def top_categories_view(df):
+    """Top incident categories with top-N and overall averages"""
+    chart, top_n_avg, total_avg = create_top_categories_chart(df)
+    return ViewResult(chart, [
+        ("Top Categories Average", f"{int(top_n_avg)}"),
+        ("Overall Average", f"{int(total_avg)}")
+    ])
+
+
+def neighborhood_view(df):
+    """Incidents by police district"""
+    chart, max_district, min_district, district_avg, incident_type = create_neighborhood_analysis(
+        df)
+    return ViewResult(chart, [
+        ("Most Active District", max_district),
+        ("Least Active District", min_district),
+        ("Average Incidents", f"{int(district_avg)}"),
+        ("Incident Type", incident_type)
+    ])
+
+
+def time_based_view(df):
     """Time-based analysis of incidents"""
     chart, total, yearly_avg, peak_period, incident_type, peak_metric_title = create_time_analysis(
         df)
-    st.altair_chart(chart, use_container_width=True)
+    return ViewResult(chart, [
+        ("Total Incidents", f"{int(total):,}"),
+        ("Average per Period", f"{int(yearly_avg):,}"),
+        (peak_metric_title, peak_period),
+        ("Incident Type", incident_type)
+    ])
 
-    # Display metrics
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric("Total Incidents", f"{int(total):,}")
-    with col2:
-        st.metric("Average per Period", f"{int(yearly_avg):,}")
-    with col3:
-        st.metric(peak_metric_title, peak_period)
-    with col4:
-        st.metric("Incident Type", incident_type)
 
-
-def create_parallel_view(df):
+def parallel_view(df):
     """Parallel coordinates view of time-based analysis"""
-    chart, total, avg, peak_year, incident_type = create_parallel_time_analysis(
+    chart, total, avg, peak_period, incident_type, peak_metric_title = create_parallel_time_analysis(
+        df)
+    return ViewResult(chart, [
+        ("Total Incidents", f"{int(total):,}"),
+        ("Average per Period", f"{int(avg):,}"),
+        (peak_metric_title, str(peak_period)),
+        ("Incident Type", incident_type)
+    ])
+
+
+def day_metrics(total, avg, peak_day, lowest_day):
+    """Metrics shared by the day of week views"""
+    return [("Total Incidents", f"{int(total):,}"),
+            ("Daily Average", f"{int(avg):,}"),
+            ("Peak Day", peak_day),
+            ("Lowest Day", lowest_day)]
+
+
+def day_of_week_view(df):
+    """Star plot of incidents by day of week"""
+    fig, total, avg, peak_day, lowest_day, counts = create_day_of_week_analysis(
         df)
-    st.altair_chart(chart, use_container_width=True)
+    return ViewResult(fig, day_metrics(total, avg, peak_day, lowest_day), "plotly")
 
-    # Display metrics
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric("Total Incidents", f"{int(total):,}")
-    with col2:
-        st.metric("Average per Year", f"{int(avg):,}")
-    with col3:
-        st.metric("Peak Year", str(peak_year))
-    with col4:
-        st.metric("Incident Type", incident_type)
+
+def week_bar_view(df):
+    """Bar chart of incidents by incident_day_of_week"""
+    chart, total, avg, peak_day, lowest_day = create_week_bar_analysis(
+        df)
+    return ViewResult(chart, day_metrics(total, avg, peak_day, lowest_day))
+
+
+def time_of_day_view(df):
+    """Hour-of-day line or grid chart"""
+    # Add visualization type selector
+    viz_type = st.sidebar.radio(
+        "Select Visualization Type",
+        ["Line Chart", "Grid Chart"]
+    )
+
+    # Create visualization based on selection
+    chart, total, avg, peak_time, lowest_time, chart_type = create_time_of_day_analysis(
+        df,
+        "line" if viz_type == "Line Chart" else "grid"
+    )
+    return ViewResult(chart, [
+        ("Total Incidents", f"{int(total):,}"),
+        ("Hourly Average", f"{int(avg):,}"),
+        ("Peak Time", peak_time),
+        ("Lowest Time", lowest_time)
+    ], chart_type)
+
+
+def day_night_view(df):
+    """Pie chart of incidents by time of day period"""
+    fig, morning_count, afternoon_count, night_count = create_day_night_analysis(
+        df)
+    total = morning_count + afternoon_count + night_count
+    return ViewResult(fig, [
+        ("Morning (6am-12pm)", f"{int(morning_count):,}"),
+        ("Afternoon (12pm-6pm)", f"{int(afternoon_count):,}"),
+        ("Night (6pm-6am)", f"{int(night_count):,}"),
+        ("Total Incidents", f"{int(total):,}")
+    ], "plotly")
+
+
+def hour_weekday_view(df):
+    """Hour by weekday heatmap"""
+    chart, total, peak_slot, lowest_slot, incident_type = create_hour_weekday_analysis(
+        df)
+    return ViewResult(chart, [
+        ("Total Incidents", f"{int(total):,}"),
+        ("Peak Hour", peak_slot),
+        ("Quietest Hour", lowest_slot),
+        ("Incident Type", incident_type)
+    ])
+
+
+def incident_map_view(df):
+    """Incident map; the map itself is drawn by the view"""
+    total_incidents, unique_locations, incident_type = create_map_analysis(
+        df)
+    return ViewResult(metrics=[
+        ("Total Incidents", f"{total_incidents:,}"),
+        ("Unique Locations", f"{unique_locations:,}"),
+        ("Incident Type", incident_type)
+    ])
+
+
+def district_map_view(df):
+    """District map; the map itself is drawn by the view"""
+    total_incidents, num_districts, busiest_district = create_district_map_analysis(
+        df)
+    return ViewResult(metrics=[
+        ("Total Incidents", f"{total_incidents:,}"),
+        ("Number of Districts", num_districts),
+        ("Busiest District", busiest_district)
+    ])
+
+
+def anomaly_view(df):
+    """Anomalous days across district x category series; the view draws its
+    own chart and table"""
+    flagged, num_series, latest, max_z = create_anomaly_analysis(df)
+    return ViewResult(metrics=[
+        ("Flagged Days", f"{flagged:,}"),
+        ("Series Evaluated", f"{num_series:,}"),
+        ("Latest Anomaly", latest),
+        ("Highest Z-Score", max_z)
+    ])
+
+
+def forecast_view(df):
+    """Weekly forecast for a category and police district"""
+    chart, total, avg, peak_week, incident_type = create_forecast_analysis(df)
+    return ViewResult(chart, [
+        ("Projected Incidents", f"{int(total):,}"),
+        ("Weekly Average", f"{int(avg):,}"),
+        ("Peak Week", peak_week),
+        ("Incident Type", incident_type)
+    ])
+
+
+def cluster_view(df):
+    """Space-time incident clusters; the map itself is drawn by the view"""
+    num_clusters, clustered, total, largest, incident_type = create_cluster_analysis(df)
+    share = f" ({clustered / total:.0%})" if total else ""
+    return ViewResult(metrics=[
+        ("Clusters", f"{num_clusters:,}"),
+        ("Clustered Incidents", f"{clustered:,}{share}"),
+        ("Largest Cluster", largest),
+        ("Incident Type", incident_type)
+    ])
+
+
+def report_lag_view(df):
+    """Time from incident to report, with sketched quantiles"""
+    chart, lags, reports, incident_type = create_report_lag_analysis(df)
+    return ViewResult(chart, [
+        ("Median Lag", format_lag(lags[0])),
+        ("90th Percentile", format_lag(lags[1])),
+        ("99th Percentile", format_lag(lags[2])),
+        ("Reports", f"{reports:,}")
+    ])
+
+
+def resolution_view(df):
+    """Clearance rates from the resolution counts cube"""
+    chart, rate, cleared, total, best, group_label = create_resolution_analysis(df)
+    return ViewResult(chart, [
+        ("Clearance Rate", f"{rate:.1%}"),
+        ("Cleared Incidents", f"{cleared:,}"),
+        ("Incidents", f"{total:,}"),
+        (f"Highest Rate {group_label}", best)
+    ])
+
+
+def data_quality_view(df):
+    """Single-pass profile of the data file; the view draws its own chart and table"""
+    rows, num_columns, null_rate, worst_column, quarantined = create_data_quality_analysis(df)
+    return ViewResult(metrics=[
+        ("Rows Profiled", f"{rows:,}"),
+        ("Columns", num_columns),
+        ("Null Cells", f"{null_rate:.2%}"),
+        ("Most Missing", worst_column),
+        ("Quarantined Rows", f"{quarantined:,}")
+    ])
+
+
+# Visualization options and the views that build them, in sidebar order
+VIEWS = {
+    "Top Categories Analysis": top_categories_view,
+    "Neighborhood Analysis": neighborhood_view,
+    "Time-based Analysis": time_based_view,
+    "Parallel Time View": parallel_view,
+    "Day of Week Analysis": day_of_week_view,
+    "Week Bar Analysis": week_bar_view,
+    "Time of the Day Analysis": time_of_day_view,
+    "Day/Night Analysis": day_night_view,
+    "Hour × Weekday Heatmap": hour_weekday_view,
+    "Incident Map": incident_map_view,
+    "District Map Analysis": district_map_view,
+    "Anomaly Detection": anomaly_view,
+    "Incident Forecast": forecast_view,
+    "Incident Clusters": cluster_view,
+    "Report Lag Analysis": report_lag_view,
+    "Clearance Rates": resolution_view,
+    "Data Quality": data_quality_view
+}
 
 
 def main():
@@ -224,176 +544,21 @@ def main():
         st.sidebar.header("Visualization Options")
         viz_option = st.sidebar.selectbox(
             "Select Visualization Type",
-            ["Top Categories Analysis",
-             "Neighborhood Analysis",
-             "Time-based Analysis",
-             "Parallel Time View",
-             "Day of Week Analysis",
-             "Week Bar Analysis",
-             "Time of the Day Analysis",
-             "Larceny Day/Night Analysis",
-             "Incident Map",
-             "District Map Analysis"]  # Add new option
+            list(VIEWS)
         )
 
-        # Display selected visualization
-        if viz_option == "Top Categories Analysis":
-            chart = create_top_categories_chart(df)
-            st.altair_chart(chart, use_container_width=True)
-
-            # Display metrics
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Top Categories Average",
-                          f"{int(df.incident_category.value_counts().head(10).mean())}")
-            with col2:
-                st.metric("Overall Average",
-                          f"{int(df.incident_category.value_counts().mean())}")
-
-        elif viz_option == "Neighborhood Analysis":
-            chart, max_district, min_district, district_avg, incident_type = create_neighborhood_analysis(
-                df)
-            st.altair_chart(chart, use_container_width=True)
-
-            # Display metrics
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Most Active District", max_district)
-            with col2:
-                st.metric("Least Active District", min_district)
-            with col3:
-                st.metric("Average Incidents", f"{int(district_avg)}")
-            with col4:
-                st.metric("Incident Type", incident_type)
-
-        elif viz_option == "Time-based Analysis":
-            create_time_based_analysis(df)
-
-        elif viz_option == "Parallel Time View":
-            create_parallel_view(df)
-
-        elif viz_option == "Day of Week Analysis":
-            fig, total, avg, peak_day, lowest_day, counts = create_day_of_week_analysis(
-                df)
-            st.plotly_chart(fig, use_container_width=True)
-
-            # Display metrics
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Total Incidents", f"{int(total):,}")
-            with col2:
-                st.metric("Daily Average", f"{int(avg):,}")
-            with col3:
-                st.metric("Peak Day", peak_day)
-            with col4:
-                st.metric("Lowest Day", lowest_day)
-
-        elif viz_option == "Day of Week Bar Chart":
-            chart, total, avg, peak_day, lowest_day = create_day_of_week_bar_analysis(
-                df)
-            st.altair_chart(chart, use_container_width=True)
-
-            # Display metrics
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Total Incidents", f"{int(total):,}")
-            with col2:
-                st.metric("Daily Average", f"{int(avg):,}")
-            with col3:
-                st.metric("Peak Day", peak_day)
-            with col4:
-                st.metric("Lowest Day", lowest_day)
-
-        elif viz_option == "Week Bar Analysis":
-            chart, total, avg, peak_day, lowest_day = create_week_bar_analysis(
-                df)
-            st.altair_chart(chart, use_container_width=True)
-
-            # Display metrics
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Total Incidents", f"{int(total):,}")
-            with col2:
-                st.metric("Daily Average", f"{int(avg):,}")
-            with col3:
-                st.metric("Peak Day", peak_day)
-            with col4:
-                st.metric("Lowest Day", lowest_day)
-
-        elif viz_option == "Time of the Day Analysis":
-            # Add visualization type selector
-            viz_type = st.sidebar.radio(
-                "Select Visualization Type",
-                ["Line Chart", "Grid Chart"]
-            )
+        # Patrol zones stand in for police districts in every view
+        df = select_zones(df)
 
-            # Create visualization based on selection
-            result = create_larceny_analysis(
-                df,
-                "line" if viz_type == "Line Chart" else "grid"
-            )
+        # Global date range applied before any view
+        df = select_date_range(df)
+
+        # Exact counts, or estimates from the ingest-time sample
+        select_approximate_mode()
 
-            chart, total, avg, peak_time, lowest_time, chart_type = result
-
-            # Display chart based on its type
-            if chart_type == "plotly":
-                st.plotly_chart(chart, use_container_width=True)
-            else:
-                st.altair_chart(chart, use_container_width=True)
-
-            # Display metrics
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Total Incidents", f"{int(total):,}")
-            with col2:
-                st.metric("Hourly Average", f"{int(avg):,}")
-            with col3:
-                st.metric("Peak Time", peak_time)
-            with col4:
-                st.metric("Lowest Time", lowest_time)
-
-        elif viz_option == "Larceny Day/Night Analysis":
-            fig, morning_count, afternoon_count, night_count = create_larceny_pie_analysis(
-                df)
-            st.plotly_chart(fig, use_container_width=True)
-
-            # Display metrics
-            total = morning_count + afternoon_count + night_count
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Morning (6am-12pm)", f"{int(morning_count):,}")
-            with col2:
-                st.metric("Afternoon (12pm-6pm)", f"{int(afternoon_count):,}")
-            with col3:
-                st.metric("Night (6pm-6am)", f"{int(night_count):,}")
-            with col4:
-                st.metric("Total Incidents", f"{int(total):,}")
-
-        elif viz_option == "Incident Map":
-            total_incidents, unique_locations, incident_type = create_map_analysis(
-                df)
-
-            # Display metrics below map
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Total Incidents", f"{total_incidents:,}")
-            with col2:
-                st.metric("Unique Locations", f"{unique_locations:,}")
-            with col3:
-                st.metric("Incident Type", incident_type)
-
-        elif viz_option == "District Map Analysis":
-            total_incidents, num_districts, busiest_district = create_district_map_analysis(
-                df)
-
-            # Display metrics
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Total Incidents", f"{total_incidents:,}")
-            with col2:
-                st.metric("Number of Districts", num_districts)
-            with col3:
-                st.metric("Busiest District", busiest_district)
+        # Each view computes its data and metrics once; here we only render
+        render_view(VIEWS[viz_option](df))
+        watch_refinements()
 
 
 if __name__ == '__main__':
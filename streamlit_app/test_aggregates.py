@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import (WEEKS_PER_YEAR, build_stratified_sample, detect_anomalies,
+                        estimate_value_counts, fit_seasonal_forecasts)
+
+
+def test_value_count_intervals_cover_the_true_counts():
+    rng = np.random.default_rng(7)
+    categories = rng.choice(['Larceny Theft', 'Assault', 'Robbery'], 20_000, p=[0.6, 0.3, 0.1])
+    years = rng.choice([2022, 2023], 20_000)
+    districts = pd.Series(rng.choice(['Central', 'Mission', 'Southern'], 20_000),
+                          name='police_district')
+    truth = districts.value_counts()
+
+    covered = total = 0
+    for seed in range(40):
+        strata, population, sampled = build_stratified_sample(
+            categories, years, rate=0.05, minimum=20, seed=seed)
+        in_sample = strata >= 0
+        estimates = estimate_value_counts(
+            districts[in_sample], strata[in_sample], population, sampled)
+        assert (estimates['low'] <= estimates['count']).all()
+        assert (estimates['count'] <= estimates['high']).all()
+        hits = (estimates['low'] <= truth[estimates.index]) & \
+               (truth[estimates.index] <= estimates['high'])
+        covered += hits.sum()
+        total += len(hits)
+
+    # 95% intervals; allow for the spread of 120 trials
+    assert covered / total >= 0.88
+
+
+def test_full_sample_estimates_are_exact():
+    values = pd.Series(['a', 'b', 'b', None, 'c', 'b'])
+    strata, population, sampled = build_stratified_sample(
+        np.array(['x'] * 6), np.array([2023] * 6), rate=1.0, minimum=1)
+
+    estimates = estimate_value_counts(values, strata, population, sampled)
+
+    assert estimates['count'].to_dict() == {'b': 3, 'a': 1, 'c': 1}
+    assert np.allclose(estimates['low'], estimates['count'])
+    assert np.allclose(estimates['high'], estimates['count'])
+
+
+def test_detect_anomalies_flags_an_injected_spike():
+    rng = np.random.default_rng(11)
+    counts = rng.poisson(8, size=(3, 200))
+    counts[1, 150] = 60
+
+    series, day, expected, z = detect_anomalies(counts, first_day=19_000, window=28,
+                                                threshold=5.0, min_count=5)
+
+    assert list(zip(series.tolist(), day.tolist())) == [(1, 150)]
+    assert 4 < expected[0] < 14
+    assert z[0] > 10
+
+
+def test_detect_anomalies_needs_more_days_than_the_window():
+    series, day, expected, z = detect_anomalies(np.ones((2, 20)), first_day=0, window=28)
+
+    assert len(series) == len(day) == len(expected) == len(z) == 0
+
+
+def test_seasonal_forecasts_extend_a_noiseless_series():
+    num_weeks = 156
+
+    def weekly(weeks):
+        angle = 2 * np.pi * weeks / WEEKS_PER_YEAR
+        return 700 + 70 * weeks / num_weeks + 140 * np.sin(angle) + 35 * np.cos(2 * angle)
+
+    # Spread each week evenly over its days, for two series at different scales
+    days = np.repeat(weekly(np.arange(num_weeks)) / 7, 7)
+    counts = np.stack([days, 2 * days])
+
+    forecasts, sigma, start_day = fit_seasonal_forecasts(counts, first_day=100, horizon=12)
+
+    expected = weekly(np.arange(num_weeks, num_weeks + 12))
+    assert np.allclose(forecasts[0], expected)
+    assert np.allclose(forecasts[1], 2 * expected)
+    assert np.allclose(sigma, 0, atol=1e-6)
+    assert start_day == 100 + num_weeks * 7
+
+
+def test_seasonal_forecasts_need_enough_weeks():
+    assert fit_seasonal_forecasts(np.ones((1, 20)), first_day=0) is None
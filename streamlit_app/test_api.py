@@ -0,0 +1,66 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from api import AggregateHandler, AggregateStore, LRUCache, RESPONSE_CACHE_SIZE
+from test_validation import export_rows
+
+
+@pytest.fixture
+def api_url(tmp_path, monkeypatch):
+    """Base URL of an API server over a small export with uncategorized incidents"""
+    rows = export_rows(300)
+    rows.loc[::10, 'incident_category'] = None
+    rows['latitude'] = 37.70 + np.arange(300) % 30 * 0.001
+    path = tmp_path / 'clean_dataset.csv'
+    rows.to_csv(path, index=False)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(AggregateHandler, 'store', AggregateStore(str(path)))
+    monkeypatch.setattr(AggregateHandler, 'bodies', LRUCache(RESPONSE_CACHE_SIZE))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), AggregateHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url, **headers):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_round_trip_revalidates_with_etag(api_url):
+    status, headers, body = get(f"{api_url}/api/categories")
+    assert status == 200
+    counts = {row['incident_category']: row['count'] for row in json.loads(body)}
+    assert counts == {'Larceny Theft': 90, 'Non-Criminal': 90, 'Motor Vehicle Theft': 90}
+
+    status, _, body = get(f"{api_url}/api/categories", **{'If-None-Match': headers['ETag']})
+    assert status == 304
+    assert body == b''
+
+
+def test_locations_count_uncategorized_incidents(api_url):
+    status, _, body = get(f"{api_url}/api/locations")
+    assert status == 200
+    assert json.loads(body) == {'distinct_locations': 30, 'estimated': False}
+
+    status, _, body = get(f"{api_url}/api/locations?incident=Non-Criminal&year=2019")
+    assert status == 200
+    assert json.loads(body)['estimated'] is True
+
+
+def test_invalid_parameters_are_bad_requests(api_url):
+    status, _, body = get(f"{api_url}/api/monthly?year=last")
+    assert status == 400
+    assert 'year' in json.loads(body)['error']
@@ -0,0 +1,23 @@
+import numpy as np
+
+from locations import SKETCH_PRECISION, LocationIndex, pack_location_keys
+
+
+def test_location_index_counts_missing_category_and_year():
+    keys = pack_location_keys([37.76, 37.76, 37.77, 37.78, 37.79],
+                              [-122.42, -122.42, -122.41, -122.40, -122.39])
+    categories = np.array(['Assault', 'Assault', None, 'Robbery', None], dtype=object)
+    years = np.array([2022, 2022, 2023, np.nan, 2023])
+
+    index = LocationIndex(categories, keys, years=years, sketch_precision=SKETCH_PRECISION)
+
+    assert index.categories == ['Assault', 'Robbery']
+    assert index.distinct_count('Assault') == 1
+    assert index.incident_count('Assault') == 2
+    assert index.distinct_count() == 4
+    assert index.incident_count() == 5
+    # The Robbery incident has no year, so it is only in the all-years sketches
+    assert index.estimate_distinct(['Robbery'], [2022.0, 2023.0]) == 0
+    assert index.estimate_distinct(['Robbery']) == 1
+    assert index.estimate_distinct(years=[2023.0]) == 2
+    assert index.estimate_distinct() == 4
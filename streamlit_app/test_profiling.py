@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+from profiling import profile_chunks
+
+
+def test_profile_compares_int_and_float_chunks_numerically():
+    chunks = [pd.DataFrame({'incident_code': [5, 9, 12]}),
+              pd.DataFrame({'incident_code': [100.0, np.nan, 3.0]})]
+
+    column = profile_chunks(chunks)['columns']['incident_code']
+
+    assert column['min'] == 3.0
+    assert column['max'] == 100.0
+    assert column['nulls'] == 1
+
+
+def test_profile_compares_mixed_text_and_numbers_as_text():
+    chunks = [pd.DataFrame({'report_type_code': [5, 9]}),
+              pd.DataFrame({'report_type_code': ['II', 'VS']})]
+
+    column = profile_chunks(chunks)['columns']['report_type_code']
+
+    assert column['min'] == '5'
+    assert column['max'] == 'VS'
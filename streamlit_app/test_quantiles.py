@@ -0,0 +1,27 @@
+import numpy as np
+
+from quantiles import QUANTILE_ACCURACY, build_sketches, sketch_quantiles
+
+QUANTILES = [0.1, 0.5, 0.9, 0.99]
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    rng = np.random.default_rng(3)
+    # Report lags in minutes: many same-day reports and a long tail
+    values = np.concatenate([np.zeros(500), rng.lognormal(5, 2, 50_000).round()])
+    groups = rng.integers(0, 2, len(values))
+
+    sketches = build_sketches(groups, values, 2)
+    merged = sketch_quantiles(sketches.sum(axis=0), QUANTILES)
+
+    for estimate, exact in zip(merged, np.quantile(values, QUANTILES, method='lower')):
+        assert abs(estimate - exact) <= QUANTILE_ACCURACY * exact + 1e-9
+    for group, row in enumerate(sketch_quantiles(sketches, QUANTILES)):
+        exact = np.quantile(values[groups == group], QUANTILES, method='lower')
+        assert np.all(np.abs(row - exact) <= QUANTILE_ACCURACY * exact + 1e-9)
+
+
+def test_empty_sketch_has_no_quantiles():
+    sketches = build_sketches(np.array([0]), np.array([10.0]), 2)
+
+    assert np.isnan(sketch_quantiles(sketches, QUANTILES)[1]).all()
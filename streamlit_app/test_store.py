@@ -0,0 +1,54 @@
+import numpy as np
+
+from store import IncidentStore, MISSING_MINUTE, code_dtype
+
+
+def make_store():
+    """Five incidents; code 2 (== len(labels)) marks a missing label"""
+    codes = {
+        'category': np.array([0, 1, 1, 2, 0], dtype=np.uint8),
+        'district': np.array([1, 0, 1, 1, 2], dtype=np.uint8)
+    }
+    labels = {
+        'category': ['Assault', 'Robbery'],
+        'district': ['Central', 'Mission']
+    }
+    minute = np.array([0, 60, 1440, MISSING_MINUTE, 2880], dtype=np.int32)
+    coords = np.linspace(37.7, 37.8, 5, dtype=np.float32)
+    return IncidentStore(minute, coords, -coords, codes, labels)
+
+
+def test_mask_matches_labels():
+    store = make_store()
+
+    assert store.mask(category='Robbery').tolist() == [False, True, True, False, False]
+    assert store.mask(category='Robbery', district='Mission').tolist() == [
+        False, False, True, False, False]
+    assert not store.mask(category='Arson').any()
+    assert store.mask().all()
+
+
+def test_slice_shares_arrays_and_labels():
+    store = make_store()
+
+    part = store.slice(1, 4)
+
+    assert len(part) == 3
+    assert np.shares_memory(part.minute, store.minute)
+    assert part.labels is store.labels
+    assert part.days().tolist() == [0, 1, -1]
+    assert part.count('category').tolist() == [0, 2, 1]
+
+
+def test_with_labels_sorts_labels_and_keeps_missing():
+    store = make_store()
+
+    zoned = store.with_labels('district', np.array([1, 0, -1, 1, 5]), ['Zone B', 'Zone A'])
+
+    assert zoned.labels['district'] == ['Zone A', 'Zone B']
+    assert zoned.codes['district'].tolist() == [0, 1, 2, 0, 2]
+    assert zoned.codes['district'].dtype == code_dtype(2)
+    assert zoned.mask(district='Zone A').tolist() == [True, False, False, True, False]
+    # The original store and its other fields are untouched
+    assert store.labels['district'] == ['Central', 'Mission']
+    assert zoned.codes['category'] is store.codes['category']
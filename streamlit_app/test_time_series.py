@@ -0,0 +1,20 @@
+import numpy as np
+
+from time_series import lttb
+
+
+def test_lttb_keeps_ends_and_spikes():
+    x = np.arange(10_000)
+    y = np.sin(x / 500)
+    y[4321] = 25.0
+
+    kept = lttb(x, y, threshold=200)
+
+    assert len(kept) == 200
+    assert kept[0] == 0 and kept[-1] == len(x) - 1
+    assert (np.diff(kept) > 0).all()
+    assert 4321 in kept
+
+
+def test_lttb_keeps_short_series_whole():
+    assert (lttb(np.arange(5), np.ones(5), threshold=10) == np.arange(5)).all()
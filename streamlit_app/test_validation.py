@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from dataset import load_dataset
+from validation import VALIDATION_RULES, validate_incidents
+
+# Columns of the notebook's cleaned export (see remove_column_list), which
+# drops incident_id but keeps incident_code
+EXPORT_COLUMNS = ['incident_date', 'incident_time', 'incident_year', 'incident_day_of_week',
+                  'report_datetime', 'report_type_code', 'report_type_description',
+                  'incident_code', 'incident_category', 'resolution', 'police_district',
+                  'analysis_neighborhood', 'latitude', 'longitude']
+
+DUPLICATE = 1 << VALIDATION_RULES.index('duplicate_id')
+
+
+def export_rows(count):
+    """Valid incidents in the cleaned export's columns, sharing a few offense codes"""
+    days = pd.date_range('2019-01-01', periods=count, freq='h')
+    return pd.DataFrame({
+        'incident_date': days.strftime('%Y/%m/%d'),
+        'incident_time': days.strftime('%H:%M'),
+        'incident_year': days.year,
+        'incident_day_of_week': days.day_name(),
+        'report_datetime': days.strftime('%Y/%m/%d %I:%M:%S %p'),
+        'report_type_code': 'II',
+        'report_type_description': 'Initial',
+        'incident_code': np.resize([6244, 7180, 1313], count),
+        'incident_category': np.resize(['Larceny Theft', 'Non-Criminal',
+                                        'Motor Vehicle Theft'], count),
+        'resolution': 'Open or Active',
+        'police_district': np.resize(['Mission', 'Central', 'Southern'], count),
+        'analysis_neighborhood': 'Mission',
+        'latitude': 37.76,
+        'longitude': -122.42
+    }, columns=EXPORT_COLUMNS)
+
+
+def test_export_without_incident_id_keeps_repeated_codes(tmp_path):
+    path = tmp_path / 'clean_dataset.csv'
+    export_rows(500).to_csv(path, index=False)
+
+    df = load_dataset(str(path), quarantine_path=str(tmp_path / 'quarantine.csv'), workers=1)
+
+    assert len(df) == 500
+    assert df.attrs['quarantined_rows'] == 0
+    assert not (tmp_path / 'quarantine.csv').exists()
+
+
+def test_duplicates_flagged_on_incident_id_and_code():
+    df = pd.DataFrame({
+        'incident_id': [1, 1, 1, 2],
+        'incident_code': [6244, 6244, 7180, 6244],
+        'incident_day': 0,
+        'incident_hour': 0,
+        'latitude': 37.76,
+        'longitude': -122.42,
+        'police_district': 'Mission',
+        'incident_category': 'Larceny Theft'
+    })
+
+    flags = validate_incidents(df)
+
+    assert (flags == [0, DUPLICATE, 0, 0]).all()
@@ -0,0 +1,34 @@
+import json
+
+import numpy as np
+
+from locations import MISSING_LOCATION, pack_location_keys
+from zones import assign_zones, load_zones
+
+
+def square(west, south, east, north):
+    return [[west, south], [east, south], [east, north], [west, north], [west, south]]
+
+
+def test_assign_zones_respects_holes(tmp_path):
+    # A park inside the beat is cut out of it and is a zone of its own
+    features = [
+        {'type': 'Feature', 'properties': {'beat': 'Beat 1'},
+         'geometry': {'type': 'Polygon', 'coordinates': [
+             square(-122.50, 37.70, -122.40, 37.80),
+             square(-122.46, 37.74, -122.44, 37.76)]}},
+        {'type': 'Feature', 'properties': {'name': 'Park'},
+         'geometry': {'type': 'Polygon', 'coordinates': [
+             square(-122.46, 37.74, -122.44, 37.76)]}}
+    ]
+    path = tmp_path / 'zones.geojson'
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': features}))
+    zones = load_zones(str(path))
+
+    keys = pack_location_keys([37.71, 37.75, 37.75, 37.90], [-122.48, -122.45, -122.45, -122.45])
+    keys = np.append(keys, MISSING_LOCATION)
+
+    codes = assign_zones(keys, zones)
+
+    assert zones.names == ['Beat 1', 'Park']
+    assert codes.tolist() == [0, 1, 1, -1, -1]
@@ -1,25 +1,79 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
+from time_series import create_series_analysis, get_monthly_table
+from view_model import cached_chart
+from forecast_analysis import forecast_layers, get_period_forecast, select_forecast
+from comparison_analysis import (MONTH_NAMES, create_comparison_chart, describe_comparison,
+                                 get_comparison_data, select_comparison, summarize_comparison)
 
 
-def create_time_analysis(df):
-    # Convert incident_date to datetime
-    df['date'] = pd.to_datetime(df['incident_date'])
-    df['year'] = df['date'].dt.year
-    df['month'] = df['date'].dt.strftime('%Y-%m')  # Format: YYYY-MM
+def create_time_comparison(df, compared, time_granularity):
+    """Overlay yearly or monthly counts of several categories"""
+    if time_granularity == "Monthly":
+        data = get_comparison_data(df, 'month', compared)
+        data = data[data['year'] == st.session_state.selected_year]
+        x_field, sort = 'month_name', MONTH_NAMES
+        title_suffix = f'Month ({st.session_state.selected_year})'
+    else:
+        data = get_comparison_data(df, 'year', compared)
+        x_field, sort = 'year', None
+        title_suffix = 'Year'
+
+    chart = cached_chart(
+        'time_compare', [title_suffix, *compared], df, lambda: create_comparison_chart(
+            data, x_field, title_suffix,
+            f'Incidents by {title_suffix} - Category Comparison', sort=sort))
+    total_incidents, avg_incidents, peak_period, _ = summarize_comparison(
+        data, x_field)
+    peak_metric_title = "Peak Month" if time_granularity == "Monthly" else "Peak Year"
+
+    return chart, total_incidents, avg_incidents, peak_period, describe_comparison(compared), peak_metric_title
 
+
+def create_time_analysis(df):
     # Add time granularity selector
     time_granularity = st.sidebar.radio(
         "Select Time Granularity",
-        ["Yearly", "Monthly"],
+        ["Yearly", "Monthly", "Weekly", "Daily"],
         key="time_granularity"
     )
 
+    # Compare several categories instead of a single incident type
+    compared = None
+    if time_granularity in ("Yearly", "Monthly"):
+        compared = select_comparison(df, "time_analysis")
+
+    # Add incident type selector
+    incident_options = ['All Types', 'Larceny Theft', 'Motor Vehicle Theft',
+                        'Assault', 'Burglary', 'Robbery']
+    if compared is None:
+        selected_incident = st.sidebar.radio(
+            "Select Incident Type for Time Analysis",
+            incident_options,
+            key="time_analysis_radio"
+        )
+    else:
+        selected_incident = 'All Types'
+
+    # Forecast the coming weeks on top of yearly or monthly counts
+    horizon = 0
+    if compared is None and time_granularity in ("Yearly", "Monthly"):
+        horizon = select_forecast("time_analysis")
+
+    # Fine granularities come from the cached daily counts
+    if time_granularity in ("Weekly", "Daily"):
+        return create_series_analysis(
+            df, selected_incident, time_granularity, key="time_series")
+
+    # Monthly counts for every year and incident type come from one cached
+    # pass, so paging through years only slices this table
+    month_table = get_monthly_table(df, selected_incident)
+
     # Add year navigation for monthly view
     if time_granularity == "Monthly":
         col1, col2, col3 = st.columns([1, 3, 1])
-        min_year, max_year = df['year'].min(), df['year'].max()
+        min_year, max_year = month_table['year'].min(), month_table['year'].max()
 
         with col1:
             if st.button("← Previous Year"):
@@ -38,27 +92,11 @@ def create_time_analysis(df):
                     st.session_state.selected_year = min(
                         max_year, st.session_state.selected_year + 1)
 
-    # Add incident type selector
-    incident_options = ['All Types', 'Larceny Theft', 'Motor Vehicle Theft',
-                        'Assault', 'Burglary', 'Robbery']
-    selected_incident = st.sidebar.radio(
-        "Select Incident Type for Time Analysis",
-        incident_options,
-        key="time_analysis_radio"
-    )
-
-    # Filter data based on selection
-    if selected_incident != 'All Types':
-        df = df[df['incident_category'] == selected_incident]
+    if compared is not None:
+        return create_time_comparison(df, compared, time_granularity)
 
     # Create aggregation based on selected granularity
     if time_granularity == "Monthly":
-        # Filter for selected year and format months
-        df = df[df['year'] == st.session_state.selected_year]
-        # Add month number for proper sorting
-        df['month_num'] = df['date'].dt.month
-        df['month_name'] = df['date'].dt.strftime('%B')
-
         # Create monthly data with all months (even if no incidents)
         all_months = pd.DataFrame({
             'month_num': range(1, 13),
@@ -66,13 +104,13 @@ def create_time_analysis(df):
                            'July', 'August', 'September', 'October', 'November', 'December']
         })
 
-        # Count incidents by month
-        monthly_counts = df.groupby(
-            ['month_num', 'month_name']).size().reset_index(name='count')
+        # Counts for the selected year from the cached table
+        monthly_counts = month_table[
+            month_table['year'] == st.session_state.selected_year]
 
         # Merge with all months to include zeros for months with no incidents
         time_data = all_months.merge(
-            monthly_counts, on=['month_num', 'month_name'], how='left')
+            monthly_counts[['month_num', 'count']], on='month_num', how='left')
         time_data['count'] = time_data['count'].fillna(0)
 
         # Sort by month number
@@ -80,7 +118,7 @@ def create_time_analysis(df):
         x_field = 'month_name'
         title_suffix = f'Month ({st.session_state.selected_year})'
     else:
-        time_data = df.groupby('year').size().reset_index(name='count')
+        time_data = month_table.groupby('year')['count'].sum().reset_index()
         x_field = 'year'
         title_suffix = 'Year'
 
@@ -98,54 +136,79 @@ def create_time_analysis(df):
     # Update metrics display title in streamlit
     peak_metric_title = "Peak Month" if time_granularity == "Monthly" else "Peak Year"
 
-    # Create chart
-    base = alt.Chart(time_data).encode(
-        x=alt.X(f'{x_field}:O',
-                title=title_suffix,
-                axis=alt.Axis(labelAngle=-45),
-                # Add sort field for proper month ordering
+    # Projected totals from the batched forecasts, stacked on the counts so far
+    if time_granularity == "Monthly":
+        forecast_data = get_period_forecast(
+            df, selected_incident, horizon, 'month',
+            time_data.assign(year=st.session_state.selected_year), x_field)
+        if forecast_data is not None:
+            forecast_data = forecast_data[
+                forecast_data['year'] == st.session_state.selected_year].copy()
+            forecast_data['month_name'] = [MONTH_NAMES[m - 1] for m in forecast_data['month_num']]
+    else:
+        forecast_data = get_period_forecast(
+            df, selected_incident, horizon, 'year', time_data, x_field)
+
+    def build_chart():
+        # Create chart
+        base = alt.Chart(time_data).encode(
+            x=alt.X(f'{x_field}:O',
+                    title=title_suffix,
+                    axis=alt.Axis(labelAngle=-45),
+                    # Add sort field for proper month ordering
+                    sort=None if time_granularity == "Yearly" else alt.SortField(
+                        'month_num', order='ascending')),
+            y=alt.Y('count:Q',
+                    title='Number of Incidents',
+                    scale=alt.Scale(zero=True)),
+            tooltip=[
+                alt.Tooltip(f'{x_field}:O', title=title_suffix),
+                alt.Tooltip('count:Q', title='Incidents', format=',d'),
+                # Add month number to tooltip for debugging
+                alt.Tooltip('month_num:Q', title='Month #') if time_granularity == "Monthly" else alt.Tooltip(
+                    f'{x_field}:O', title=title_suffix)
+            ]
+        )
+
+        # Create bars
+        bars = base.mark_bar(color='#2196F3', opacity=0.8)
+
+        # Add value labels
+        text = base.mark_text(
+            align='center',
+            baseline='bottom',
+            dy=-5,
+            fontSize=12
+        ).encode(
+            text=alt.Text('count:Q', format=',.0f')
+        )
+
+        # Add average line
+        avg_rule = alt.Chart(pd.DataFrame({'y': [avg_incidents]})).mark_rule(
+            strokeDash=[5, 5],
+            color='red',
+            strokeWidth=2
+        ).encode(
+            y='y',
+            tooltip=[alt.Tooltip('y', title='Average', format=',.0f')]
+        )
+
+        # Combine chart elements
+        layers = bars + text + avg_rule
+        if forecast_data is not None and not forecast_data.empty:
+            layers += forecast_layers(
+                forecast_data, x_field, title_suffix,
                 sort=None if time_granularity == "Yearly" else alt.SortField(
-                    'month_num', order='ascending')),
-        y=alt.Y('count:Q',
-                title='Number of Incidents',
-                scale=alt.Scale(zero=True)),
-        tooltip=[
-            alt.Tooltip(f'{x_field}:O', title=title_suffix),
-            alt.Tooltip('count:Q', title='Incidents', format=',d'),
-            # Add month number to tooltip for debugging
-            alt.Tooltip('month_num:Q', title='Month #') if time_granularity == "Monthly" else alt.Tooltip(
-                f'{x_field}:O', title=title_suffix)
-        ]
-    )
+                    'month_num', order='ascending'))
+        chart = layers.properties(
+            title=f'Incidents by {title_suffix} - {selected_incident}',
+            width='container',
+            height=500
+        )
 
-    # Create bars
-    bars = base.mark_bar(color='#2196F3', opacity=0.8)
-
-    # Add value labels
-    text = base.mark_text(
-        align='center',
-        baseline='bottom',
-        dy=-5,
-        fontSize=12
-    ).encode(
-        text=alt.Text('count:Q', format=',.0f')
-    )
-
-    # Add average line
-    avg_rule = alt.Chart(pd.DataFrame({'y': [avg_incidents]})).mark_rule(
-        strokeDash=[5, 5],
-        color='red',
-        strokeWidth=2
-    ).encode(
-        y='y',
-        tooltip=[alt.Tooltip('y', title='Average', format=',.0f')]
-    )
+        return chart
 
-    # Combine chart elements
-    chart = (bars + text + avg_rule).properties(
-        title=f'Incidents by {title_suffix} - {selected_incident}',
-        width='container',
-        height=500
-    )
+    chart = cached_chart(
+        'time_analysis', [title_suffix, selected_incident, horizon], df, build_chart)
 
     return chart, total_incidents, avg_incidents, peak_period, selected_incident, peak_metric_title
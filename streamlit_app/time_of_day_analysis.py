@@ -0,0 +1,276 @@
+import pandas as pd
+import plotly.graph_objects as go
+import altair as alt
+import streamlit as st
+from hour_profile import (GRID_PERIODS, PIE_PERIODS, get_hour_profile, get_period_labels,
+                          get_period_midpoints, get_profile_options, group_periods,
+                          periods_from_starts)
+from view_model import cached_chart
+
+# Colors of the standard grid periods, in GRID_PERIODS order; custom periods
+# use a categorical scheme instead
+GRID_COLORS = ['#90EE90', '#FFD700', '#FF6B6B', '#4682B4']
+
+
+def select_profile_filters(df, key):
+    """Sidebar selectors shared by the hour-profile views"""
+    incident_options = ['All Types', 'Larceny Theft', 'Motor Vehicle Theft',
+                        'Assault', 'Burglary', 'Robbery']
+    selected_incident = st.sidebar.radio(
+        "Select Incident Type for Time of Day",
+        incident_options,
+        index=1,  # Larceny Theft
+        key=f"{key}_radio"
+    )
+
+    districts, years = get_profile_options(df)
+    selected_district = st.sidebar.selectbox(
+        "Police District", ['All Districts'] + districts, key=f"{key}_district")
+    selected_year = st.sidebar.selectbox(
+        "Year", ['All Years'] + years, key=f"{key}_year")
+
+    # Describe the selection for chart titles
+    label = selected_incident
+    details = [str(v) for v in (selected_district, selected_year)
+               if v not in ('All Districts', 'All Years')]
+    if details:
+        label += f" ({', '.join(details)})"
+
+    return selected_incident, selected_district, selected_year, label
+
+
+def select_periods(key):
+    """Grid periods: the standard four, or groupings from custom start hours"""
+    if not st.sidebar.checkbox("Custom Periods", key=f"{key}_custom_periods"):
+        return GRID_PERIODS
+    starts = st.sidebar.multiselect(
+        "Period Start Hours",
+        list(range(24)),
+        default=[start for _, start, _ in GRID_PERIODS],
+        format_func=lambda hour: f"{hour:02d}:00",
+        key=f"{key}_period_starts"
+    )
+    return periods_from_starts(starts) if starts else GRID_PERIODS
+
+
+def create_time_of_day_analysis(df, analysis_type="line"):
+    """Create hour-of-day analysis with multiple visualization options"""
+    incident, district, year, label = select_profile_filters(df, "time_of_day")
+
+    # Hourly histogram from the cached count cube
+    hourly = get_hour_profile(df, incident, district, year)
+    hourly_counts = pd.DataFrame({'hour': range(24), 'count': hourly})
+
+    total = hourly_counts['count'].sum()
+    avg = total / 24
+
+    if analysis_type == "line":
+        def build_figure():
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=hourly_counts['hour'],
+                y=hourly_counts['count'],
+                mode='lines+markers',
+                name=incident,
+                line=dict(color='red', width=2),
+                marker=dict(size=8)
+            ))
+
+            fig.update_layout(
+                title=f"{label} by Time of Day",
+                xaxis_title="Hour of Day (24-hour format)",
+                yaxis_title="Number of Incidents",
+                template='plotly_dark',
+                showlegend=True,
+                width=800,
+                height=600
+            )
+
+            return fig
+
+        fig = cached_chart(
+            'time_of_day', ['line', incident, district, year], df, build_figure)
+
+        peak_time = f"{
+            hourly_counts.loc[hourly_counts['count'].idxmax(), 'hour']:02d}:00"
+        lowest_time = f"{
+            hourly_counts.loc[hourly_counts['count'].idxmin(), 'hour']:02d}:00"
+
+        return fig, total, avg, peak_time, lowest_time, "plotly"
+
+    else:  # Grid analysis
+        # Label each hour with its time period
+        periods = select_periods("time_of_day")
+        period_names = [name for name, _, _ in periods]
+        hourly_counts['period'] = get_period_labels(periods)
+        if periods == GRID_PERIODS:
+            period_scale = alt.Scale(domain=period_names, range=GRID_COLORS)
+        else:
+            period_scale = alt.Scale(domain=period_names, scheme='tableau10')
+
+        def build_chart():
+            # Create base chart
+            base_chart = alt.Chart(hourly_counts).mark_bar().encode(
+                x=alt.X('hour:O', title='Hour of Day',
+                        axis=alt.Axis(labelAngle=0)),
+                y=alt.Y('count:Q', title='Number of Incidents'),
+                color=alt.Color('period:N', scale=period_scale),
+                tooltip=['period', 'hour', 'count']
+            ).properties(
+                title=f'{label} by Hour and Time Period',
+                width='container',
+                height=400
+            )
+
+            # Create hour grid
+            hour_grid = alt.Chart(pd.DataFrame({
+                'hour': range(24)
+            })).mark_rule(
+                strokeDash=[2, 2],
+                stroke='gray',
+                strokeWidth=0.5,
+                opacity=0.3
+            ).encode(
+                x='hour:O'
+            )
+
+            # Create period separators
+            period_rules = alt.Chart(pd.DataFrame({
+                'hour': [start for _, start, _ in periods],
+                'label': period_names
+            })).mark_rule(
+                strokeDash=[5, 5],
+                stroke='white',
+                strokeWidth=1,
+                opacity=0.5
+            ).encode(
+                x='hour:O'
+            )
+
+            # Create period labels, centred on each period
+            period_labels = alt.Chart(pd.DataFrame({
+                'hour': get_period_midpoints(periods),
+                'label': period_names,
+                'y': [max(hourly_counts['count']) * 1.1] * len(periods)
+            })).mark_text(
+                color='white',
+                fontSize=12
+            ).encode(
+                x='hour:O',
+                y='y:Q',
+                text='label'
+            )
+
+            # Combine all layers
+            final_chart = alt.layer(
+                hour_grid,
+                base_chart,
+                period_rules,
+                period_labels
+            )
+
+            return final_chart
+
+        final_chart = cached_chart(
+            'time_of_day', ['grid', incident, district, year, tuple(periods)], df, build_chart)
+
+        # Calculate metrics
+        peak_hour = hourly_counts.loc[hourly_counts['count'].idxmax()]
+        lowest_hour = hourly_counts.loc[hourly_counts['count'].idxmin()]
+        peak_time = f"{int(peak_hour['hour']):02d}:00 ({peak_hour['period']})"
+        lowest_time = f"{int(lowest_hour['hour']):02d}:00 ({
+            lowest_hour['period']})"
+
+        return final_chart, total, avg, peak_time, lowest_time, "altair"
+
+
+def create_day_night_analysis(df):
+    """Create pie chart of incidents by time of day period"""
+    incident, district, year, label = select_profile_filters(df, "day_night")
+
+    # Add color selector in sidebar
+    st.sidebar.subheader("Customize Pie Chart")
+    color_schemes = {
+        # Night: dark blue, Morning: yellow, Afternoon: orange
+        'Time of Day': ['#2C3E50', '#F1C40F', '#E67E22'],
+        'Ocean': ['#034694', '#3498DB', '#1ABC9C'],  # Deep to light blues
+        'Sunset': ['#6C3483', '#E74C3C', '#F39C12'],  # Purple to orange
+        'Forest': ['#145A32', '#27AE60', '#58D68D']   # Dark to light green
+    }
+
+    # Add description of color meanings
+    st.sidebar.markdown("""
+    **Color Meanings:**
+    - First color: Night (6pm-6am)
+    - Second color: Morning (6am-12pm)
+    - Third color: Afternoon (12pm-6pm)
+    """)
+
+    selected_scheme = st.sidebar.selectbox(
+        "Color Scheme",
+        options=list(color_schemes.keys())
+    )
+
+    # Calculate counts for three periods from the hourly histogram
+    period_counts = group_periods(
+        get_hour_profile(df, incident, district, year), PIE_PERIODS)
+    night_count = period_counts['Night']
+    morning_count = period_counts['Morning']
+    afternoon_count = period_counts['Afternoon']
+
+    # Create list of values and labels
+    values = [night_count, morning_count, afternoon_count]
+    labels = ['Night (6pm-6am)', 'Morning (6am-12pm)', 'Afternoon (12pm-6pm)']
+
+    def build_figure():
+        # Create pie chart using plotly
+        fig = go.Figure(data=[go.Pie(
+            labels=labels,
+            values=values,
+            hole=0,
+            marker_colors=color_schemes[selected_scheme],
+            hovertemplate="<b>%{label}</b><br>" +
+                          "Count: %{value:,.0f}<br>" +
+                          "Percentage: %{percent}<br>" +
+                          "<extra></extra>",  # Removes trace name from hover
+            textposition='auto',
+            textinfo='percent+label',
+            texttemplate="%{label}<br>%{percent:.1%}",
+            textfont=dict(size=14)
+        )])
+
+        # Update layout with new styling
+        fig.update_layout(
+            title={
+                'text': f"{label} Distribution by Time of Day",
+                'y': 0.95,
+                'x': 0.5,
+                'xanchor': 'center',
+                'yanchor': 'top',
+                'font': dict(size=24)
+            },
+            showlegend=True,
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=-0.2,
+                xanchor="center",
+                x=0.5
+            ),
+            width=800,
+            height=600,
+            annotations=[{
+                'text': f"Total Incidents: {sum(values):,}",
+                'x': 0.5,
+                'y': -0.3,
+                'showarrow': False,
+                'font': {'size': 16}
+            }]
+        )
+
+        return fig
+
+    fig = cached_chart(
+        'day_night', [incident, district, year, selected_scheme], df, build_figure)
+
+    return fig, morning_count, afternoon_count, night_count
@@ -0,0 +1,221 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import altair as alt
+from aggregates import (build_daily_counts, build_monthly_counts, build_series_counts,
+                        daily_series, monthly_table)
+from dataset import dataset_version
+from view_model import cached_chart
+
+# Upper bound on points per line sent to the browser
+MAX_POINTS = 600
+
+ROLLING_WINDOWS = {
+    'Daily': {'None': 0, '7 days': 7, '28 days': 28, '91 days': 91},
+    'Weekly': {'None': 0, '4 weeks': 4, '13 weeks': 13, '52 weeks': 52}
+}
+
+
+@st.cache_resource(ttl=3600, max_entries=16)  # Cache for 1 hour
+def get_daily_counts(_df, version):
+    """Category x day count matrix, built once per dataset version"""
+    return build_daily_counts(_df)
+
+
+@st.cache_resource(ttl=3600, max_entries=16)
+def get_monthly_counts(_df, version):
+    """Category x month count matrix, summed from the cached daily matrix"""
+    return build_monthly_counts(*get_daily_counts(_df, version))
+
+
+@st.cache_resource(ttl=3600, max_entries=16)
+def get_series_counts(_df, version):
+    """District x category x day count matrix, built once per dataset version"""
+    return build_series_counts(_df)
+
+
+def get_monthly_table(df, category='All Types'):
+    """Incident counts by year and month for a category"""
+    return monthly_table(get_monthly_counts(df, dataset_version(df)), category)
+
+
+def get_series(df, category='All Types', granularity='Daily'):
+    """Daily or weekly incident counts for a category, zero-filled"""
+    return daily_series(get_daily_counts(df, dataset_version(df)), category, granularity)
+
+
+def rolling_mean(values, window):
+    """Trailing moving average from cumulative sums; NaN until the window fills"""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if 0 < window <= len(values):
+        cumsum = np.concatenate(([0.0], np.cumsum(values)))
+        result[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+    return result
+
+
+def lttb(x, y, threshold=MAX_POINTS):
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling
+
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket, so spikes survive downsampling.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    edges = np.append(edges, n)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2]
+        if next_start >= n - 1:  # The last bucket looks ahead to the last point
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Twice the triangle areas for every candidate in the bucket at once
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous]) -
+                      (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        kept[i + 1] = previous
+
+    return kept
+
+
+def downsample(frame, x_field, y_field, threshold=MAX_POINTS):
+    """Downsample a series frame with LTTB, ignoring NaN values"""
+    frame = frame[frame[y_field].notna()]
+    x = frame[x_field]
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype('int64')
+    return frame.iloc[lttb(x.to_numpy(), frame[y_field].to_numpy(), threshold)]
+
+
+def create_series_analysis(df, selected_incident, granularity, key):
+    """Daily or weekly line chart with rolling average and year overlays"""
+    period_name = 'Day' if granularity == 'Daily' else 'Week'
+    windows = ROLLING_WINDOWS[granularity]
+    window_label = st.sidebar.selectbox(
+        "Rolling Average", list(windows.keys()), index=1, key=f"{key}_rolling")
+    overlay = st.sidebar.checkbox(
+        "Year-over-Year Overlay", key=f"{key}_overlay")
+
+    series = get_series(df, selected_incident, granularity)
+    window = windows[window_label]
+    time_data = pd.DataFrame({
+        'date': series.index,
+        'count': series.to_numpy(),
+        'rolling': rolling_mean(series.to_numpy(), window)
+    })
+
+    # Calculate metrics on the full series, before downsampling
+    total_incidents = int(time_data['count'].sum())
+    avg_incidents = time_data['count'].mean() if len(time_data) else 0
+    if len(time_data):
+        peak_row = time_data.loc[time_data['count'].idxmax()]
+        peak_period = f"{peak_row['date']:%Y-%m-%d} ({int(peak_row['count']):,})"
+    else:
+        peak_period = "-"
+    peak_metric_title = f"Peak {period_name}"
+
+    def build_chart():
+        title = f'Incidents by {period_name} - {selected_incident}'
+        y_field = 'rolling' if window else 'count'
+
+        if overlay:
+            # One line per year against the day (or week) of the year
+            time_data['year'] = time_data['date'].dt.year
+            time_data['period_of_year'] = (
+                time_data['date'].dt.dayofyear if granularity == 'Daily'
+                else (time_data['date'].dt.dayofyear - 1) // 7 + 1)
+            years = time_data['year'].unique()
+            per_year = max(3, MAX_POINTS // max(len(years), 1))
+            plot_data = pd.concat(
+                [downsample(group, 'period_of_year', y_field, per_year)
+                 for _, group in time_data.groupby('year')]) if len(time_data) else time_data
+
+            chart = alt.Chart(plot_data).mark_line(strokeWidth=1.5).encode(
+                x=alt.X('period_of_year:Q',
+                        title=f'{period_name} of Year',
+                        scale=alt.Scale(nice=False)),
+                y=alt.Y(f'{y_field}:Q', title='Number of Incidents'),
+                color=alt.Color('year:O', title='Year'),
+                tooltip=[
+                    alt.Tooltip('date:T', title='Date'),
+                    alt.Tooltip('count:Q', title='Incidents', format=',d'),
+                    alt.Tooltip('rolling:Q', title='Rolling Average', format=',.1f')
+                ]
+            ).properties(
+                title=f'{title} (Year over Year)',
+                width='container',
+                height=500
+            )
+            shown = len(plot_data)
+        else:
+            counts = downsample(time_data, 'date', 'count')
+            base = alt.Chart(counts).mark_line(
+                color='#2196F3',
+                strokeWidth=1,
+                opacity=0.6 if window else 1
+            ).encode(
+                x=alt.X('date:T', title=period_name),
+                y=alt.Y('count:Q', title='Number of Incidents'),
+                tooltip=[
+                    alt.Tooltip('date:T', title=period_name),
+                    alt.Tooltip('count:Q', title='Incidents', format=',d')
+                ]
+            )
+            layers = [base]
+            shown = len(counts)
+
+            if window:
+                rolling = downsample(time_data, 'date', 'rolling')
+                layers.append(alt.Chart(rolling).mark_line(
+                    color='red',
+                    strokeWidth=2
+                ).encode(
+                    x='date:T',
+                    y='rolling:Q',
+                    tooltip=[
+                        alt.Tooltip('date:T', title=period_name),
+                        alt.Tooltip('rolling:Q', title=f'{window_label} Average',
+                                    format=',.1f')
+                    ]
+                ))
+                shown += len(rolling)
+
+            # Add average line
+            layers.append(alt.Chart(pd.DataFrame({'y': [avg_incidents]})).mark_rule(
+                strokeDash=[5, 5],
+                color='white',
+                strokeWidth=1
+            ).encode(
+                y='y',
+                tooltip=[alt.Tooltip('y', title='Average', format=',.0f')]
+            ))
+
+            chart = alt.layer(*layers).properties(
+                title=title,
+                width='container',
+                height=500
+            )
+
+        # Keep the plotted point count with the cached spec for the caption
+        return chart.properties(usermeta={'points': shown})
+
+    chart = cached_chart(
+        key, [granularity, selected_incident, window_label, overlay], df, build_chart)
+    shown = chart['usermeta']['points']
+
+    st.caption(f"Plotted {shown:,} points for {len(time_data):,} "
+               f"{period_name.lower()}s (LTTB downsampling)")
+
+    return chart, total_incidents, avg_incidents, peak_period, selected_incident, peak_metric_title
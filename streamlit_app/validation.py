@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+# Ingest validation: every check is a vectorized test over whole columns and
+# sets one bit in a per-row flag array, so a row failing several checks is
+# reported once with all of its reasons. Rows with any flag set are kept out
+# of the app and written to a quarantine file instead.
+
+# Police districts of the SFPD export, compared case-insensitively
+KNOWN_DISTRICTS = ['Bayview', 'Central', 'Ingleside', 'Mission', 'Northern', 'Out of SF',
+                   'Park', 'Richmond', 'Southern', 'Taraval', 'Tenderloin']
+
+# Incident categories of the 2018-present export, including its historical
+# spelling variants
+KNOWN_CATEGORIES = [
+    'Arson', 'Assault', 'Burglary', 'Case Closure', 'Civil Sidewalks', 'Courtesy Report',
+    'Disorderly Conduct', 'Drug Offense', 'Drug Violation', 'Embezzlement', 'Fire Report',
+    'Forgery And Counterfeiting', 'Fraud', 'Gambling', 'Homicide',
+    'Human Trafficking (A), Commercial Sex Acts', 'Human Trafficking (B), Involuntary Servitude',
+    'Human Trafficking, Commercial Sex Acts', 'Juvenile Offenses', 'Larceny Theft',
+    'Liquor Laws', 'Lost Property', 'Malicious Mischief', 'Miscellaneous Investigation',
+    'Missing Person', 'Motor Vehicle Theft', 'Motor Vehicle Theft?', 'Non-Criminal',
+    'Offences Against The Family And Children', 'Other', 'Other Miscellaneous',
+    'Other Offenses', 'Prostitution', 'Rape', 'Recovered Vehicle', 'Robbery', 'Sex Offense',
+    'Stolen Property', 'Suicide', 'Suspicious', 'Suspicious Occ', 'Traffic Collision',
+    'Traffic Violation Arrest', 'Vandalism', 'Vehicle Impounded', 'Vehicle Misplaced',
+    'Warrant', 'Warrants', 'Weapons Carrying Etc', 'Weapons Offence', 'Weapons Offense'
+]
+
+# San Francisco with a few kilometres of margin; catches zeroed, swapped and
+# placeholder coordinates
+LATITUDE_BOUNDS = (37.60, 37.93)
+LONGITUDE_BOUNDS = (-122.60, -122.28)
+
+# A repeated incident id and code is the same record exported twice; other
+# repeated ids are further offenses of one incident and are kept. Exports
+# without incident_id (the notebook's cleaned export drops it) are not
+# checked: incident_code alone repeats for every incident of an offense.
+DUPLICATE_KEY = ['incident_id', 'incident_code']
+
+# Flag bits, in the order reasons are listed
+VALIDATION_RULES = ['invalid_date', 'invalid_time', 'invalid_coordinates',
+                    'unknown_district', 'unknown_category', 'duplicate_id']
+
+
+def _outside_vocabulary(values, vocabulary):
+    """True for values that are present but not in the vocabulary
+
+    Only the distinct values go through the case-insensitive string
+    comparison; rows are matched through their factorized codes.
+    """
+    codes, uniques = pd.factorize(values)
+    known = pd.Index(uniques).astype(str).str.upper().isin([v.upper() for v in vocabulary])
+    return (codes >= 0) & ~np.append(known, True)[codes]
+
+
+def validate_incidents(df):
+    """Reason flags of every row, 0 for rows that pass all checks
+
+    Expects the frame after prepare_dataset has parsed times and dates:
+    incident_hour is -1 for a missing or malformed HH:MM time and
+    incident_day is -1 for an unparseable date. Missing coordinates,
+    districts and categories are allowed (unlocated or uncategorized
+    incidents); present values must be valid.
+    """
+    latitude = df['latitude'].to_numpy(dtype=np.float64)
+    longitude = df['longitude'].to_numpy(dtype=np.float64)
+    inside = ((latitude >= LATITUDE_BOUNDS[0]) & (latitude <= LATITUDE_BOUNDS[1]) &
+              (longitude >= LONGITUDE_BOUNDS[0]) & (longitude <= LONGITUDE_BOUNDS[1]))
+    located = ~np.isnan(latitude) & ~np.isnan(longitude)
+    # Only one of the pair present is as unusable as an out-of-bounds point
+    partial = np.isnan(latitude) != np.isnan(longitude)
+
+    # Later copies of a record are flagged; the first occurrence stays
+    if all(column in df for column in DUPLICATE_KEY):
+        duplicated = df.duplicated(subset=DUPLICATE_KEY, keep='first').to_numpy()
+    else:
+        duplicated = np.zeros(len(df), dtype=bool)
+
+    checks = {
+        'invalid_date': df['incident_day'].to_numpy() < 0,
+        'invalid_time': df['incident_hour'].to_numpy() < 0,
+        'invalid_coordinates': (located & ~inside) | partial,
+        'unknown_district': _outside_vocabulary(df['police_district'], KNOWN_DISTRICTS),
+        'unknown_category': _outside_vocabulary(df['incident_category'], KNOWN_CATEGORIES),
+        'duplicate_id': duplicated
+    }
+    flags = np.zeros(len(df), dtype=np.uint8)
+    for bit, name in enumerate(VALIDATION_RULES):
+        flags |= checks[name].astype(np.uint8) << bit
+    return flags
+
+
+def describe_reasons(flags):
+    """Semicolon-separated reason names for each flag value"""
+    values, inverse = np.unique(flags, return_inverse=True)
+    names = np.array([
+        ';'.join(name for bit, name in enumerate(VALIDATION_RULES) if value & (1 << bit))
+        for value in values
+    ], dtype=object)
+    return names[inverse]
+
+
+def count_reasons(flags):
+    """Number of rows failing each check, for the rules that any row fails"""
+    counts = {}
+    for bit, name in enumerate(VALIDATION_RULES):
+        count = int(np.count_nonzero(flags & (1 << bit)))
+        if count:
+            counts[name] = count
+    return counts
@@ -0,0 +1,235 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import streamlit as st
+import numpy as np
+import altair as alt
+from aggregates import SAMPLE_RATE, count_values, estimate_value_counts
+from dataset import dataset_version
+
+# Finished chart specs kept across reruns; the least recently used go first
+CHART_CACHE_SIZE = 128
+
+
+@dataclass
+class ViewResult:
+    """Everything a view shows: one chart and its formatted metrics
+
+    Views compute their data once and fill this in; main() only renders it.
+    Views that draw their own output (the maps) leave `chart` as None.
+    """
+    chart: object = None
+    metrics: list = field(default_factory=list)  # (label, value) pairs
+    chart_type: str = "altair"
+
+
+def render_view(result):
+    """Draw a view's chart and its metrics in a row of columns"""
+    if result.chart is not None:
+        if result.chart_type == "plotly":
+            st.plotly_chart(result.chart, use_container_width=True)
+        elif isinstance(result.chart, dict):  # Cached Vega-Lite spec
+            st.vega_lite_chart(result.chart, use_container_width=True)
+        else:
+            st.altair_chart(result.chart, use_container_width=True)
+
+    if result.metrics:
+        for col, (label, value) in zip(st.columns(len(result.metrics)), result.metrics):
+            with col:
+                st.metric(label, value)
+
+
+@st.cache_data(ttl=3600, max_entries=64)  # Cache for 1 hour
+def get_value_counts(_df, version, column, category='All Types'):
+    """Value counts of a column, optionally within one incident category"""
+    return count_values(_df, column, category)
+
+
+@st.cache_data(ttl=3600, max_entries=64)
+def get_value_estimates(_df, version, column, category='All Types'):
+    """Estimated value counts and 95% intervals from the stratified sample"""
+    positions = np.flatnonzero(_df['sample_stratum'].to_numpy() >= 0)
+    values = _df[column].iloc[positions]
+    strata = _df['sample_stratum'].to_numpy()[positions]
+    if category != 'All Types':
+        in_category = (_df['incident_category'].iloc[positions] == category).to_numpy()
+        values, strata = values[in_category], strata[in_category]
+    population, sampled = _df.attrs['sample_strata']
+    return estimate_value_counts(values, strata, np.asarray(population),
+                                 np.asarray(sampled))
+
+
+class Refinements:
+    """Exact value counts computed off the script thread, by request key
+
+    The queue is shared by every session. Each session reports the keys its
+    last run is waiting on, and queued work is cancelled only once no
+    session waits on it. A count that raises leaves the queue and is kept
+    as failed, so its request falls back to the exact path instead of being
+    resubmitted.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._futures = OrderedDict()
+        self._failed = OrderedDict()
+        self._waiting = {}  # Session token -> keys its last run waits on
+        self._lock = threading.Lock()
+
+    def submit(self, key, df, column, category):
+        """Queue an exact count unless it is already queued or done"""
+        with self._lock:
+            if key not in self._futures or self._futures[key].cancelled():
+                self._futures[key] = self._executor.submit(
+                    count_values, df, column, category)
+            self._futures.move_to_end(key)
+            while len(self._futures) > self.max_entries:
+                self._futures.popitem(last=False)
+
+    def wait_for(self, session, keys):
+        """Record the keys a session waits on; cancel work no session wants"""
+        with self._lock:
+            dropped = self._waiting.pop(session, set()) - set(keys)
+            if keys:
+                self._waiting[session] = set(keys)
+            wanted = set().union(*self._waiting.values())
+            for key in dropped - wanted:
+                future = self._futures.get(key)
+                if future is not None and future.cancel():  # False once running
+                    del self._futures[key]
+
+    def done(self, key):
+        future = self._futures.get(key)
+        return future is None or future.done()
+
+    def error(self, key):
+        """Exception raised by a key's count, or None if it has not failed"""
+        with self._lock:
+            future = self._futures.get(key)
+            if (future is not None and future.done() and not future.cancelled()
+                    and future.exception() is not None):
+                del self._futures[key]
+                self._failed[key] = future.exception()
+                while len(self._failed) > self.max_entries:
+                    self._failed.popitem(last=False)
+            return self._failed.get(key)
+
+    def result(self, key):
+        """Exact counts for a key, or None while pending, failed or unknown"""
+        future = self._futures.get(key)
+        if future is None or not future.done() or future.cancelled():
+            return None
+        return None if future.exception() else future.result()
+
+
+@st.cache_resource
+def get_refinements():
+    """Refinement queue shared by all sessions"""
+    return Refinements()
+
+
+def select_approximate_mode():
+    """Sidebar switch between exact counts and sampled estimates"""
+    st.sidebar.subheader("Query Mode")
+    if st.sidebar.checkbox("Approximate Results", key="approximate"):
+        st.sidebar.checkbox("Refine to Exact in Background", value=True,
+                            key="approximate_refine")
+        st.sidebar.caption(
+            f"Estimated from a {SAMPLE_RATE:.0%} sample of every category and "
+            "year; bars show 95% confidence intervals")
+
+
+def use_estimates(df, column, category):
+    """Whether counts for this request come from the sample, refining if asked"""
+    if not st.session_state.get("approximate") or 'sample_stratum' not in df:
+        return False
+    key = (dataset_version(df), column, category)
+    refinements = get_refinements()
+    if refinements.result(key) is not None:
+        return False
+    if refinements.error(key) is not None:
+        return False  # Exact path; raises the same error in the view if it recurs
+    if st.session_state.get("approximate_refine"):
+        refinements.submit(key, df, column, category)
+        st.session_state.setdefault("refining", set()).add(key)
+    return True
+
+
+def value_counts(df, column, category='All Types'):
+    """Memoized value counts, shared by a view's chart and metrics
+
+    In approximate mode these are sample estimates until the exact counts
+    arrive from the background refinement.
+    """
+    version = dataset_version(df)
+    if use_estimates(df, column, category):
+        return get_value_estimates(df, version, column, category)['count']
+    if st.session_state.get("approximate"):
+        refined = get_refinements().result((version, column, category))
+        if refined is not None:
+            return refined
+    return get_value_counts(df, version, column, category)
+
+
+def count_intervals(df, column, category='All Types'):
+    """95% intervals for value_counts() estimates, or None for exact counts"""
+    if not use_estimates(df, column, category):
+        return None
+    return get_value_estimates(df, dataset_version(df), column, category)[['low', 'high']]
+
+
+def with_intervals(data, intervals, key):
+    """Add the low/high interval columns to chart data keyed by `key`"""
+    if intervals is None:
+        return data
+    return data.merge(intervals.rename_axis(key).reset_index(), on=key, how='left')
+
+
+def error_bars(base):
+    """Interval rules over a bar chart's base encoding"""
+    return base.mark_rule(color='white', strokeWidth=2).encode(
+        y='low:Q',
+        y2='high:Q',
+        tooltip=[alt.Tooltip('low:Q', title='95% Low', format=',.0f'),
+                 alt.Tooltip('high:Q', title='95% High', format=',.0f')]
+    )
+
+
+def watch_refinements():
+    """Rerun once the exact counts behind the shown estimates are ready"""
+    keys = st.session_state.pop("refining", set())
+    session = st.session_state.setdefault("refinement_session", uuid.uuid4().hex)
+    get_refinements().wait_for(session, keys)
+    if keys:
+        _refinement_watcher(list(keys))
+
+
+@st.fragment(run_every=1)
+def _refinement_watcher(keys):
+    refinements = get_refinements()
+    if all(refinements.done(key) for key in keys):
+        st.rerun()
+    st.caption("Showing estimates; exact counts are on the way...")
+
+
+@st.cache_resource(max_entries=CHART_CACHE_SIZE)
+def get_chart_spec(view, options, version, _build):
+    """Build a chart once per view, options and dataset version
+
+    Altair charts are stored as their Vega-Lite dict, so a repeated rerun
+    skips both building and serializing them; Plotly figures are kept as
+    built.
+    """
+    chart = _build()
+    if isinstance(chart, alt.TopLevelMixin):
+        return chart.to_dict()
+    return chart
+
+
+def cached_chart(view, options, df, build):
+    """Chart from `build()`, reused while the view, its filters and cosmetic
+    options and the dataset are unchanged"""
+    return get_chart_spec(view, tuple(options), dataset_version(df), build)
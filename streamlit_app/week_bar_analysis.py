@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
+from view_model import cached_chart, count_intervals, error_bars, value_counts, with_intervals
 
 
 def create_week_bar_analysis(df):
@@ -13,13 +14,9 @@ def create_week_bar_analysis(df):
         key="week_bar_analysis_radio"
     )
 
-    # Filter data based on selection
-    if selected_incident != 'All Types':
-        df = df[df['incident_category'] == selected_incident]
-
     # Create day counts using incident_day_of_week
     day_counts = pd.DataFrame(
-        df['incident_day_of_week'].value_counts()).reset_index()
+        value_counts(df, 'incident_day_of_week', selected_incident)).reset_index()
     day_counts.columns = ['day', 'count']
 
     # Sort days in correct order
@@ -28,50 +25,62 @@ def create_week_bar_analysis(df):
     day_counts['day_num'] = day_counts['day'].map(
         {day: i for i, day in enumerate(day_order)})
     day_counts = day_counts.sort_values('day_num')
+    intervals = count_intervals(df, 'incident_day_of_week', selected_incident)
+    day_counts = with_intervals(day_counts, intervals, 'day')
 
-    # Create Altair chart with updated colors
-    base = alt.Chart(day_counts).encode(
-        x=alt.X('day:N',
-                sort=day_order,
-                title='Day of Week'),
-        y=alt.Y('count:Q', title='Number of Incidents'),
-        color=alt.condition(
-            f"datum.count == {day_counts['count'].max()}",
-            alt.value('#ff3333'),  # Brighter red for highest
-            alt.value('#00b4d8')  # Matching blue from polar plot
-        ),
-        tooltip=[
-            alt.Tooltip('day:N', title='Day'),
-            alt.Tooltip('count:Q', title='Incidents', format=',d')
-        ]
-    )
+    avg_count = day_counts['count'].mean()
 
-    bars = base.mark_bar(opacity=0.7)  # Add opacity to bars
+    def build_chart():
+        # Create Altair chart with updated colors
+        base = alt.Chart(day_counts).encode(
+            x=alt.X('day:N',
+                    sort=day_order,
+                    title='Day of Week'),
+            y=alt.Y('count:Q', title='Number of Incidents'),
+            color=alt.condition(
+                f"datum.count == {day_counts['count'].max()}",
+                alt.value('#ff3333'),  # Brighter red for highest
+                alt.value('#00b4d8')  # Matching blue from polar plot
+            ),
+            tooltip=[
+                alt.Tooltip('day:N', title='Day'),
+                alt.Tooltip('count:Q', title='Incidents', format=',d')
+            ]
+        )
 
-    text = base.mark_text(
-        align='center',
-        baseline='bottom',
-        dy=-5,
-        color='white'
-    ).encode(
-        text=alt.Text('count:Q', format=',d')
-    )
+        bars = base.mark_bar(opacity=0.7)  # Add opacity to bars
 
-    avg_count = day_counts['count'].mean()
-    avg_rule = alt.Chart(pd.DataFrame({'y': [avg_count]})).mark_rule(
-        strokeDash=[5, 5],
-        color='#ff3333',  # Matching red color
-        strokeWidth=2
-    ).encode(
-        y='y',
-        tooltip=[alt.Tooltip('y', title='Daily Average', format=',d')]
-    )
+        text = base.mark_text(
+            align='center',
+            baseline='bottom',
+            dy=-5,
+            color='white'
+        ).encode(
+            text=alt.Text('count:Q', format=',d')
+        )
 
-    chart = (bars + text + avg_rule).properties(
-        title=f'Incidents by Day of Week - {selected_incident}',
-        width='container',
-        height=500
-    )
+        avg_rule = alt.Chart(pd.DataFrame({'y': [avg_count]})).mark_rule(
+            strokeDash=[5, 5],
+            color='#ff3333',  # Matching red color
+            strokeWidth=2
+        ).encode(
+            y='y',
+            tooltip=[alt.Tooltip('y', title='Daily Average', format=',d')]
+        )
+
+        layers = bars + text + avg_rule
+        if intervals is not None:
+            layers += error_bars(base)
+        chart = layers.properties(
+            title=f'Incidents by Day of Week - {selected_incident}',
+            width='container',
+            height=500
+        )
+
+        return chart
+
+    chart = cached_chart(
+        'week_bar', [selected_incident, intervals is not None], df, build_chart)
 
     # Fix peak and lowest day calculation
     peak_day = day_counts.loc[day_counts['count'].idxmax(), 'day']
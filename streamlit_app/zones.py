@@ -0,0 +1,114 @@
+import json
+
+import numpy as np
+
+from locations import COORD_SCALE, MISSING_LOCATION, unpack_location_keys
+
+# GeoJSON feature properties tried, in order, for a zone's name
+ZONE_NAME_PROPERTIES = ['name', 'zone', 'beat', 'district', 'id']
+
+# Points x edges tested at once by the point-in-polygon kernel
+PIP_BLOCK = 2_000_000
+
+
+class ZoneSet:
+    """Named zones from a GeoJSON file, each a list of polygons
+
+    Polygons are kept as lists of closed (n, 2) lon/lat rings, the outer
+    ring first; features sharing a name form one zone.
+    """
+
+    def __init__(self, names, polygons):
+        self.names = names
+        self.polygons = polygons  # (zone code, rings) pairs
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _close_ring(ring):
+    ring = np.asarray(ring, dtype=np.float64)[:, :2]
+    if len(ring) and not np.array_equal(ring[0], ring[-1]):
+        ring = np.vstack([ring, ring[:1]])
+    return ring
+
+
+def load_zones(path):
+    """Read Polygon and MultiPolygon features of a GeoJSON file"""
+    with open(path) as f:
+        data = json.load(f)
+    features = data.get('features', [data] if data.get('type') == 'Feature' else [])
+
+    names, code_of, polygons = [], {}, []
+    for number, feature in enumerate(features):
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') == 'Polygon':
+            parts = [geometry['coordinates']]
+        elif geometry.get('type') == 'MultiPolygon':
+            parts = geometry['coordinates']
+        else:
+            continue
+
+        properties = feature.get('properties') or {}
+        name = next((str(properties[key]) for key in ZONE_NAME_PROPERTIES
+                     if properties.get(key) not in (None, '')), f"Zone {number + 1}")
+        if name not in code_of:
+            code_of[name] = len(names)
+            names.append(name)
+        for rings in parts:
+            polygons.append((code_of[name], [_close_ring(ring) for ring in rings]))
+
+    if not names:
+        raise ValueError(f"No polygons found in {path}")
+    return ZoneSet(names, polygons)
+
+
+def points_in_polygon(lon, lat, rings):
+    """Even-odd test of points against a polygon's rings, holes included
+
+    Counts how many ring edges a ray from each point crosses, for blocks of
+    points against all edges at once.
+    """
+    x1 = np.concatenate([ring[:-1, 0] for ring in rings])
+    y1 = np.concatenate([ring[:-1, 1] for ring in rings])
+    x2 = np.concatenate([ring[1:, 0] for ring in rings])
+    y2 = np.concatenate([ring[1:, 1] for ring in rings])
+    # Edges the ray can cross; horizontal edges never straddle a point
+    slope = np.divide(x2 - x1, y2 - y1, out=np.zeros_like(x1), where=y2 != y1)
+
+    inside = np.zeros(len(lon), dtype=bool)
+    block = max(1, PIP_BLOCK // max(len(x1), 1))
+    for start in range(0, len(lon), block):
+        px = lon[start:start + block, None]
+        py = lat[start:start + block, None]
+        straddles = (y1 > py) != (y2 > py)
+        crosses = straddles & (px < x1 + (py - y1) * slope)
+        inside[start:start + block] = crosses.sum(axis=1) % 2 == 1
+    return inside
+
+
+def assign_zones(keys, zones):
+    """Zone code of every incident from its location key, -1 outside all zones
+
+    Distinct locations are tested once; each polygon only tests the still
+    unassigned locations inside its bounding box. Where zones overlap, the
+    first polygon in the file wins.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    locations, inverse = np.unique(keys, return_inverse=True)
+    lat_q, lon_q = unpack_location_keys(locations)
+    lat, lon = lat_q / COORD_SCALE, lon_q / COORD_SCALE
+
+    codes = np.full(len(locations), -1, dtype=np.int16)
+    open_locations = locations != MISSING_LOCATION
+    for zone, rings in zones.polygons:
+        west, south = rings[0].min(axis=0)
+        east, north = rings[0].max(axis=0)
+        candidates = np.flatnonzero(open_locations & (lon >= west) & (lon <= east) &
+                                    (lat >= south) & (lat <= north))
+        if not len(candidates):
+            continue
+        inside = candidates[points_in_polygon(lon[candidates], lat[candidates], rings)]
+        codes[inside] = zone
+        open_locations[inside] = False
+    return codes[inverse]